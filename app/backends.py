@@ -0,0 +1,204 @@
+import contextlib
+import hashlib
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+# ------------------------------------------------------------------------------
+# INFERENCE BACKENDS
+# ------------------------------------------------------------------------------
+# eager       : nn.Module 그대로 실행
+# compile     : torch.compile (inductor FX 그래프 캐시를 cache_dir에 보관)
+# torchscript : torch.jit.trace 결과를 cache_dir에 저장/재사용
+# onnx        : ONNX로 export(torch.export 기반, onnxscript 필요) 후 ONNX Runtime(CPU)으로 실행, .onnx 파일 재사용
+BACKENDS = ("eager", "compile", "torchscript", "onnx")
+
+
+def checkpoint_hash(path, chunk_size=1 << 20):
+    """체크포인트 파일 내용의 sha256 앞 16자리 (파일이 없으면 None)"""
+    if not path or not os.path.exists(path): return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+@contextlib.contextmanager
+def _export_mode(model):
+    """trace/export 동안 데이터 의존 분기(패딩 trim, fused fast path)를 끄고 고정 그래프로 기록"""
+    encoders = [m for m in model.modules() if hasattr(m, "trim_padding")]
+    saved_trim = [m.trim_padding for m in encoders]
+    has_flag = hasattr(torch.backends.mha, "set_fastpath_enabled")
+    saved_fastpath = torch.backends.mha.get_fastpath_enabled() if has_flag else None
+    for m in encoders: m.trim_padding = False
+    if has_flag: torch.backends.mha.set_fastpath_enabled(False)
+    try:
+        yield
+    finally:
+        for m, flag in zip(encoders, saved_trim): m.trim_padding = flag
+        if has_flag: torch.backends.mha.set_fastpath_enabled(saved_fastpath)
+
+
+class _FPExportWrapper(nn.Module):
+    """FPModelTied_OrganCLIP -> (v_pred, z_pred) 고정 시그니처"""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, values, attention_mask, organ_id):
+        return self.model(input_ids, values, attention_mask, organ_id=organ_id, return_smiles=True)
+
+
+class FPBackend:
+    """export된 FP 실행기를 FPModelTied_OrganCLIP과 같은 호출 방식으로 감쌈"""
+    def __init__(self, fn, kind):
+        self.fn = fn
+        self.kind = kind
+
+    def __call__(self, input_ids, values, attention_mask, organ_id=None, return_smiles=False):
+        v_pred, z_pred = self.fn(input_ids, values, attention_mask, organ_id)
+        return (v_pred, z_pred) if return_smiles else v_pred
+
+
+class OrtRunner:
+    """ONNX Runtime 세션을 torch 텐서 입출력 함수처럼 호출"""
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        if num_threads: opts.intra_op_num_threads = int(num_threads)
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, *inputs):
+        feed = {name: np.ascontiguousarray(x.detach().cpu().numpy()) for name, x in zip(self.input_names, inputs)}
+        outputs = self.session.run(None, feed)
+        outputs = [torch.from_numpy(o) for o in outputs]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+def _example_inputs(name, batch=2, length=None):
+    if name == "fp":
+        L = length or 18
+        ids = torch.randint(4, 100, (batch, L), dtype=torch.long)
+        return (ids, torch.randn(batch, L), torch.ones(batch, L, dtype=torch.long), torch.zeros(batch, dtype=torch.long))
+    L = 3
+    return (torch.tensor([[1, 2, 4]] * batch, dtype=torch.long), torch.zeros(batch, L),
+            torch.ones(batch, L, dtype=torch.long), torch.zeros(batch, dtype=torch.long), torch.randn(batch, 768))
+
+
+_MAX_SEQ = {"fp": 258, "fr": 515}   # [CLS][ORGAN] + 256 / [CLS][DRUG][CELL] + 512
+
+_INPUT_NAMES = {
+    "fp": (["input_ids", "values", "attention_mask", "organ_id"], ["v_pred", "z_pred"]),
+    "fr": (["input_ids", "values", "attention_mask", "cell_line_id", "smiles_emb"], ["delta"]),
+}
+
+
+def build_backend(model, name, kind="eager", cache_dir=None, ckpt_hash=None, tag="", lengths=None):
+    """
+    name: "fp" | "fr"
+    반환값은 원래 모델과 같은 방식으로 호출 가능한 객체입니다.
+    export 실패 시 eager 모델로 되돌아갑니다.
+    lengths: 서비스가 실행하는 시퀀스 길이 (torchscript는 길이마다 eager 결과와 비교, 다르면 eager로)
+    """
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown backend: {kind} (choose from {BACKENDS})")
+    if kind == "eager":
+        return model
+
+    # 체크포인트가 없으면(랜덤 가중치) 디스크 캐시를 쓰지 않음
+    cache_path = None
+    if cache_dir and ckpt_hash:
+        os.makedirs(cache_dir, exist_ok=True)
+        key = f"{name}-{ckpt_hash}-{tag}-torch{torch.__version__.split('+')[0]}"
+        cache_path = os.path.join(cache_dir, key + (".onnx" if kind == "onnx" else ".ts"))
+
+    target = _FPExportWrapper(model).eval() if name == "fp" else model
+    try:
+        if kind == "compile":
+            if cache_dir:
+                os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.join(cache_dir, "inductor"))
+                os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+            # 서비스가 이미 길이 구간 단위로 잘라서 넘기므로 데이터 의존 trim(graph break)은 끔
+            for m in target.modules():
+                if hasattr(m, "trim_padding"): m.trim_padding = False
+            fn = torch.compile(target, dynamic=True)
+            cache_path = None
+        elif kind == "torchscript":
+            fn = _load_or_trace(target, name, cache_path, lengths or (_example_inputs(name)[0].shape[1],))
+        else:
+            fn = OrtRunner(_load_or_export_onnx(target, name, cache_path), torch.get_num_threads())
+    except Exception as e:
+        print(f"❌ {name.upper()} backend '{kind}' failed, falling back to eager: {e}")
+        return model
+
+    print(f"✅ {name.upper()} backend: {kind}" + (f" ({os.path.basename(cache_path)})" if cache_path else ""))
+    return FPBackend(fn, kind) if name == "fp" else fn
+
+
+def _load_or_trace(target, name, cache_path, lengths):
+    if cache_path and os.path.exists(cache_path):
+        traced = torch.jit.load(cache_path)
+    else:
+        with _export_mode(target), torch.no_grad():
+            traced = torch.jit.trace(target, _example_inputs(name), check_trace=False)
+        traced = torch.jit.freeze(traced.eval())
+    try:
+        _check_traced(target, traced, name, lengths)
+    except RuntimeError:
+        if cache_path and os.path.exists(cache_path): os.remove(cache_path)
+        raise
+    if cache_path and not os.path.exists(cache_path): torch.jit.save(traced, cache_path)
+    return traced
+
+
+def _check_traced(target, traced, name, lengths, batch=3):
+    """
+    trace는 예시 입력 하나(L=18)의 실행 경로를 고정하므로 길이에 따라 갈리는 파이썬 분기가 있으면 다른 길이에서 결과가 틀어짐
+    -> 서비스가 쓰는 길이마다 (FP는 패딩 행 포함) eager 결과와 비교하고 다르면 RuntimeError
+    """
+    generator_state = torch.random.get_rng_state()
+    torch.manual_seed(0)
+    try:
+        with torch.no_grad():
+            for L in lengths:
+                inputs = _example_inputs(name, batch, L)
+                if name == "fp":
+                    inputs[2][1, max(2, L // 2):] = 0   # 길이 구간 안에서 패딩된 요청
+                expected, got = target(*inputs), traced(*inputs)
+                if isinstance(expected, torch.Tensor): expected, got = (expected,), (got,)
+                for e, g in zip(expected, got):
+                    e, g = e.float(), g.float()
+                    diff = (e - g).abs().max().item()
+                    if not diff <= 1e-4 + 1e-3 * e.abs().max().item():
+                        raise RuntimeError(f"traced {name.upper()} output differs from eager at length {L} "
+                                           f"(max |diff| {diff:.3g})")
+    finally:
+        torch.random.set_rng_state(generator_state)
+
+
+def _load_or_export_onnx(target, name, cache_path):
+    if cache_path and os.path.exists(cache_path):
+        return cache_path
+    if cache_path is None:
+        import tempfile
+        cache_path = os.path.join(tempfile.mkdtemp(prefix="babayakga-onnx-"), f"{name}.onnx")
+
+    from torch.export import Dim
+
+    # 배치 / 시퀀스 길이를 동적 축으로 export (길이 구간 배치를 그대로 실행)
+    inputs, outputs = _INPUT_NAMES[name]
+    batch = Dim("batch", min=1, max=4096)
+    seq = Dim("seq", min=3, max=_MAX_SEQ[name])
+    dynamic_shapes = tuple({0: batch, 1: seq} for _ in inputs[:3]) + tuple({0: batch} for _ in inputs[3:])
+    with _export_mode(target), torch.no_grad():
+        torch.onnx.export(
+            target, _example_inputs(name), cache_path,
+            input_names=inputs, output_names=outputs, dynamic_shapes=dynamic_shapes,
+            dynamo=True,
+        )
+    return cache_path
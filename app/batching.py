@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+from .executor import QueueFullError
+from .telemetry import STAGE_SECONDS
+
+# ------------------------------------------------------------------------------
+# DYNAMIC MICRO-BATCHING
+# ------------------------------------------------------------------------------
+class MicroBatchScheduler:
+    """
+    동시에 들어온 요청들을 큐에 모아 하나의 배치 forward로 처리합니다.
+
+    - 첫 요청이 도착하면 최대 max_wait_ms 동안 추가 요청을 기다립니다.
+    - 배치 크기가 max_batch_size에 도달하면 즉시 실행합니다.
+    - 대기 중인 요청이 max_queue를 넘으면 QueueFullError로 즉시 거절합니다.
+    - batch_fn(list_of_items) 는 코루틴 함수이며, 입력과 같은 순서로 결과 리스트를 돌려줘야 합니다.
+      (보통 InferenceExecutor.run 을 감싸서 이벤트 루프 밖에서 실행)
+    """
+    def __init__(self, name, batch_fn, max_batch_size=32, max_wait_ms=5.0,
+                 max_queue=None, max_concurrency=1, latency_window=1024):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = float(max_wait_ms) / 1000.0
+        self.max_queue = int(max_queue) if max_queue else None
+        self.max_concurrency = max(1, int(max_concurrency))
+
+        self._queue = None
+        self._worker = None
+        self._slots = None
+        self._tasks = set()
+
+        # Metrics
+        self.num_requests = 0
+        self.num_batches = 0
+        self.num_rejected = 0
+        self.batch_size_counts = {}
+        self._queue_latencies = deque(maxlen=latency_window)
+        self._batch_latencies = deque(maxlen=latency_window)
+
+    async def submit(self, item):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+        if self.max_queue is not None and self._queue.qsize() >= self.max_queue:
+            self.num_rejected += 1
+            raise QueueFullError(f"{self.name} queue is full ({self.max_queue})")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # 실행 슬롯이 빌 때까지 기다리는 동안 요청이 큐에 쌓여 다음 배치가 커집니다.
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0: break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = loop.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        try:
+            await self._execute(batch)
+        finally:
+            self._slots.release()
+
+    async def _execute(self, batch):
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self._queue_latencies.append(started - enqueued)
+            STAGE_SECONDS.observe(started - enqueued, self.name, "queue_wait")
+
+        items = [item for item, _, _ in batch]
+        try:
+            results = await self.batch_fn(items)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done(): future.set_exception(e)
+            return
+        finally:
+            self._record_batch(len(batch), time.perf_counter() - started)
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done(): future.set_result(result)
+
+    def _record_batch(self, size, elapsed):
+        self.num_requests += size
+        self.num_batches += 1
+        self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+        self._batch_latencies.append(elapsed)
+
+    @property
+    def pending(self):
+        """큐에서 배치를 기다리는 요청 수"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self):
+        def summarize(samples):
+            if not samples:
+                return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+            arr = np.asarray(samples) * 1000.0
+            return {
+                "mean_ms": float(arr.mean()),
+                "p50_ms": float(np.percentile(arr, 50)),
+                "p95_ms": float(np.percentile(arr, 95)),
+                "max_ms": float(arr.max()),
+            }
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "requests": self.num_requests,
+            "batches": self.num_batches,
+            "rejected": self.num_rejected,
+            "mean_batch_size": self.num_requests / self.num_batches if self.num_batches else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "queue_latency": summarize(self._queue_latencies),
+            "batch_latency": summarize(self._batch_latencies),
+            "pending": self.pending,
+            "max_queue": self.max_queue,
+        }
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# CACHE KEY
+# ------------------------------------------------------------------------------
+def hash_vector(vector, decimals=4):
+    """부동소수 오차에 흔들리지 않도록 10^-decimals 단위로 양자화한 벡터의 해시"""
+    q = np.round(np.asarray(vector, dtype=np.float64) * (10 ** decimals)).astype(np.int64)
+    return hashlib.sha1(q.tobytes()).hexdigest()
+
+
+def response_cache_version(service):
+    """
+    응답에 영향을 주는 서버 구성 -> 캐시 키 버전 문자열
+    sqlite 2차 캐시는 재시작 / 워커 간에 공유되므로 FR 체크포인트, precision, 유전자 세트가 바뀌면 이전 결과를 쓰지 않음
+    """
+    return (f"{service.fr_checkpoint_hash}/{service.precision}/"
+            f"{service.enrichment.version}/{service.enrichment_permutations}")
+
+
+def response_cache_key(drug_vector, cell_line_id, gene_names, gene_values, decimals=4, version=""):
+    h = hashlib.sha1()
+    h.update(f"{version}|".encode())
+    h.update(hash_vector(drug_vector, decimals).encode())
+    h.update(f"|cell={int(cell_line_id)}|".encode())
+    # 유전자 시그니처: 이름 순서 + 양자화된 발현값
+    h.update("\x1f".join(str(g) for g in gene_names).encode())
+    h.update(hash_vector(gene_values, decimals).encode())
+    return h.hexdigest()
+
+
+# ------------------------------------------------------------------------------
+# LRU + TTL CACHE (+ optional sqlite tier)
+# ------------------------------------------------------------------------------
+class ResponseCache:
+    """
+    프로세스 내 LRU + TTL 캐시
+
+    - maxsize를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    - disk_path를 지정하면 sqlite(WAL) 2차 캐시를 함께 사용합니다.
+      재시작 후에도 유지되며 같은 파일을 여는 uvicorn 워커끼리 공유됩니다.
+      purge_every번 쓸 때마다 만료 행을 지우고, disk_maxsize를 넘으면 만료가 가까운 행부터 지웁니다.
+    - sqlite 조회 / 쓰기는 블로킹이므로 async 핸들러에서는 asyncio.to_thread로 호출합니다.
+    """
+    def __init__(self, maxsize=4096, ttl=3600.0, disk_path=None, disk_maxsize=100_000, purge_every=256):
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self.disk_maxsize = int(disk_maxsize)
+        self.purge_every = max(1, int(purge_every))
+        self._disk_writes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_evictions = 0
+
+        self.disk_path = disk_path
+        self._db = None
+        self._db_pid = None
+        self._db_lock = threading.Lock()   # 연결 하나를 여러 스레드(asyncio.to_thread)가 공유하므로 실행을 직렬화
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self.purge()
+
+    def _connect(self):
+        # sqlite 연결은 fork를 넘어 공유하면 안 되므로 프로세스마다 새로 엽니다 (preload 후 fork 서버)
+        # 호출자는 _db_lock을 잡은 상태여야 합니다.
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS response_cache_expires ON response_cache (expires)")
+            self._db_pid = os.getpid()
+        return self._db
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires >= now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            if not self.disk_path:
+                self.misses += 1
+                return None
+
+        # sqlite 조회는 메모리 캐시 잠금 밖에서 (다른 스레드의 메모리 hit를 막지 않도록)
+        with self._db_lock:
+            row = self._connect().execute(
+                "SELECT value, expires FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        with self._lock:
+            if row is not None and row[1] >= now:
+                value = json.loads(row[0])
+                self._put(key, value, row[1])
+                self.disk_hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._put(key, value, expires)
+            if not self.disk_path:
+                return
+            self._disk_writes += 1
+            purge = self._disk_writes % self.purge_every == 0
+        data = json.dumps(value)
+        with self._db_lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, data, expires),
+            )
+        if purge:
+            self.purge()
+
+    def purge(self):
+        """sqlite 2차 캐시에서 만료된 행을 지우고, disk_maxsize를 넘는 만큼 만료가 가까운 행부터 삭제"""
+        if not self.disk_path:
+            return 0
+        evicted = 0
+        with self._db_lock:
+            db = self._connect()
+            removed = db.execute("DELETE FROM response_cache WHERE expires < ?", (time.time(),)).rowcount
+            if self.disk_maxsize > 0:   # 0이면 행 수 제한 없음
+                excess = db.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - self.disk_maxsize
+                if excess > 0:
+                    evicted = db.execute(
+                        "DELETE FROM response_cache WHERE key IN "
+                        "(SELECT key FROM response_cache ORDER BY expires LIMIT ?)", (excess,)
+                    ).rowcount
+        if evicted:
+            with self._lock:
+                self.disk_evictions += evicted
+        return removed + evicted
+
+    def _put(self, key, value, expires):
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "disk": bool(self.disk_path),
+            "disk_maxsize": self.disk_maxsize if self.disk_path else 0,
+            "disk_evictions": self.disk_evictions,
+        }
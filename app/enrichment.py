@@ -0,0 +1,191 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+from .genes import normalize_gene_id
+
+# ------------------------------------------------------------------------------
+# GENE SET COLLECTIONS
+# ------------------------------------------------------------------------------
+def read_gmt(path):
+    """GMT 파일 -> {gene_set_name: [gene, ...]}  (한 줄: 이름 \\t 설명 \\t 유전자...)"""
+    gene_sets = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n\r").split("\t")
+            if len(fields) < 3: continue
+            gene_sets[fields[0]] = [g for g in fields[2:] if g]
+    return gene_sets
+
+
+def expand_gmt_paths(spec):
+    """'a.gmt:b.gmt' / 디렉터리 -> 정렬된 GMT 파일 경로 리스트"""
+    paths = []
+    for item in (spec or "").split(os.pathsep):
+        if not item: continue
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.gmt"))))
+        elif os.path.exists(item):
+            paths.append(item)
+    return paths
+
+
+def gene_sets_from_map(gene_to_pathway):
+    """{gene: pathway} 사전 -> {pathway: [gene, ...]}"""
+    gene_sets = {}
+    for gene, pathway in gene_to_pathway.items():
+        gene_sets.setdefault(pathway, []).append(gene)
+    return gene_sets
+
+
+# ------------------------------------------------------------------------------
+# ENRICHMENT ENGINE
+# ------------------------------------------------------------------------------
+class GeneSetEnrichment:
+    """
+    FR 출력 유전자 순서(fr_gene_ids)에 맞춘 희소 유전자 x 유전자 세트 소속 행렬
+
+    - membership: (n_genes, n_sets) CSR, 값은 1/세트 크기 -> |delta| @ membership 이 세트별 평균 |delta|
+    - score(deltas)            : (B, n_genes) 전체를 한 번의 희소 행렬곱으로 채점
+    - permutation_pvalues(...) : 유전자 라벨 순열 귀무분포를 순열 묶음 단위 행렬곱으로 계산
+    - version                  : 유전자 세트 내용 해시 (결과 캐시 키에 포함)
+    """
+    def __init__(self, names, membership, sizes, version):
+        self.names = np.asarray(names, dtype=object)
+        self.membership = sp.csr_matrix(membership, dtype=np.float32)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.version = version
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, gene_ids, gene_sets, version, min_size=1, max_size=None):
+        """
+        gene_ids : 출력 위치별 식별자 목록 (예: [[symbol, ensembl_id], ...]) 또는 식별자 하나씩
+        gene_sets: {name: [gene, ...]}
+        """
+        index = {}
+        for pos, ids in enumerate(gene_ids):
+            for gene in ([ids] if isinstance(ids, str) else ids):
+                if gene: index.setdefault(normalize_gene_id(gene), pos)
+
+        names, rows, cols = [], [], []
+        for name, genes in gene_sets.items():
+            members = np.unique(np.fromiter(
+                (index.get(normalize_gene_id(g), -1) for g in genes), dtype=np.int64, count=len(genes)))
+            members = members[members >= 0]
+            if len(members) < min_size or (max_size and len(members) > max_size): continue
+            rows.append(members)
+            cols.append(np.full(len(members), len(names), dtype=np.int64))
+            names.append(name)
+
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+        sizes = np.bincount(cols, minlength=len(names))
+        weights = (1.0 / np.maximum(sizes, 1))[cols].astype(np.float32)
+        membership = sp.csr_matrix((weights, (rows, cols)), shape=(len(gene_ids), len(names)))
+        return cls(names, membership, sizes, version)
+
+    @classmethod
+    def from_gmt(cls, paths, gene_ids, cache_dir=None, min_size=3, max_size=1000):
+        """
+        GMT 파일들을 읽어 소속 행렬을 만듭니다.
+        cache_dir를 지정하면 (GMT 내용, 출력 유전자 순서, 크기 제한) 해시별로 .npz에 저장해 재사용합니다.
+        """
+        h = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as f: h.update(f.read())
+        version = h.hexdigest()[:12]
+
+        cache_path = None
+        if cache_dir:
+            key = hashlib.sha256(f"{version}|{min_size}|{max_size}|".encode())
+            key.update("\x1f".join("\x1e".join([ids] if isinstance(ids, str) else ids) for ids in gene_ids).encode())
+            cache_path = os.path.join(cache_dir, f"genesets-{key.hexdigest()[:16]}.npz")
+            if os.path.exists(cache_path):
+                return cls.load(cache_path)
+
+        gene_sets = {}
+        for path in paths:
+            gene_sets.update(read_gmt(path))
+        engine = cls.build(gene_ids, gene_sets, version, min_size=min_size, max_size=max_size)
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            engine.save(cache_path)
+        return engine
+
+    def save(self, path):
+        m = self.membership
+        np.savez(path, names=self.names.astype(str), sizes=self.sizes, version=np.array(self.version),
+                 data=m.data, indices=m.indices, indptr=m.indptr, shape=np.array(m.shape))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        membership = sp.csr_matrix((data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+        return cls(data["names"].tolist(), membership, data["sizes"], str(data["version"]))
+
+    # --------------------------------------------------------------------------
+    # SCORING
+    # --------------------------------------------------------------------------
+    def score(self, deltas):
+        """
+        deltas: (B, n_genes) -> (세트별 평균 |delta| (B, n_sets), 세트별 평균 delta (B, n_sets))
+        """
+        deltas = np.atleast_2d(np.asarray(deltas, dtype=np.float32))
+        magnitude = np.asarray(np.abs(deltas) @ self.membership)
+        direction = np.asarray(deltas @ self.membership)
+        return magnitude, direction
+
+    def permutation_pvalues(self, deltas, n_permutations=1000, chunk_size=64, seed=0):
+        """
+        유전자 라벨을 무작위로 섞은 귀무분포 대비 평균 |delta|의 단측 p-value (B, n_sets)
+        배치 전체가 같은 순열을 공유하고, chunk_size개 순열을 한 번의 행렬곱으로 채점합니다.
+        """
+        absd = np.abs(np.atleast_2d(np.asarray(deltas, dtype=np.float32)))
+        B, G = absd.shape
+        observed = np.asarray(absd @ self.membership)
+        exceed = np.zeros_like(observed, dtype=np.int64)
+
+        rng = np.random.default_rng(seed)
+        for start in range(0, n_permutations, chunk_size):
+            c = min(chunk_size, n_permutations - start)
+            perms = rng.permuted(np.broadcast_to(np.arange(G), (c, G)), axis=1)
+            null = np.asarray(absd[:, perms].reshape(B * c, G) @ self.membership).reshape(B, c, -1)
+            exceed += (null >= observed[:, None, :]).sum(axis=1)
+        return (exceed + 1.0) / (n_permutations + 1.0)
+
+    def summarize(self, deltas, top_n=20, n_permutations=0, seed=0):
+        """
+        배치 전체를 채점해 요청별 상위 top_n 유전자 세트를 반환
+        -> [{"pathways": {name: score}, "enrichment": [{"name", "score", "direction", "size"[, "p_value"]}]}, ...]
+        """
+        deltas = np.atleast_2d(np.asarray(deltas, dtype=np.float32))
+        if len(self) == 0:
+            return [{"pathways": {}, "enrichment": []} for _ in range(len(deltas))]
+
+        magnitude, direction = self.score(deltas)
+        pvalues = self.permutation_pvalues(deltas, n_permutations, seed=seed) if n_permutations > 0 else None
+
+        k = min(top_n, len(self))
+        top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1), axis=1)
+
+        results = []
+        for b, sets in enumerate(top):
+            enrichment = []
+            for s in sets:
+                item = {
+                    "name": str(self.names[s]),
+                    "score": float(magnitude[b, s]),
+                    "direction": float(direction[b, s]),
+                    "size": int(self.sizes[s]),
+                }
+                if pvalues is not None: item["p_value"] = float(pvalues[b, s])
+                enrichment.append(item)
+            results.append({"pathways": {e["name"]: e["score"] for e in enrichment}, "enrichment": enrichment})
+        return results
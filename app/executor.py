@@ -0,0 +1,93 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing as mp
+
+import torch
+
+# ------------------------------------------------------------------------------
+# INFERENCE EXECUTOR
+# ------------------------------------------------------------------------------
+class QueueFullError(RuntimeError):
+    """추론 대기열이 가득 찼을 때 발생 (API에서는 503으로 변환)"""
+
+
+# 프로세스 워커마다 하나씩 보유하는 모델 레플리카
+_WORKER_SERVICE = None
+
+
+def _init_thread_worker(num_threads):
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+
+def _init_process_worker(service_kwargs, num_threads):
+    global _WORKER_SERVICE
+    from .services import IntegratedService
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    _WORKER_SERVICE = IntegratedService(**service_kwargs)
+    print(f"✅ Inference worker ready (pid={os.getpid()}, threads={torch.get_num_threads()})")
+
+
+def _call_worker_service(method, args):
+    return getattr(_WORKER_SERVICE, method)(*args)
+
+
+class InferenceExecutor:
+    """
+    IntegratedService 호출을 이벤트 루프 밖에서 실행하는 워커 풀
+
+    - mode="thread" : 같은 프로세스의 모델을 공유, 스레드 풀에서 실행
+    - mode="process": 프로세스마다 자체 모델 레플리카를 로드 (GIL 경합 없음)
+    """
+    def __init__(self, service, mode="thread", num_workers=1, threads_per_worker=None, service_kwargs=None):
+        self.service = service
+        self.mode = mode
+        self.num_workers = max(1, int(num_workers))
+
+        if threads_per_worker is None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.threads_per_worker = int(threads_per_worker)
+
+        if mode == "thread":
+            # torch.set_num_threads는 프로세스 전역 설정이므로 한 번만 적용
+            _init_thread_worker(self.threads_per_worker)
+            self._pool = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="inference")
+        elif mode == "process":
+            if service_kwargs is None:
+                raise ValueError("process 모드에는 service_kwargs가 필요합니다.")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_process_worker,
+                initargs=(service_kwargs, self.threads_per_worker),
+            )
+        else:
+            raise ValueError(f"Unknown executor mode: {mode}")
+
+        self.in_flight = 0
+        print(f"⚙️ Inference executor: mode={mode}, workers={self.num_workers}, threads/worker={self.threads_per_worker}")
+
+    async def run(self, method, *args):
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            if self.mode == "thread":
+                fn = getattr(self.service, method)
+                return await loop.run_in_executor(self._pool, fn, *args)
+            return await loop.run_in_executor(self._pool, _call_worker_service, method, args)
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "workers": self.num_workers,
+            "threads_per_worker": self.threads_per_worker,
+            "in_flight": self.in_flight,
+        }
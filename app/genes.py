@@ -0,0 +1,183 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from itertools import repeat
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# GENE IDENTIFIER RESOLUTION
+# ------------------------------------------------------------------------------
+# 요청 유전자 식별자(심볼, 별칭 / 이전 심볼, 버전이 붙은 Ensembl ID 혼용)를 FP / FR token id로 바꿉니다.
+#
+#   index   : 정규화된 식별자 -> 유전자 행 번호 (파이썬 해시 테이블 하나)
+#   fp_ids  : 행별 FP token id (-1: FP vocab에 없음), 마지막 칸은 찾지 못한 식별자용 -1
+#   fr_ids  : 행별 FR 입력 token id (Ensembl ID 기준)
+#
+# 같은 키에 여러 유전자가 걸리면 FP vocab 키 > 메타데이터 심볼 > Ensembl ID > 별칭 순으로 먼저 등록된 쪽을 씁니다.
+# 둘 이상의 유전자를 가리키는 별칭은 모호하므로 등록하지 않습니다.
+LAYOUT_CACHE_MAX_GENES = 2_000_000   # 레이아웃 캐시에 담는 식별자 수 합계 상한 (int64 x 2 -> 약 32MB)
+
+
+def normalize_gene_id(gene):
+    """대소문자 / 공백 / Ensembl 버전 접미사(ENSG... .12) 차이를 무시"""
+    gene = str(gene).strip().upper()
+    if gene.startswith("ENS") and "." in gene:
+        gene = gene.split(".", 1)[0]
+    return gene
+
+
+def read_alias_table(path):
+    """
+    별칭 테이블 (csv / tsv / parquet) -> [(alias, target), ...]  target은 심볼 또는 Ensembl ID
+    - HGNC 형식: symbol + alias_symbol / prev_symbol 열 ("|"로 구분된 목록), 이전 심볼을 먼저 등록
+    - 그 외: alias + (symbol | target) 열, 열 이름이 없으면 앞의 두 열
+    """
+    import pandas as pd
+
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, sep="," if path.endswith(".csv") else "\t", dtype=str, keep_default_na=False)
+    columns = {str(c).lower(): c for c in df.columns}
+
+    pairs = []
+    if "symbol" in columns and ("alias_symbol" in columns or "prev_symbol" in columns):
+        symbols = df[columns["symbol"]].astype(str).tolist()
+        for name in ("prev_symbol", "alias_symbol"):
+            if name not in columns: continue
+            for symbol, aliases in zip(symbols, df[columns[name]].astype(str).tolist()):
+                pairs.extend((alias, symbol) for alias in aliases.split("|") if alias)
+        return pairs
+
+    alias_col = columns.get("alias", df.columns[0])
+    target_col = columns.get("symbol", columns.get("target", df.columns[1]))
+    return [(a, t) for a, t in zip(df[alias_col].astype(str).tolist(), df[target_col].astype(str).tolist()) if a and t]
+
+
+class GeneResolver:
+    """
+    유전자 식별자 배열 -> (FP token id 배열, FR token id 배열), 없으면 -1
+
+    - 식별자는 str()로 바꾼 뒤 입력 배열 전체를 한 번의 map 패스로 조회하고, 못 찾은 식별자만 정규화(공백 / Ensembl 버전) 후 다시 조회
+    - 같은 유전자 목록(패널 레이아웃)이 반복되면 LRU 캐시에서 결과를 그대로 돌려줌 (cache_size=0이면 비활성화)
+      키는 목록 전체의 해시이므로 요청의 문자열 객체를 붙잡아 두지 않습니다.
+    - 반환 배열은 캐시와 공유되므로 읽기 전용입니다.
+    """
+    def __init__(self, index, fp_ids, fr_ids, cache_size=256):
+        self._index = index
+        self._missing = len(fp_ids)
+        self.fp_ids = np.append(np.asarray(fp_ids, dtype=np.int64), -1)
+        self.fr_ids = np.append(np.asarray(fr_ids, dtype=np.int64), -1)
+
+        self.cache_size = int(cache_size)
+        self._layouts = OrderedDict()
+        self._cached_genes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    @classmethod
+    def from_vocab(cls, vocab, alias_path=None, cache_size=256):
+        """CompiledVocab(FP vocab, FR vocab, 유전자 메타데이터) + 별칭 테이블(선택)로 인덱스 구성"""
+        symbols = vocab.meta_symbols.tolist()
+        ensembl = [normalize_gene_id(e) for e in vocab.meta_ensembl.tolist()]
+        fp_vocab = {str(k).upper(): int(v) for k, v in zip(vocab.fp_keys.tolist(), vocab.fp_ids.tolist())
+                    if not str(k).startswith("[")}
+        fr_vocab = {normalize_gene_id(k): v for k, v in vocab.fr_vocab_map.items() if not k.startswith("[")}
+
+        # 메타데이터 유전자 1개 = 1행 (FP는 심볼 또는 Ensembl ID 키, FR은 Ensembl ID)
+        fp_ids = [fp_vocab.get(s.upper(), fp_vocab.get(e, -1)) for s, e in zip(symbols, ensembl)]
+        fr_ids = [fr_vocab.get(e, -1) for e in ensembl]
+        by_symbol, by_ensembl = {}, {}
+        for row, (s, e) in enumerate(zip(symbols, ensembl)):
+            if s: by_symbol.setdefault(s.upper(), row)
+            if e: by_ensembl.setdefault(e, row)
+
+        # 1) FP vocab 키: 기존 토크나이저와 같은 id가 나오도록 가장 먼저 등록 (메타데이터에 없으면 새 행)
+        index = {}
+        for key, token_id in fp_vocab.items():
+            row = by_symbol.get(key, by_ensembl.get(key))
+            if row is None or fp_ids[row] != token_id:
+                row = len(fp_ids)
+                fp_ids.append(token_id)
+                fr_ids.append(fr_vocab.get(key, -1))
+            index[key] = row
+        # 2) 메타데이터 심볼, 3) Ensembl ID
+        for key, row in by_symbol.items(): index.setdefault(key, row)
+        for key, row in by_ensembl.items(): index.setdefault(key, row)
+
+        # 4) 별칭 / 이전 심볼: 대상이 이미 등록된 유전자이고 한 유전자만 가리킬 때만
+        n_aliases = 0
+        if alias_path and os.path.exists(alias_path):
+            candidates = {}
+            for alias, target in read_alias_table(alias_path):
+                row = index.get(normalize_gene_id(target))
+                if row is not None:
+                    candidates.setdefault(normalize_gene_id(alias), set()).add(row)
+            for key, rows in candidates.items():
+                if len(rows) == 1 and key not in index:
+                    index[key] = rows.pop()
+                    n_aliases += 1
+            print(f"✅ Gene aliases loaded: {n_aliases} from {alias_path}")
+        return cls(index, fp_ids, fr_ids, cache_size)
+
+    def _rows(self, gene_names):
+        rows = np.fromiter(
+            map(self._index.get, map(str.upper, gene_names), repeat(self._missing)),
+            dtype=np.int64, count=len(gene_names),
+        )
+        # 못 찾은 식별자 중 정규화로 바뀌는 것(공백, Ensembl 버전 접미사)만 다시 조회
+        miss = [i for i in np.flatnonzero(rows == self._missing).tolist()
+                if "." in gene_names[i] or gene_names[i] != gene_names[i].strip()]
+        if miss:
+            rows[miss] = [self._index.get(normalize_gene_id(gene_names[i]), self._missing) for i in miss]
+        return rows
+
+    def resolve(self, gene_names):
+        """
+        유전자 식별자 배열 -> (fp_ids, fr_ids) int64 배열 (찾지 못하면 -1)
+        문자열이 아닌 식별자(msgpack / 바이너리 프레임의 숫자 Entrez ID, parquet의 정수 열 이름 등)는 str()로 바꿔 조회합니다.
+        """
+        if isinstance(gene_names, np.ndarray):
+            gene_names = gene_names.tolist()
+        gene_names = list(map(str, gene_names))
+        key = (hashlib.blake2b("\x1f".join(gene_names).encode(), digest_size=16).digest()
+               if self.cache_size > 0 else None)
+        if key is not None:
+            with self._lock:
+                layout = self._layouts.get(key)
+                if layout is not None:
+                    self._layouts.move_to_end(key)
+                    self.hits += 1
+                    return layout
+
+        rows = self._rows(gene_names)
+        layout = (self.fp_ids[rows], self.fr_ids[rows])
+        for ids in layout: ids.setflags(write=False)
+        if key is not None:
+            with self._lock:
+                self.misses += 1
+                if key not in self._layouts:
+                    self._cached_genes += len(rows)
+                self._layouts[key] = layout
+                while self._layouts and (len(self._layouts) > self.cache_size
+                                         or self._cached_genes > LAYOUT_CACHE_MAX_GENES):
+                    self._cached_genes -= len(self._layouts.popitem(last=False)[1][0])
+        return layout
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "identifiers": len(self._index),
+            "layouts": len(self._layouts),
+            "cached_genes": self._cached_genes,
+            "maxsize": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,361 @@
+import os
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from .retrieval import valid_hits
+from .telemetry import span
+
+# ------------------------------------------------------------------------------
+# BULK INGESTION (샘플 x 유전자 행렬 -> FP 예측 벡터 parquet)
+# ------------------------------------------------------------------------------
+# 행 = 세포 / 샘플, 열 = 유전자. 파일 전체를 읽지 않고 chunk_size 행씩 CSR 블록으로 읽어
+#   CSR 토큰화 (FPTokenizer.encode_csr) -> FP forward (fp_batch 단위) -> parquet row group 하나
+#   (토큰화 ~ 검색은 predict_block: API에서는 chunk마다 추론 워커 풀 작업 하나)
+# 순서로 처리하므로 메모리 사용량은 파일 크기가 아니라 chunk_size에 비례합니다.
+#
+#   parquet : 유전자마다 숫자 컬럼 하나 + 샘플 ID 문자열 컬럼 (id_column, 기본: 첫 문자열 컬럼)
+#   csv/tsv : 첫 컬럼 = 샘플 ID, 헤더 = 유전자 이름 (.gz 등 압축 가능)
+#   h5ad    : AnnData X (CSR 또는 dense), obs 인덱스 = 샘플 ID, var 인덱스(또는 gene_column) = 유전자 (h5py 필요)
+#
+# 출력 parquet: sample_id, n_genes(입력에 사용된 유전자 수), recommended_drug_vector(fixed_size_list<float32>)
+#              [+ candidates, scores : 약물 라이브러리 상위 top_k]
+BULK_FORMATS = ("parquet", "csv", "h5ad")
+
+_MAGIC = {b"PAR1": "parquet", b"\x89HDF\r\n\x1a\n": "h5ad"}
+
+
+class IngestError(ValueError):
+    """입력 파일을 읽을 수 없거나 지원하지 않는 형식 (API에서는 status_code로 변환)"""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def detect_format(path, hint=None):
+    """명시한 형식 -> 파일 앞부분 magic bytes -> 확장자 순으로 결정"""
+    if hint:
+        if hint not in BULK_FORMATS:
+            raise IngestError(f"지원하지 않는 형식: {hint} (choose from {BULK_FORMATS})", status_code=415)
+        return hint
+    with open(path, "rb") as f:
+        head = f.read(8)
+    for magic, fmt in _MAGIC.items():
+        if head.startswith(magic): return fmt
+    name = path.lower()
+    for suffix in (".gz", ".bz2", ".xz", ".zst", ".zip"):
+        if name.endswith(suffix): name = name[:-len(suffix)]
+    ext = os.path.splitext(name)[1]
+    if ext in (".csv", ".tsv", ".txt"): return "csv"
+    if ext in (".parquet", ".pq"): return "parquet"
+    if ext in (".h5ad", ".h5"): return "h5ad"
+    raise IngestError(f"입력 형식을 알 수 없습니다: {os.path.basename(path)}", status_code=415)
+
+
+# ------------------------------------------------------------------------------
+# MATRIX SOURCES
+# ------------------------------------------------------------------------------
+# genes              : 열 순서의 유전자 이름 리스트
+# chunks(size, cols) : (sample_ids, CSR float32 (rows, len(cols))) 를 차례로 생성. cols는 읽을 열 번호 (오름차순)
+#
+# CSR에 저장된 칸이 FP 입력이 됩니다. dense 입력(parquet / csv / dense h5ad)은 /predict/find_drug 에 같은 행을
+# 보낸 것과 같도록 0도 저장하고, 빈 칸(NaN)만 뺍니다. sparse h5ad는 저장된 0을 지웁니다 (저장되지 않은 칸과 동일하게).
+def dense_to_csr(dense):
+    """dense (rows, genes) -> 유한한 값은 0까지 모두 저장한 CSR float32 (NaN / inf 칸은 제외)"""
+    dense = np.asarray(dense, dtype=np.float32)
+    mask = np.isfinite(dense)
+    indptr = np.concatenate([[0], np.cumsum(mask.sum(axis=1), dtype=np.int64)])
+    return sp.csr_matrix((dense[mask], np.nonzero(mask)[1], indptr), shape=dense.shape)
+
+
+class ParquetSource:
+    def __init__(self, path, id_column=None):
+        import pyarrow.parquet as pq
+        import pyarrow.types as pat
+
+        self.file = pq.ParquetFile(path)
+        schema = self.file.schema_arrow
+        if id_column is None:
+            id_column = next((f.name for f in schema if pat.is_string(f.type) or pat.is_large_string(f.type)), None)
+        elif id_column not in schema.names:
+            raise IngestError(f"id_column '{id_column}' 이(가) parquet에 없습니다.")
+        self.id_column = id_column
+        self.genes = [f.name for f in schema
+                      if f.name != id_column and (pat.is_integer(f.type) or pat.is_floating(f.type))]
+        self.num_rows = self.file.metadata.num_rows
+
+    def chunks(self, chunk_size, cols):
+        names = [self.genes[c] for c in cols]
+        read = names + ([self.id_column] if self.id_column else [])
+        offset = 0
+        for batch in self.file.iter_batches(batch_size=chunk_size, columns=read):
+            n = batch.num_rows
+            dense = np.empty((n, len(names)), dtype=np.float32)
+            for j in range(len(names)):
+                dense[:, j] = batch.column(j).to_numpy(zero_copy_only=False)   # null -> NaN
+            ids = (batch.column(len(names)).to_pylist() if self.id_column
+                   else [str(i) for i in range(offset, offset + n)])
+            offset += n
+            yield [str(i) for i in ids], dense_to_csr(dense)
+
+
+class CsvSource:
+    def __init__(self, path):
+        import pandas as pd
+
+        name = path.lower()
+        self.path = path
+        self.sep = "\t" if ".tsv" in name or ".txt" in name else ","
+        header = pd.read_csv(path, sep=self.sep, nrows=0, index_col=0)
+        self.genes = [str(c) for c in header.columns]
+        self.num_rows = None
+
+    def chunks(self, chunk_size, cols):
+        import pandas as pd
+
+        usecols = [0] + [c + 1 for c in cols]
+        reader = pd.read_csv(self.path, sep=self.sep, index_col=0, usecols=usecols, chunksize=chunk_size,
+                             dtype={self.genes[c]: np.float32 for c in cols})
+        for frame in reader:
+            yield [str(i) for i in frame.index], dense_to_csr(frame.to_numpy(dtype=np.float32, na_value=np.nan))
+
+
+class H5adSource:
+    def __init__(self, path, gene_column=None):
+        try:
+            import h5py
+        except ImportError:
+            raise IngestError("h5ad 입력을 읽으려면 h5py 패키지가 필요합니다.", status_code=415)
+
+        self.file = h5py.File(path, "r")
+        X = self.file["X"]
+        if isinstance(X, h5py.Group):
+            encoding = _attr_str(X.attrs.get("encoding-type", X.attrs.get("h5sparse_format", "")))
+            if "csr" not in encoding:
+                raise IngestError(f"X 인코딩 '{encoding}' 은(는) 행 단위로 읽을 수 없습니다. CSR로 저장해 주세요 "
+                                  "(adata.X = adata.X.tocsr()).")
+            self.shape = tuple(int(s) for s in X.attrs.get("shape", X.attrs.get("h5sparse_shape")))
+            self.indptr = X["indptr"][:].astype(np.int64)
+        else:
+            self.shape, self.indptr = tuple(X.shape), None
+        self.X = X
+        self.genes = [str(g) for g in _read_column(self.file["var"], gene_column)[:]]
+        self.obs_names = _read_column(self.file["obs"], None)
+        self.num_rows = self.shape[0]
+        if len(self.genes) != self.shape[1]:
+            raise IngestError(f"var 개수({len(self.genes)})와 X 열 수({self.shape[1]})가 다릅니다.")
+
+    def chunks(self, chunk_size, cols):
+        cols = np.asarray(cols, dtype=np.int64)
+        for start in range(0, self.num_rows, chunk_size):
+            stop = min(self.num_rows, start + chunk_size)
+            if self.indptr is None:
+                block = dense_to_csr(np.asarray(self.X[start:stop], dtype=np.float32)[:, cols])
+            else:
+                lo, hi = self.indptr[start], self.indptr[stop]
+                block = sp.csr_matrix(
+                    (np.asarray(self.X["data"][lo:hi], dtype=np.float32), self.X["indices"][lo:hi],
+                     self.indptr[start:stop + 1] - lo),
+                    shape=(stop - start, self.shape[1]),
+                )[:, cols]
+                block.eliminate_zeros()
+            yield [str(i) for i in self.obs_names[start:stop]], block
+
+
+def _attr_str(value):
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class _StrColumn:
+    """h5py 문자열 / categorical 컬럼을 슬라이스 단위로 str 리스트로 읽음"""
+    def __init__(self, values=None, dataset=None):
+        self.values, self.dataset = values, dataset
+
+    def __getitem__(self, key):
+        if self.values is not None: return self.values[key]
+        return [v.decode() if isinstance(v, bytes) else str(v) for v in self.dataset[key]]
+
+
+def _read_column(group, name):
+    """AnnData obs / var 그룹에서 컬럼(기본: 인덱스)을 읽음 (신규 그룹 형식 + 구형 compound dataset)"""
+    import h5py
+
+    if isinstance(group, h5py.Dataset):   # anndata < 0.7: compound dataset
+        return _StrColumn(values=[v.decode() if isinstance(v, bytes) else str(v) for v in group[name or "index"]])
+    name = name or _attr_str(group.attrs.get("_index", "_index"))
+    if name not in group:
+        raise IngestError(f"h5ad 컬럼 '{name}' 이(가) 없습니다.")
+    column = group[name]
+    if isinstance(column, h5py.Group):    # categorical: categories[codes]
+        categories = [v.decode() if isinstance(v, bytes) else str(v) for v in column["categories"][:]]
+        return _StrColumn(values=[categories[c] if c >= 0 else "" for c in column["codes"][:]])
+    return _StrColumn(dataset=column)
+
+
+def open_matrix(path, fmt=None, id_column=None, gene_column=None):
+    fmt = detect_format(path, fmt)
+    try:
+        if fmt == "parquet": return ParquetSource(path, id_column)
+        if fmt == "csv": return CsvSource(path)
+        return H5adSource(path, gene_column)
+    except IngestError:
+        raise
+    except Exception as e:
+        raise IngestError(f"{fmt} 파일을 읽을 수 없습니다: {e}")
+
+
+# ------------------------------------------------------------------------------
+# INGEST
+# ------------------------------------------------------------------------------
+def _output_schema(with_candidates):
+    import pyarrow as pa
+
+    from .services import FR_CONFIG
+
+    fields = [
+        pa.field("sample_id", pa.string()),
+        pa.field("n_genes", pa.int32()),
+        pa.field("recommended_drug_vector", pa.list_(pa.float32(), FR_CONFIG["SMILES_DIM"])),
+    ]
+    if with_candidates:
+        fields += [pa.field("candidates", pa.list_(pa.string())), pa.field("scores", pa.list_(pa.float32()))]
+    return pa.schema(fields)
+
+
+def predict_block(service, block, token_ids, fp_batch=256, top_k=0):
+    """
+    CSR 블록 (행, 유전자) 하나 -> {"n_genes", "vectors" (행, SMILES_DIM), "valid", ["candidates", "scores"]}
+    토큰화 / FP forward / 약물 검색만 하므로 추론 워커(프로세스)에서 chunk 단위로 실행할 수 있습니다.
+    """
+    from .services import FR_CONFIG
+
+    service.ensure_loaded("fp")
+    with span("bulk", "tokenize"):
+        items = service.fp_tokenizer.encode_csr(block, token_ids)
+    vectors = []
+    for start in range(0, len(items), fp_batch):
+        vectors.extend(service.predict_drug_encoded(items[start:start + fp_batch], service="bulk"))
+
+    valid = np.array([v is not None for v in vectors], dtype=bool)
+    matrix = np.zeros((len(vectors), FR_CONFIG["SMILES_DIM"]), dtype=np.float32)
+    if valid.any(): matrix[valid] = np.stack([v for v in vectors if v is not None])
+    out = {
+        "n_genes": np.array([len(it[0]) - 2 if it is not None else 0 for it in items], dtype=np.int32),
+        "vectors": matrix, "valid": valid,
+    }
+    if top_k > 0 and service.drug_library is not None:
+        names, scores = [None] * len(vectors), [None] * len(vectors)
+        rows = np.flatnonzero(valid)
+        if len(rows):
+            with span("bulk", "retrieval"):
+                idx, sc = service.drug_library.search(matrix[rows], k=top_k)
+            for r, i_row, s_row in zip(rows, idx, sc):
+                hits = valid_hits(i_row, s_row)
+                names[r] = [str(service.drug_library.names[i]) for i, _ in hits]
+                scores[r] = [s for _, s in hits]
+        out["candidates"], out["scores"] = names, scores
+    return out
+
+
+def ingest_file(service, path, out_path, fmt=None, chunk_size=1024, fp_batch=256, top_k=0,
+                id_column=None, gene_column=None, progress=None, predict=None):
+    """
+    행렬 파일을 chunk_size 행씩 읽어 FP 예측 벡터(와 상위 top_k 약물 후보)를 out_path parquet에 이어 씁니다.
+    progress(summary)는 chunk마다 호출됩니다. -> 요약 dict
+    predict(block, token_ids)를 주면 chunk별 예측(predict_block과 같은 결과)을 그쪽에 맡깁니다 (API: 추론 워커 풀).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from .services import FR_CONFIG
+
+    service.ensure_loaded("fp")
+    source = open_matrix(path, fmt, id_column, gene_column)
+    # 열 이름은 심볼 / 별칭 / Ensembl ID 어느 것이든 가능 (GeneResolver)
+    token_ids = service.gene_resolver.resolve(source.genes)[0]
+    cols = np.flatnonzero(token_ids >= 0)
+    if len(cols) == 0:
+        raise IngestError(f"FP vocab과 일치하는 유전자 열이 없습니다 (열 {len(source.genes)}개).")
+    if predict is None:
+        def predict(block, ids):
+            return predict_block(service, block, ids, fp_batch, top_k)
+
+    with_candidates = top_k > 0 and service.drug_library is not None
+    schema = _output_schema(with_candidates)
+    dim = FR_CONFIG["SMILES_DIM"]
+    summary = {
+        "samples": 0, "predicted": 0, "genes": len(source.genes), "matched_genes": int(len(cols)),
+        "total_rows": source.num_rows, "chunks": 0, "seconds": 0.0, "output": out_path,
+    }
+    started = time.perf_counter()
+
+    with pq.ParquetWriter(out_path, schema) as writer:
+        chunks = source.chunks(chunk_size, cols)
+        while True:
+            with span("bulk", "read"):
+                chunk = next(chunks, None)
+            if chunk is None: break
+            sample_ids, block = chunk
+
+            out = predict(block, token_ids[cols])
+            valid = out["valid"]
+            columns = [
+                pa.array(sample_ids, type=pa.string()),
+                pa.array(out["n_genes"], type=pa.int32()),
+                pa.FixedSizeListArray.from_arrays(pa.array(out["vectors"].ravel()), dim, mask=pa.array(~valid)),
+            ]
+            if with_candidates:
+                columns += [pa.array(out.get("candidates", [None] * len(valid)), type=pa.list_(pa.string())),
+                            pa.array(out.get("scores", [None] * len(valid)), type=pa.list_(pa.float32()))]
+
+            with span("bulk", "write"):
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            summary["samples"] += len(valid)
+            summary["predicted"] += int(valid.sum())
+            summary["chunks"] += 1
+            summary["seconds"] = time.perf_counter() - started
+            if progress is not None: progress(summary)
+
+    summary["samples_per_s"] = summary["samples"] / summary["seconds"] if summary["seconds"] else 0.0
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .services import IntegratedService
+
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    parser = argparse.ArgumentParser(description="세포/샘플 x 유전자 행렬 -> FP 예측 벡터 parquet (스트리밍)")
+    parser.add_argument("input", help=".parquet / .csv(.gz) / .tsv / .h5ad")
+    parser.add_argument("output", help="출력 .parquet")
+    parser.add_argument("--format", choices=BULK_FORMATS, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1024, help="한 번에 읽는 행 수 (메모리 상한)")
+    parser.add_argument("--fp-batch", type=int, default=256, help="FP forward 1회당 샘플 수")
+    parser.add_argument("--top-k", type=int, default=0, help="약물 라이브러리 상위 후보 수 (0이면 벡터만)")
+    parser.add_argument("--id-column", default=None, help="parquet 샘플 ID 컬럼")
+    parser.add_argument("--gene-column", default=None, help="h5ad var 유전자 이름 컬럼 (기본: var 인덱스)")
+    parser.add_argument("--fp", default=os.environ.get("BABAYAKGA_FP_CKPT", os.path.join(data_dir, "fp_smalltargets.pt")))
+    parser.add_argument("--library", default=os.environ.get("BABAYAKGA_DRUG_LIBRARY", os.path.join(data_dir, "drug_library.parquet")))
+    parser.add_argument("--precision", default=os.environ.get("BABAYAKGA_PRECISION", "fp32"))
+    args = parser.parse_args()
+
+    service = IntegratedService(
+        fp_path=args.fp, fr_path=os.environ.get("BABAYAKGA_FR_CKPT", os.path.join(data_dir, "fr_epoch6_20251227_052053.pt")),
+        vocab_path=os.path.join(data_dir, "fp_model_vocab.json"),
+        gene_meta_path=os.path.join(data_dir, "gene_metadata.parquet"),
+        drug_library_path=args.library, precision=args.precision,
+        vocab_cache_dir=os.environ.get("BABAYAKGA_VOCAB_CACHE", os.path.join(data_dir, ".vocab_cache")),
+        lazy=True,
+    )
+
+    def report(s):
+        total = f"/{s['total_rows']}" if s["total_rows"] else ""
+        print(f"  {s['samples']}{total} samples ({s['seconds']:.1f}s)", flush=True)
+
+    result = ingest_file(service, args.input, args.output, fmt=args.format, chunk_size=args.chunk_size,
+                         fp_batch=args.fp_batch, top_k=args.top_k, id_column=args.id_column,
+                         gene_column=args.gene_column, progress=report)
+    print(f"✅ {result['predicted']}/{result['samples']} samples -> {args.output} "
+          f"(matched genes {result['matched_genes']}/{result['genes']}, {result['samples_per_s']:.0f} samples/s)")
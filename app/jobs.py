@@ -0,0 +1,415 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from .telemetry import span
+from .wire import dumps_json, loads_json
+
+# ------------------------------------------------------------------------------
+# PERSISTENT JOB QUEUE (sqlite)
+# ------------------------------------------------------------------------------
+# HTTP 요청 하나에 담기 어려운 대량 예측 / 스크리닝을 작업(job)으로 제출해 두고 나중에 결과를 가져갑니다.
+#
+#   jobs        : 작업 1건 = 1행 (요청 본문, 상태, 진행도, 우선순위, 클라이언트, 담당 워커 + heartbeat)
+#   job_results : 항목별 결과 JSON (job_id, item) - 묶음(chunk)마다 진행도와 같은 트랜잭션으로 기록
+#
+# 결과와 진행도가 함께 커밋되므로 서버가 죽어도 다시 큐에 넣은 작업은 마지막으로 끝낸 묶음 다음부터 이어서 처리합니다.
+# 같은 파일을 여는 워커 프로세스(app.serve)끼리 큐를 공유하며, 작업은 BEGIN IMMEDIATE 트랜잭션으로 하나의 워커만 가져갑니다.
+PRIORITIES = {"interactive": 0, "normal": 1, "batch": 2}
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+class JobLimitError(RuntimeError):
+    """클라이언트별 작업 수 제한 초과 (API에서는 429로 변환)"""
+
+
+def _worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    sqlite(WAL) 작업 큐
+
+    - 우선순위가 낮은 숫자(interactive=0 < normal=1 < batch=2)부터 꺼내며, 기다린 시간 aging_s마다
+      한 단계씩 앞당겨 낮은 우선순위 작업도 결국 실행되게 합니다.
+    - max_active_per_client  : 클라이언트별 대기 + 실행 중 작업 수 (초과 제출은 JobLimitError)
+    - max_running_per_client : 클라이언트별 동시 실행 작업 수 (워커가 작업을 고를 때 적용, 모든 워커 합산)
+    - lease_s 동안 heartbeat가 없는 실행 중 작업(다른 호스트의 워커 포함)은 다시 대기 상태로 돌립니다.
+    """
+    def __init__(self, path, max_active_per_client=16, max_running_per_client=1, aging_s=600.0,
+                 lease_s=300.0, ttl_s=7 * 86400.0):
+        self.path = path
+        self.max_active_per_client = int(max_active_per_client)
+        self.max_running_per_client = int(max_running_per_client)
+        self.aging_s = float(aging_s)
+        self.lease_s = float(lease_s)
+        self.ttl_s = float(ttl_s)
+        self._db = None
+        self._db_pid = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            self._connect()
+
+    def _connect(self):
+        # sqlite 연결은 fork를 넘어 공유하면 안 되므로 프로세스마다 새로 엽니다 (cache.ResponseCache와 같은 방식)
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, client TEXT NOT NULL, kind TEXT NOT NULL, priority INTEGER NOT NULL, "
+                "state TEXT NOT NULL, payload BLOB NOT NULL, meta BLOB, total INTEGER NOT NULL, "
+                "done INTEGER NOT NULL DEFAULT 0, error TEXT, worker TEXT, heartbeat REAL, "
+                "created REAL NOT NULL, started REAL, finished REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (state, priority, created)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_client ON jobs (client, state)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS job_results ("
+                "job_id TEXT NOT NULL, item INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (job_id, item))"
+            )
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _transaction(self, fn):
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(db)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return result
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._connect().execute(sql, args).fetchall()
+
+    # --------------------------------------------------------------------------
+    # CLIENT SIDE
+    # --------------------------------------------------------------------------
+    def submit(self, client, kind, payload, total, priority="normal"):
+        """작업 등록 -> job id (클라이언트의 대기 + 실행 중 작업이 max_active_per_client 이상이면 JobLimitError)"""
+        job_id = uuid.uuid4().hex
+        blob = dumps_json(payload)
+
+        def insert(db):
+            (active,) = db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE client = ? AND state IN ('queued', 'running')", (client,)).fetchone()
+            if active >= self.max_active_per_client:
+                raise JobLimitError(f"클라이언트당 진행 중인 작업은 {self.max_active_per_client}개까지입니다.")
+            db.execute(
+                "INSERT INTO jobs (id, client, kind, priority, state, payload, total, created) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, client, kind, PRIORITIES[priority], blob, int(total), time.time()),
+            )
+        self._transaction(insert)
+        return job_id
+
+    def get(self, job_id):
+        """작업 상태 (요청 본문 제외), 없으면 None"""
+        rows = self._query(
+            "SELECT id, client, kind, priority, state, meta, total, done, error, worker, created, started, finished "
+            "FROM jobs WHERE id = ?", (job_id,))
+        return self._status(rows[0]) if rows else None
+
+    def list(self, client, limit=100):
+        rows = self._query(
+            "SELECT id, client, kind, priority, state, meta, total, done, error, worker, created, started, finished "
+            "FROM jobs WHERE client = ? ORDER BY created DESC LIMIT ?", (client, int(limit)))
+        return [self._status(row) for row in rows]
+
+    @staticmethod
+    def _status(row):
+        job_id, client, kind, priority, state, meta, total, done, error, worker, created, started, finished = row
+        now = time.time()
+        status = {
+            "job_id": job_id,
+            "client": client,
+            "kind": kind,
+            "priority": next(name for name, level in PRIORITIES.items() if level == priority),
+            "state": state,
+            "progress": {"done": done, "total": total, "fraction": done / total if total else 1.0},
+            "created": created,
+            "started": started,
+            "finished": finished,
+            "error": error,
+        }
+        if state == "running" and started is not None and done:
+            # 지금까지의 처리 속도로 남은 시간 추정
+            status["eta_s"] = (now - started) / done * (total - done)
+        if meta is not None:
+            status["meta"] = loads_json(meta)
+        return status
+
+    def results(self, job_id, offset=0, limit=100):
+        """item >= offset 인 결과 최대 limit개의 (item, JSON bytes) 목록 (실행 중에도 끝난 묶음까지 조회 가능)"""
+        return self._query(
+            "SELECT item, data FROM job_results WHERE job_id = ? AND item >= ? ORDER BY item LIMIT ?",
+            (job_id, int(offset), int(limit)))
+
+    def cancel(self, job_id):
+        """대기 / 실행 중 작업 취소 (실행 중이면 워커가 다음 묶음 전에 멈춤) -> 취소했으면 True"""
+        def update(db):
+            return db.execute(
+                "UPDATE jobs SET state = 'cancelled', finished = ? WHERE id = ? AND state IN ('queued', 'running')",
+                (time.time(), job_id)).rowcount > 0
+        return self._transaction(update)
+
+    def stats(self):
+        counts = {state: {name: 0 for name in PRIORITIES} for state in JOB_STATES}
+        for state, priority, n in self._query("SELECT state, priority, COUNT(*) FROM jobs GROUP BY state, priority"):
+            name = next(name for name, level in PRIORITIES.items() if level == priority)
+            counts[state][name] = n
+        return counts
+
+    # --------------------------------------------------------------------------
+    # WORKER SIDE
+    # --------------------------------------------------------------------------
+    def claim(self, worker):
+        """
+        실행할 작업 하나를 가져와 running으로 표시 -> {"id", "kind", "client", "payload", "meta", "total", "done"} 또는 None
+        실행 중 작업이 max_running_per_client개인 클라이언트의 작업은 건너뜁니다.
+        """
+        now = time.time()
+
+        def take(db):
+            self._requeue_stale(db, now)
+            row = db.execute(
+                "SELECT id, kind, client, payload, meta, total, done FROM jobs AS j "
+                "WHERE state = 'queued' AND "
+                "(SELECT COUNT(*) FROM jobs WHERE client = j.client AND state = 'running') < ? "
+                "ORDER BY priority - (? - created) / ?, created LIMIT 1",
+                (self.max_running_per_client, now, self.aging_s)).fetchone()
+            if row is None: return None
+            db.execute(
+                "UPDATE jobs SET state = 'running', worker = ?, heartbeat = ?, started = COALESCE(started, ?) WHERE id = ?",
+                (worker, now, now, row[0]))
+            return row
+        row = self._transaction(take)
+        if row is None: return None
+        job_id, kind, client, payload, meta, total, done = row
+        return {"id": job_id, "kind": kind, "client": client, "payload": loads_json(payload),
+                "meta": loads_json(meta) if meta is not None else None, "total": total, "done": done}
+
+    def _requeue_stale(self, db, now):
+        """heartbeat가 lease_s보다 오래된 작업, 또는 이 호스트에서 이미 종료된 프로세스가 잡고 있던 작업을 다시 대기 상태로"""
+        host = socket.gethostname()
+        stale = []
+        for job_id, worker, heartbeat in db.execute("SELECT id, worker, heartbeat FROM jobs WHERE state = 'running'"):
+            worker_host, _, pid = (worker or "").rpartition(":")
+            dead = worker_host == host and pid.isdigit() and not _pid_alive(int(pid))
+            if dead or heartbeat is None or heartbeat < now - self.lease_s:
+                stale.append(job_id)
+        for job_id in stale:
+            db.execute("UPDATE jobs SET state = 'queued', worker = NULL WHERE id = ? AND state = 'running'", (job_id,))
+        if stale:
+            print(f"♻️ Requeued {len(stale)} interrupted job(s)")
+
+    def update(self, job_id, worker, total=None, meta=None):
+        """실행 중 작업의 total / meta 갱신 -> 작업을 계속 잡고 있으면 True (취소되었거나 다른 워커가 가져갔으면 False)"""
+        def write(db):
+            sets, args = ["heartbeat = ?"], [time.time()]
+            if total is not None: sets.append("total = ?"); args.append(int(total))
+            if meta is not None: sets.append("meta = ?"); args.append(dumps_json(meta))
+            return db.execute(
+                f"UPDATE jobs SET {', '.join(sets)} WHERE id = ? AND state = 'running' AND worker = ?",
+                (*args, job_id, worker)).rowcount > 0
+        return self._transaction(write)
+
+    def record(self, job_id, worker, start, results):
+        """
+        item start.. 결과를 기록하고 done을 올림 (한 트랜잭션) -> 작업을 계속 잡고 있으면 True
+        results: 항목별 JSON 직렬화 가능한 값
+        """
+        rows = [(job_id, start + i, dumps_json(result)) for i, result in enumerate(results)]
+
+        def write(db):
+            owned = db.execute(
+                "UPDATE jobs SET done = ?, heartbeat = ? WHERE id = ? AND state = 'running' AND worker = ?",
+                (start + len(results), time.time(), job_id, worker)).rowcount > 0
+            if owned:
+                db.executemany("INSERT OR REPLACE INTO job_results (job_id, item, data) VALUES (?, ?, ?)", rows)
+            return owned
+        return self._transaction(write)
+
+    def finish(self, job_id, worker, error=None, meta=None):
+        state = "failed" if error is not None else "succeeded"
+
+        def write(db):
+            db.execute(
+                "UPDATE jobs SET state = ?, error = ?, meta = COALESCE(?, meta), finished = ? "
+                "WHERE id = ? AND state = 'running' AND worker = ?",
+                (state, error, dumps_json(meta) if meta is not None else None, time.time(), job_id, worker))
+        self._transaction(write)
+
+    def purge(self):
+        """끝난 지 ttl_s가 지난 작업과 결과 삭제 -> 삭제한 작업 수"""
+        cutoff = time.time() - self.ttl_s
+
+        def delete(db):
+            expired = [row[0] for row in db.execute(
+                "SELECT id FROM jobs WHERE state IN ('succeeded', 'failed', 'cancelled') AND finished < ?", (cutoff,))]
+            for job_id in expired:
+                db.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+                db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            return len(expired)
+        return self._transaction(delete)
+
+
+# ------------------------------------------------------------------------------
+# BACKGROUND JOB RUNNER
+# ------------------------------------------------------------------------------
+class JobRunner:
+    """
+    이벤트 루프에서 도는 작업 실행기 (프로세스마다 하나, 같은 큐 파일을 여는 워커끼리 작업을 나눠 가짐)
+
+    - handler.prepare(job) -> (total, meta) 또는 None : 항목 수가 실행 시점에 정해지는 작업 (예: 스크리닝 후보 검색)
+    - handler.run_chunk(job, start, stop) -> 항목별 결과 리스트 : IntegratedService 배치 메서드 한 번 호출
+    - handler.finish(job) -> meta 또는 None : 모든 항목이 끝난 뒤 요약
+    - busy() 가 True(대화형 요청이 대기 / 실행 중)인 동안은 다음 묶음 시작을 최대 max_defer_ms 미룹니다.
+      대화형 요청은 많아야 작업 묶음 하나만큼만 기다립니다.
+    - 실행 중에는 lease_s / 3 마다 heartbeat를 갱신하므로 lease_s보다 긴 묶음도 다른 워커가 다시 가져가지 않습니다.
+    """
+    def __init__(self, queue, handler, chunk_size=32, concurrency=1, poll_s=0.5, busy=None, max_defer_ms=200.0):
+        self.queue = queue
+        self.handler = handler
+        self.chunk_size = max(1, int(chunk_size))
+        self.concurrency = max(1, int(concurrency))
+        self.poll_s = float(poll_s)
+        self.busy = busy
+        self.max_defer = float(max_defer_ms) / 1000.0
+        self.worker = _worker_id()
+        self.heartbeat_s = max(1.0, queue.lease_s / 3)
+
+        self.in_flight = 0
+        self.running = {}
+        self.completed = 0
+        self.failed = 0
+        self.deferred_s = 0.0
+        self._tasks = []
+        self._wakeup = None
+
+    def start(self):
+        if self._tasks: return
+        self.worker = _worker_id()   # fork 이후 시작되므로 워커 pid로 다시 설정
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._loop(i)) for i in range(self.concurrency)]
+        print(f"🗂️ Job runner started (worker={self.worker}, concurrency={self.concurrency}, chunk={self.chunk_size})")
+
+    async def stop(self):
+        for task in self._tasks: task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """새 작업 제출 시 polling 간격을 기다리지 않고 깨움"""
+        if self._wakeup is not None: self._wakeup.set()
+
+    async def _loop(self, slot):
+        last_purge = 0.0
+        while True:
+            try:
+                if slot == 0 and time.time() - last_purge > 600:
+                    last_purge = time.time()
+                    if await asyncio.to_thread(self.queue.purge):
+                        print("🧹 Purged expired jobs")
+                job = await asyncio.to_thread(self.queue.claim, self.worker)
+            except sqlite3.Error as e:
+                print(f"⚠️ Job queue unavailable: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_s)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _yield_to_interactive(self):
+        if self.busy is None: return
+        started = time.perf_counter()
+        while self.busy() and time.perf_counter() - started < self.max_defer:
+            await asyncio.sleep(0.005)
+        self.deferred_s += time.perf_counter() - started
+
+    async def _heartbeat(self, job_id):
+        """작업을 잡고 있는 동안 주기적으로 heartbeat 갱신 (취소되었거나 다른 워커가 가져갔으면 중단)"""
+        while True:
+            await asyncio.sleep(self.heartbeat_s)
+            try:
+                if not await asyncio.to_thread(self.queue.update, job_id, self.worker):
+                    return
+            except sqlite3.Error as e:
+                print(f"⚠️ Job {job_id} heartbeat failed: {e}")
+
+    async def _run(self, job):
+        job_id = job["id"]
+        self.running[job_id] = job["kind"]
+        heartbeat = asyncio.ensure_future(self._heartbeat(job_id))
+        try:
+            if job["meta"] is None:
+                prepared = await self.handler.prepare(job)
+                if prepared is not None:
+                    job["total"], job["meta"] = prepared
+                    if not await asyncio.to_thread(self.queue.update, job_id, self.worker, *prepared):
+                        return
+
+            for start in range(job["done"], job["total"], self.chunk_size):
+                await self._yield_to_interactive()
+                stop = min(job["total"], start + self.chunk_size)
+                self.in_flight += 1
+                try:
+                    with span("job", job["kind"]):
+                        results = await self.handler.run_chunk(job, start, stop)
+                finally:
+                    self.in_flight -= 1
+                if not await asyncio.to_thread(self.queue.record, job_id, self.worker, start, results):
+                    return   # 취소됨
+                job["done"] = stop
+
+            meta = await self.handler.finish(job)
+            await asyncio.to_thread(self.queue.finish, job_id, self.worker, None, meta)
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise   # 종료 중: 작업은 running으로 남고 다음 시작 시 다시 대기열로
+        except Exception as e:
+            self.failed += 1
+            print(f"❌ Job {job_id} failed: {type(e).__name__}: {e}")
+            await asyncio.to_thread(self.queue.finish, job_id, self.worker, f"{type(e).__name__}: {e}")
+        finally:
+            heartbeat.cancel()
+            self.running.pop(job_id, None)
+
+    def stats(self):
+        return {
+            "worker": self.worker,
+            "concurrency": self.concurrency,
+            "chunk_size": self.chunk_size,
+            "running": dict(self.running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "deferred_s": self.deferred_s,
+        }
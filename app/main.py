@@ -1,9 +1,28 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import List
-from .services import IntegratedService
+from typing import List, Optional
+from .services import IntegratedService, FR_CONFIG
+from .batching import MicroBatchScheduler
+from .executor import InferenceExecutor, QueueFullError
+from .cache import ResponseCache, response_cache_key, response_cache_version
+from .telemetry import REGISTRY, HTTP_SECONDS, STARTUP_SECONDS, process_memory, span
+from .ingest import BULK_FORMATS, IngestError, ingest_file
+from .jobs import PRIORITIES, JobLimitError, JobQueue, JobRunner
+from .wire import WireFormatError, JSON, MSGPACK, FRAME, decode_body, dumps_json, encode_body, loads_json, negotiate
+from functools import partial
+import asyncio
+import hmac
 import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+_import_started = time.perf_counter()
 
 app = FastAPI()
 
@@ -27,13 +46,203 @@ data_dir = os.path.join(root_dir, "data")
 
 print(f"📂 Data Directory: {data_dir}")
 
-service = IntegratedService(
-    fp_path=os.path.join(data_dir, "fp_smalltargets.pt"), 
-    fr_path=os.path.join(data_dir, "fr_epoch6_20251227_052053.pt"), 
+SERVICE_KWARGS = dict(
+    fp_path=os.environ.get("BABAYAKGA_FP_CKPT", os.path.join(data_dir, "fp_smalltargets.pt")), 
+    fr_path=os.environ.get("BABAYAKGA_FR_CKPT", os.path.join(data_dir, "fr_epoch6_20251227_052053.pt")), 
     vocab_path=os.path.join(data_dir, "fp_model_vocab.json"),
-    gene_meta_path=os.path.join(data_dir, "gene_metadata.parquet")
+    gene_meta_path=os.path.join(data_dir, "gene_metadata.parquet"),
+    drug_library_path=os.environ.get("BABAYAKGA_DRUG_LIBRARY", os.path.join(data_dir, "drug_library.parquet")),
+    drug_index=os.environ.get("BABAYAKGA_DRUG_INDEX", "exact"),   # exact | ivfpq
+    precision=os.environ.get("BABAYAKGA_PRECISION", "fp32"),       # fp32 | bf16 | int8
+    fp_backend=os.environ.get("BABAYAKGA_FP_BACKEND", "eager"),     # eager | compile | torchscript | onnx
+    fr_backend=os.environ.get("BABAYAKGA_FR_BACKEND", "eager"),
+    backend_cache_dir=os.environ.get("BABAYAKGA_BACKEND_CACHE", os.path.join(data_dir, ".backend_cache")),
+    profile_dir=os.environ.get("BABAYAKGA_PROFILE_DIR", os.path.join(data_dir, "profiles")),
+    gene_sets=os.environ.get("BABAYAKGA_GENE_SETS", os.path.join(data_dir, "gene_sets")),   # GMT 파일 / 디렉터리
+    gene_set_cache_dir=os.environ.get("BABAYAKGA_GENE_SET_CACHE", os.path.join(data_dir, ".gene_set_cache")),
+    enrichment_permutations=int(os.environ.get("BABAYAKGA_ENRICHMENT_PERMUTATIONS", 0)),
+    response_store=os.environ.get("BABAYAKGA_RESPONSE_STORE", os.path.join(data_dir, "response_store")),
+    mmap_weights=os.environ.get("BABAYAKGA_MMAP_WEIGHTS", "1") != "0",   # 체크포인트 mmap 로드 (워커 간 가중치 공유)
+    vocab_cache_dir=os.environ.get("BABAYAKGA_VOCAB_CACHE", os.path.join(data_dir, ".vocab_cache")),
+    warmup=os.environ.get("BABAYAKGA_WARMUP", "1") != "0",             # 로드 직후 warm-up forward
+    gene_aliases=os.environ.get("BABAYAKGA_GENE_ALIASES", os.path.join(data_dir, "gene_aliases.tsv")),  # 별칭 / 이전 심볼 테이블 (선택)
+    gene_layout_cache=int(os.environ.get("BABAYAKGA_GENE_LAYOUT_CACHE", 256)),  # 유전자 목록 -> token id 결과 LRU 크기
 )
 
+# 모델 로딩 시점: eager (import 시 전부 로드) | background (API를 먼저 띄우고 백그라운드 로드) | lazy (첫 사용 시)
+MODEL_LOADING = os.environ.get("BABAYAKGA_MODEL_LOADING", "background")
+if MODEL_LOADING not in ("eager", "background", "lazy"):
+    raise ValueError(f"Unknown BABAYAKGA_MODEL_LOADING: {MODEL_LOADING} (choose from eager, background, lazy)")
+
+service = IntegratedService(**SERVICE_KWARGS, lazy=MODEL_LOADING != "eager")
+if MODEL_LOADING == "background":
+    service.start_background_load()
+STARTUP_SECONDS.set(time.perf_counter() - _import_started)
+print(f"⏱️ API ready in {time.perf_counter() - _import_started:.2f}s (model loading: {MODEL_LOADING})")
+
+# ==============================================================================
+# ⚙️ 서빙 설정 (환경 변수로 덮어쓰기 가능)
+# ==============================================================================
+SERVING_CONFIG = {
+    "MAX_BATCH_SIZE": int(os.environ.get("BABAYAKGA_MAX_BATCH_SIZE", 32)),
+    "MAX_WAIT_MS": float(os.environ.get("BABAYAKGA_MAX_WAIT_MS", 5.0)),
+    "MAX_QUEUE": int(os.environ.get("BABAYAKGA_MAX_QUEUE", 256)),
+    "EXECUTOR": os.environ.get("BABAYAKGA_EXECUTOR", "thread"),        # thread | process
+    "WORKERS": int(os.environ.get("BABAYAKGA_INFERENCE_WORKERS", 1)),
+    "TORCH_THREADS": int(os.environ.get("BABAYAKGA_TORCH_THREADS", 0)) or None,  # None: cpu_count // WORKERS
+    "CACHE_SIZE": int(os.environ.get("BABAYAKGA_CACHE_SIZE", 4096)),   # 0이면 캐시 비활성화
+    "CACHE_TTL_S": float(os.environ.get("BABAYAKGA_CACHE_TTL_S", 3600)),
+    "CACHE_DB": os.environ.get("BABAYAKGA_CACHE_DB"),                  # sqlite 경로 (워커 간 공유)
+    "CACHE_DB_MAX_ROWS": int(os.environ.get("BABAYAKGA_CACHE_DB_MAX_ROWS", 100_000)),  # sqlite 캐시 행 수 상한 (0이면 무제한)
+    "ADMIN_TOKEN": os.environ.get("BABAYAKGA_ADMIN_TOKEN"),            # /admin/* 요청 헤더 X-Admin-Token
+    "SCREEN_BATCH": int(os.environ.get("BABAYAKGA_SCREEN_BATCH", 1024)),        # 스크리닝 FR forward 1회당 (약물, 세포주) 쌍 수
+    "SCREEN_MAX_PAIRS": int(os.environ.get("BABAYAKGA_SCREEN_MAX_PAIRS", 50000)),
+    "SCREEN_CONCURRENCY": int(os.environ.get("BABAYAKGA_SCREEN_CONCURRENCY", 4)),  # 동시 스크리닝 요청 수 (초과 시 503)
+    "BULK_MAX_BYTES": int(os.environ.get("BABAYAKGA_BULK_MAX_BYTES", 2 << 30)),     # 대량 예측 업로드 최대 크기 (초과 시 413)
+    "BULK_CONCURRENCY": int(os.environ.get("BABAYAKGA_BULK_CONCURRENCY", 1)),       # 동시 대량 예측 수 (초과 시 503)
+    "BULK_CHUNK": int(os.environ.get("BABAYAKGA_BULK_CHUNK", 1024)),                # 한 번에 읽는 행 수
+    "BULK_FP_BATCH": int(os.environ.get("BABAYAKGA_BULK_FP_BATCH", 256)),           # FP forward 1회당 샘플 수
+    "BULK_TMP_DIR": os.environ.get("BABAYAKGA_BULK_TMP_DIR"),                      # 업로드 / 결과 임시 파일 위치 (기본: 시스템 임시 디렉터리)
+    "JOB_DB": os.environ.get("BABAYAKGA_JOB_DB", os.path.join(data_dir, ".jobs", "jobs.db")),  # 작업 큐 sqlite 경로 (빈 값이면 비활성화)
+    "JOB_CHUNK": int(os.environ.get("BABAYAKGA_JOB_CHUNK", 32)),                    # 작업 묶음 1개 = 서비스 배치 호출 1회의 항목 수
+    "JOB_CONCURRENCY": int(os.environ.get("BABAYAKGA_JOB_CONCURRENCY", 1)),         # 프로세스당 동시에 실행하는 작업 수
+    "JOB_MAX_ITEMS": int(os.environ.get("BABAYAKGA_JOB_MAX_ITEMS", 10000)),         # 작업 1건의 최대 항목 수
+    "JOB_MAX_ACTIVE": int(os.environ.get("BABAYAKGA_JOB_MAX_ACTIVE", 16)),          # 클라이언트별 대기 + 실행 중 작업 수 (초과 시 429)
+    "JOB_MAX_RUNNING": int(os.environ.get("BABAYAKGA_JOB_MAX_RUNNING", 1)),         # 클라이언트별 동시 실행 작업 수
+    "JOB_MAX_DEFER_MS": float(os.environ.get("BABAYAKGA_JOB_MAX_DEFER_MS", 200)),   # 대화형 요청에 양보하며 묶음 시작을 미루는 최대 시간
+    "JOB_TTL_S": float(os.environ.get("BABAYAKGA_JOB_TTL_S", 7 * 86400)),          # 끝난 작업 / 결과 보관 기간
+}
+
+# torch 추론을 이벤트 루프 밖에서 실행하는 워커 풀
+executor = InferenceExecutor(
+    service, mode=SERVING_CONFIG["EXECUTOR"], num_workers=SERVING_CONFIG["WORKERS"],
+    threads_per_worker=SERVING_CONFIG["TORCH_THREADS"], service_kwargs=SERVICE_KWARGS,
+)
+
+# 동시 요청을 모아 한 번의 forward로 처리하는 배치 스케줄러
+fp_scheduler = MicroBatchScheduler(
+    "find_drug", partial(executor.run, "find_drugs_batch"),
+    max_batch_size=SERVING_CONFIG["MAX_BATCH_SIZE"], max_wait_ms=SERVING_CONFIG["MAX_WAIT_MS"],
+    max_queue=SERVING_CONFIG["MAX_QUEUE"], max_concurrency=executor.num_workers,
+)
+fr_scheduler = MicroBatchScheduler(
+    "drug_response", partial(executor.run, "simulate_drug_response_batch"),
+    max_batch_size=SERVING_CONFIG["MAX_BATCH_SIZE"], max_wait_ms=SERVING_CONFIG["MAX_WAIT_MS"],
+    max_queue=SERVING_CONFIG["MAX_QUEUE"], max_concurrency=executor.num_workers,
+)
+
+# drug_response 결과 캐시 (같은 약물 벡터 반복 조회 시 FR forward 생략)
+response_cache = ResponseCache(
+    maxsize=SERVING_CONFIG["CACHE_SIZE"], ttl=SERVING_CONFIG["CACHE_TTL_S"], disk_path=SERVING_CONFIG["CACHE_DB"],
+    disk_maxsize=SERVING_CONFIG["CACHE_DB_MAX_ROWS"],
+) if SERVING_CONFIG["CACHE_SIZE"] > 0 else None
+
+
+# 비동기 작업 큐 (sqlite, 같은 파일을 여는 워커 프로세스끼리 공유)
+job_queue = JobQueue(
+    SERVING_CONFIG["JOB_DB"], max_active_per_client=SERVING_CONFIG["JOB_MAX_ACTIVE"],
+    max_running_per_client=SERVING_CONFIG["JOB_MAX_RUNNING"], ttl_s=SERVING_CONFIG["JOB_TTL_S"],
+) if SERVING_CONFIG["JOB_DB"] else None
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    received_at = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    HTTP_SECONDS.observe(time.perf_counter() - received_at, path, str(response.status_code))
+    return response
+
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    # 과부하 시 지연을 쌓지 않고 즉시 실패시켜 클라이언트가 재시도하도록 유도
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "추론 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요."},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(JobLimitError)
+async def job_limit_handler(request: Request, exc: JobLimitError):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "30"})
+
+async def _ensure_models(*names):
+    """모델 구성 요소가 아직 로드 중이면 (이벤트 루프를 막지 않고) 완료를 기다림, 로드 실패 시 503"""
+    if service.is_ready(*names): return
+    try:
+        await asyncio.to_thread(service.ensure_loaded, *names)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.exception_handler(WireFormatError)
+async def wire_format_handler(request: Request, exc: WireFormatError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+@app.exception_handler(IngestError)
+async def ingest_error_handler(request: Request, exc: IngestError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+# ==============================================================================
+# 📦 요청/응답 직렬화 (Content-Type / Accept 협상)
+# ==============================================================================
+# JSON(기본, orjson) | msgpack | 바이너리 프레임 (app/wire.py).
+# 벡터 필드는 pydantic 검증 없이 바로 NumPy 배열로 디코딩합니다.
+
+def _body_schema(model):
+    """OpenAPI 문서용 요청 본문 스키마 (실제 파싱은 _read_fields)"""
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": {
+        JSON: {"schema": model.model_json_schema()}, MSGPACK: binary, FRAME: binary,
+    }}}
+
+
+async def _read_fields(request, endpoint):
+    with span(endpoint, "receive"):
+        body = await request.body()
+    with span(endpoint, "decode"):
+        return decode_body(request.headers.get("content-type"), body)
+
+
+def _respond(endpoint, fields, media_type, dtype):
+    with span(endpoint, "encode"):
+        content, content_type = encode_body(media_type, fields, dtype)
+    return Response(content=content, media_type=content_type)
+
+
+def _int_field(fields, name, default):
+    value = fields.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, np.integer)):
+        raise HTTPException(status_code=422, detail=f"{name}는 정수여야 합니다.")
+    return int(value)
+
+
+def _vector_field(fields, name):
+    value = fields.get(name)
+    if value is None:
+        raise HTTPException(status_code=422, detail=f"{name} 필드가 없습니다.")
+    try:
+        vec = np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail=f"{name}는 숫자 리스트여야 합니다.")
+    if vec.ndim != 1:
+        raise HTTPException(status_code=422, detail=f"{name}는 1차원 벡터여야 합니다.")
+    # JSON null / msgpack nil은 NaN으로 바뀌므로 여기서 거름 (NaN이 forward / 캐시 키로 들어가지 않도록)
+    if not np.isfinite(vec).all():
+        raise HTTPException(status_code=422, detail=f"{name}에 null / NaN / inf 값이 있습니다.")
+    return vec
+
+
+def _signature_fields(fields):
+    genes = fields.get("genes")
+    if not isinstance(genes, list) or not all(isinstance(g, str) for g in genes):
+        raise HTTPException(status_code=422, detail="genes는 문자열 리스트여야 합니다.")
+    expressions = _vector_field(fields, "expressions")
+    if len(genes) != len(expressions):
+        raise HTTPException(status_code=400, detail="유전자 개수와 발현량 불일치")
+    return genes, expressions
+
 # ==============================================================================
 # API 엔드포인트
 # ==============================================================================
@@ -41,20 +250,32 @@ service = IntegratedService(
 class GeneInputPayload(BaseModel):
     genes: List[str]
     expressions: List[float]
+    top_k: int = 10
 
-@app.post("/predict/find_drug")
-async def find_drug(payload: GeneInputPayload):
-    if len(payload.genes) != len(payload.expressions):
-        raise HTTPException(status_code=400, detail="유전자 개수와 발현량 불일치")
-    if len(payload.genes) == 0:
+def _check_find_drug(genes, top_k):
+    if len(genes) == 0:
         raise HTTPException(status_code=400, detail="유전자가 입력되지 않았습니다.")
+    if not 1 <= top_k <= 1000:
+        raise HTTPException(status_code=400, detail="top_k는 1~1000 사이여야 합니다.")
 
-    vector = service.predict_drug_from_genes(payload.genes, payload.expressions)
+@app.post("/predict/find_drug", openapi_extra=_body_schema(GeneInputPayload))
+async def find_drug(request: Request):
+    media_type, dtype = negotiate(request.headers.get("accept"))
+    fields = await _read_fields(request, "find_drug")
+    genes, expressions = _signature_fields(fields)
+    top_k = _int_field(fields, "top_k", 10)
+    _check_find_drug(genes, top_k)
+
+    await _ensure_models("fp")
+    result = await fp_scheduler.submit((genes, expressions, top_k))
     
-    if vector is None:
+    if result is None:
         raise HTTPException(status_code=400, detail="유효한 유전자가 없습니다.")
 
-    return {"recommended_drug_vector": vector}
+    # candidates: 약물 라이브러리가 로드된 경우 코사인 유사도 순 [{"name", "score"}, ...]
+    # dropped_genes: 어떤 식별자(심볼 / 별칭 / Ensembl ID)로도 FP vocab에 대응하지 않아 제외된 유전자 수
+    return _respond("find_drug", {"recommended_drug_vector": result["vector"], "candidates": result["candidates"],
+                                  "dropped_genes": result["dropped_genes"]}, media_type, dtype)
 
 
 # ------------------------------------------------------------------------------
@@ -64,19 +285,56 @@ class SimulationPayload(BaseModel):
     smiles_embedding: List[float]
     genes: List[str]
     expressions: List[float]
+    cell_line_id: int = 0
+
 
-@app.post("/predict/drug_response")
-async def drug_response(payload: SimulationPayload):
-    if not payload.smiles_embedding:
+def _check_simulation(drug_vector, cell_line_id):
+    if len(drug_vector) == 0:
         raise HTTPException(status_code=400, detail="약물 벡터가 없습니다.")
+    if len(drug_vector) != FR_CONFIG["SMILES_DIM"]:
+        raise HTTPException(status_code=400, detail=f"약물 벡터 차원은 {FR_CONFIG['SMILES_DIM']}이어야 합니다.")
+    if not 0 <= cell_line_id < FR_CONFIG["NUM_CELL_LINES"]:
+        raise HTTPException(status_code=400, detail=f"cell_line_id는 0~{FR_CONFIG['NUM_CELL_LINES'] - 1} 사이여야 합니다.")
 
-    # 서비스 호출
-    # result는 이제 {"top_genes": {...}, "pathways": {...}} 형태입니다.
-    result = service.simulate_drug_response(
-        payload.genes, 
-        payload.expressions, 
-        payload.smiles_embedding
-    )
+
+# 처리 중인 캐시 키 -> Future (동일 요청 합치기)
+_inflight_responses = {}
+
+
+async def _simulate(genes, expressions, drug_vector, cell_line_id, cache_key=None):
+    # 서비스 호출 (배치 스케줄러 경유)
+    # result는 {"top_genes": {...}, "pathways": {...}} 형태입니다.
+    result = await fr_scheduler.submit((genes, expressions, drug_vector, cell_line_id))
+    if cache_key is not None and result is not None:
+        await asyncio.to_thread(response_cache.set, cache_key, result)   # sqlite 2차 캐시 쓰기는 블로킹
+    return result
+
+
+@app.post("/predict/drug_response", openapi_extra=_body_schema(SimulationPayload))
+async def drug_response(request: Request):
+    media_type, dtype = negotiate(request.headers.get("accept"))
+    fields = await _read_fields(request, "drug_response")
+    drug_vector = _vector_field(fields, "smiles_embedding")
+    genes, expressions = _signature_fields(fields)
+    cell_line_id = _int_field(fields, "cell_line_id", 0)
+    _check_simulation(drug_vector, cell_line_id)
+
+    await _ensure_models("fr")
+    if response_cache is None:
+        result = await _simulate(genes, expressions, drug_vector, cell_line_id)
+    else:
+        # FR 체크포인트 / precision / 유전자 세트 버전이 바뀌면 이전 결과를 재사용하지 않음
+        cache_key = response_cache_key(drug_vector, cell_line_id, genes, expressions,
+                                       version=response_cache_version(service))
+        result = await asyncio.to_thread(response_cache.get, cache_key)
+        if result is None:
+            # 같은 키의 요청이 이미 처리 중이면 그 결과를 함께 기다림 (중복 forward 방지)
+            pending = _inflight_responses.get(cache_key)
+            if pending is None:
+                pending = asyncio.ensure_future(_simulate(genes, expressions, drug_vector, cell_line_id, cache_key))
+                _inflight_responses[cache_key] = pending
+                pending.add_done_callback(lambda _: _inflight_responses.pop(cache_key, None))
+            result = await asyncio.shield(pending)
     
     if result is None:
         raise HTTPException(status_code=500, detail="FR 모델 로딩 실패 또는 예측 오류")
@@ -84,4 +342,599 @@ async def drug_response(payload: SimulationPayload):
     # ✅ [중요 변경] result 자체를 반환해야 프론트엔드가 top_genes와 pathways를 모두 받습니다.
     # 기존: return {"top_genes": result} -> (X) 중복 포장됨
     # 변경: return result              -> (O)
-    return result
\ No newline at end of file
+    return _respond("drug_response", result, media_type, dtype)
+
+
+# ------------------------------------------------------------------------------
+# 🧬 유전자 식별자 확인 (요청 전에 어떤 유전자가 버려지는지 확인)
+# ------------------------------------------------------------------------------
+class GeneResolvePayload(BaseModel):
+    genes: List[str]
+
+
+@app.post("/genes/resolve")
+async def resolve_genes(payload: GeneResolvePayload):
+    # 심볼 / 별칭 / 버전 붙은 Ensembl ID -> 식별자별 FP / FR token id (-1: 없음), FP에서 버려지는 식별자 목록
+    result = await asyncio.to_thread(service.resolve_genes, payload.genes)   # 큰 목록 / 캐시 miss는 수 ms 이상
+    return {**result, "dropped_genes": len(result["dropped"])}
+
+
+# ------------------------------------------------------------------------------
+# 🧪 스크리닝 API (signature -> 상위 K개 약물 x 세포주 FR 배치, NDJSON 스트리밍)
+# ------------------------------------------------------------------------------
+class ScreeningPayload(BaseModel):
+    genes: List[str]
+    expressions: List[float]
+    top_k: int = 20
+    cell_line_ids: Optional[List[int]] = None   # 기본: 전체 세포주
+
+
+_active_screens = 0
+
+
+def _screen_slot():
+    """
+    스크리닝 슬롯 하나를 잡고 반환 함수를 돌려줌 (SCREEN_CONCURRENCY 초과 시 503)
+    반환 함수는 여러 번 불러도 한 번만 반환하므로 스트림 종료와 응답 뒷정리 양쪽에서 호출합니다.
+    """
+    global _active_screens
+    if _active_screens >= SERVING_CONFIG["SCREEN_CONCURRENCY"]:
+        raise QueueFullError("screen concurrency limit reached")
+    _active_screens += 1
+    held = [True]
+
+    def release():
+        global _active_screens
+        if held[0]:
+            held[0] = False
+            _active_screens -= 1
+    return release
+
+
+def _ndjson(obj):
+    return dumps_json(obj) + b"\n"
+
+
+def _screen_row(candidate, result):
+    return {
+        "drug": candidate["name"],
+        "similarity": candidate["score"],
+        "cell_line_id": result["cell_line_id"],
+        "response_score": result["response_score"],
+        "top_genes": result["top_genes"],
+        "pathways": result["pathways"],
+        "enrichment": result["enrichment"],
+    }
+
+
+def _screen_ranking(candidates, per_drug):
+    """후보별 (세포주) 결과 목록 -> 세포주 평균 response_score 순위"""
+    ranking = []
+    for candidate, results in zip(candidates, per_drug):
+        if not results: continue
+        best = max(results, key=lambda r: r["response_score"])
+        ranking.append({
+            "drug": candidate["name"],
+            "similarity": candidate["score"],
+            "mean_response_score": float(np.mean([r["response_score"] for r in results])),
+            "best_cell_line_id": best["cell_line_id"],
+            "best_response_score": best["response_score"],
+        })
+    ranking.sort(key=lambda r: r["mean_response_score"], reverse=True)
+    return ranking
+
+
+async def _screen_stream(head, cell_line_ids, release):
+    """
+    1) query   : 예측 벡터 + 후보 약물
+    2) result  : FR forward 묶음(SCREEN_BATCH 쌍)이 끝날 때마다 묶음 내 response_score 순으로
+    3) summary : 약물별 세포주 평균 response_score 순위
+    다음 묶음의 forward를 미리 시작해 두고 현재 묶음을 내보냅니다.
+    스트림이 끝나거나 중단되면 release로 스크리닝 슬롯을 반환합니다.
+    """
+    candidates = head["candidates"]
+    pairs = [(d, c) for d in range(len(candidates)) for c in cell_line_ids]
+    chunk = max(1, SERVING_CONFIG["SCREEN_BATCH"])
+
+    def run_chunk(start):
+        part = pairs[start:start + chunk]
+        return asyncio.ensure_future(executor.run(
+            "screen_responses", [candidates[d]["index"] for d, _ in part], [c for _, c in part]))
+
+    pending = None
+    try:
+        yield _ndjson({
+            "type": "query",
+            "recommended_drug_vector": head["vector"],
+            "candidates": [{"name": c["name"], "score": c["score"]} for c in candidates],
+            "cell_line_ids": cell_line_ids,
+            "pairs": len(pairs),
+            "dropped_genes": head["dropped_genes"],
+        })
+
+        per_drug = [[] for _ in candidates]
+        pending = run_chunk(0) if pairs else None
+        for start in range(0, len(pairs), chunk):
+            results = await pending
+            pending = run_chunk(start + chunk) if start + chunk < len(pairs) else None
+
+            rows = []
+            for (d, _), result in zip(pairs[start:start + chunk], results):
+                if result is None: continue
+                per_drug[d].append(result)
+                rows.append({"type": "result", **_screen_row(candidates[d], result)})
+            rows.sort(key=lambda r: r["response_score"], reverse=True)
+            yield b"".join(_ndjson(r) for r in rows)
+
+        yield _ndjson({"type": "summary", "ranking": _screen_ranking(candidates, per_drug)})
+    finally:
+        if pending is not None: pending.cancel()
+        release()
+
+
+def _screen_fields(fields):
+    """-> (genes, expressions, top_k, cell_line_ids) 검증된 스크리닝 요청 필드"""
+    genes, expressions = _signature_fields(fields)
+    top_k = _int_field(fields, "top_k", 20)
+    cell_line_ids = fields.get("cell_line_ids")
+    if cell_line_ids is None:
+        cell_line_ids = list(range(FR_CONFIG["NUM_CELL_LINES"]))
+    if (not isinstance(cell_line_ids, list) or not cell_line_ids
+            or not all(isinstance(c, int) and not isinstance(c, bool) for c in cell_line_ids)):
+        raise HTTPException(status_code=422, detail="cell_line_ids는 정수 리스트여야 합니다.")
+    cell_line_ids = list(dict.fromkeys(cell_line_ids))
+
+    if len(genes) == 0:
+        raise HTTPException(status_code=400, detail="유전자가 입력되지 않았습니다.")
+    if not 1 <= top_k <= 1000:
+        raise HTTPException(status_code=400, detail="top_k는 1~1000 사이여야 합니다.")
+    if not all(0 <= c < FR_CONFIG["NUM_CELL_LINES"] for c in cell_line_ids):
+        raise HTTPException(status_code=400, detail=f"cell_line_id는 0~{FR_CONFIG['NUM_CELL_LINES'] - 1} 사이여야 합니다.")
+    if top_k * len(cell_line_ids) > SERVING_CONFIG["SCREEN_MAX_PAIRS"]:
+        raise HTTPException(status_code=400, detail=f"top_k x 세포주 수는 {SERVING_CONFIG['SCREEN_MAX_PAIRS']} 이하여야 합니다.")
+    return genes, expressions, top_k, cell_line_ids
+
+
+@app.post("/predict/screen", openapi_extra=_body_schema(ScreeningPayload))
+async def screen(request: Request):
+    fields = await _read_fields(request, "screen")
+    genes, expressions, top_k, cell_line_ids = _screen_fields(fields)
+    await _ensure_models("fp", "fr")
+    if service.drug_library is None:
+        raise HTTPException(status_code=503, detail="약물 라이브러리가 로드되지 않았습니다.")
+
+    # 스크리닝 수 제한: 후보 검색 전에 슬롯을 잡고, 실패하면 바로 반환 / 성공하면 스트림이 끝날 때 반환
+    release = _screen_slot()
+    try:
+        head = await executor.run("screen_candidates", genes, expressions, top_k)
+    except BaseException:
+        release()
+        raise
+    if head is None:
+        release()
+        raise HTTPException(status_code=400, detail="유효한 유전자가 없습니다.")
+
+    # 스트림이 시작되지 못한 채 응답이 끝나도 슬롯이 남지 않도록 뒷정리 작업으로도 반환
+    return StreamingResponse(_screen_stream(head, cell_line_ids, release), media_type="application/x-ndjson",
+                             background=BackgroundTask(release))
+
+
+# ------------------------------------------------------------------------------
+# 📦 대량 예측 API (세포/샘플 x 유전자 행렬 업로드 -> 예측 벡터 parquet)
+# ------------------------------------------------------------------------------
+_BULK_CONTENT_TYPES = {
+    "text/csv": "csv", "text/tab-separated-values": "csv",
+    "application/vnd.apache.parquet": "parquet", "application/x-parquet": "parquet",
+    "application/x-hdf5": "h5ad", "application/x-h5ad": "h5ad",
+}
+_active_bulk = 0
+_bulk_in_flight = 0   # 추론 워커 풀에서 실행 중인 대량 예측 chunk 수 (대화형 호출과 구분)
+
+
+async def _bulk_block(block, token_ids, top_k):
+    """대량 예측 chunk 하나를 추론 워커 풀에서 실행. 대화형 요청이 대기 중이면 JOB_MAX_DEFER_MS까지 미룸"""
+    global _bulk_in_flight
+    started = time.perf_counter()
+    while _interactive_busy() and time.perf_counter() - started < SERVING_CONFIG["JOB_MAX_DEFER_MS"] / 1000:
+        await asyncio.sleep(0.005)
+    _bulk_in_flight += 1
+    try:
+        return await executor.run("predict_bulk_block", block, token_ids, SERVING_CONFIG["BULK_FP_BATCH"], top_k)
+    finally:
+        _bulk_in_flight -= 1
+
+
+async def _save_upload(request, path):
+    """요청 본문을 메모리에 모으지 않고 파일로 흘려 씀 (BULK_MAX_BYTES 초과 시 413)"""
+    size = 0
+    with open(path, "wb") as f:
+        async for part in request.stream():
+            size += len(part)
+            if size > SERVING_CONFIG["BULK_MAX_BYTES"]:
+                raise HTTPException(status_code=413, detail=f"업로드는 {SERVING_CONFIG['BULK_MAX_BYTES']} bytes 이하여야 합니다.")
+            f.write(part)
+    if size == 0:
+        raise HTTPException(status_code=400, detail="업로드된 파일이 없습니다.")
+    return size
+
+
+@app.post("/predict/bulk", openapi_extra={"requestBody": {"required": True, "content": {
+    media: {"schema": {"type": "string", "format": "binary"}} for media in _BULK_CONTENT_TYPES}}})
+async def bulk_predict(request: Request, fmt: Optional[str] = Query(None, alias="format"), top_k: int = 0,
+                       id_column: Optional[str] = None, gene_column: Optional[str] = None):
+    """
+    요청 본문 = 행렬 파일 그대로 (parquet / csv / h5ad). 형식은 format 쿼리 -> Content-Type -> 파일 앞부분 순으로 판단합니다.
+    응답 = 예측 벡터 parquet (sample_id, n_genes, recommended_drug_vector [, candidates, scores])
+    """
+    global _active_bulk
+    media = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = fmt or _BULK_CONTENT_TYPES.get(media)
+    if fmt is not None and fmt not in BULK_FORMATS:
+        raise HTTPException(status_code=415, detail=f"format은 {BULK_FORMATS} 중 하나여야 합니다.")
+    if not 0 <= top_k <= 1000:
+        raise HTTPException(status_code=400, detail="top_k는 0~1000 사이여야 합니다.")
+    if _active_bulk >= SERVING_CONFIG["BULK_CONCURRENCY"]:
+        raise QueueFullError("bulk concurrency limit reached")
+    await _ensure_models("fp")
+
+    _active_bulk += 1
+    work_dir = tempfile.mkdtemp(prefix="babayakga-bulk-", dir=SERVING_CONFIG["BULK_TMP_DIR"])
+    try:
+        in_path = os.path.join(work_dir, "input." + (fmt or "bin"))
+        out_path = os.path.join(work_dir, "predictions.parquet")
+        await _save_upload(request, in_path)
+        # 파일 읽기 / parquet 쓰기는 보조 스레드에서, chunk별 토큰화 ~ FP forward는 추론 워커 풀에서
+        loop = asyncio.get_running_loop()
+
+        def predict(block, token_ids):
+            return asyncio.run_coroutine_threadsafe(_bulk_block(block, token_ids, top_k), loop).result()
+
+        summary = await asyncio.to_thread(
+            ingest_file, service, in_path, out_path, fmt=fmt, chunk_size=SERVING_CONFIG["BULK_CHUNK"],
+            fp_batch=SERVING_CONFIG["BULK_FP_BATCH"], top_k=top_k, id_column=id_column, gene_column=gene_column,
+            predict=predict,
+        )
+    except BaseException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+    finally:
+        _active_bulk -= 1
+
+    headers = {
+        "X-Bulk-Samples": str(summary["samples"]),
+        "X-Bulk-Predicted": str(summary["predicted"]),
+        "X-Bulk-Matched-Genes": f"{summary['matched_genes']}/{summary['genes']}",
+        "X-Bulk-Seconds": f"{summary['seconds']:.3f}",
+    }
+    return FileResponse(out_path, media_type="application/vnd.apache.parquet", filename="predictions.parquet",
+                        headers=headers, background=BackgroundTask(shutil.rmtree, work_dir, ignore_errors=True))
+
+
+# ------------------------------------------------------------------------------
+# 🗂️ 비동기 작업 API (제출 -> 상태 / 진행도 폴링 -> 결과를 묶음 단위로 조회)
+# ------------------------------------------------------------------------------
+# 작업은 sqlite 큐(app/jobs.py)에 저장되고, 각 워커 프로세스의 JobRunner가 JOB_CHUNK 항목씩
+# IntegratedService 배치 메서드를 호출합니다. 대화형 요청(/predict/*)이 대기 중이면 다음 묶음을 잠시 미룹니다.
+JOB_KINDS = ("find_drug", "drug_response", "screen")
+
+
+class JobPayload(BaseModel):
+    kind: str                                  # find_drug | drug_response | screen
+    priority: str = "normal"                   # interactive | normal | batch
+    items: Optional[List[dict]] = None         # find_drug / drug_response: 각 엔드포인트 요청 본문 목록
+    genes: Optional[List[str]] = None          # screen: /predict/screen 과 같은 필드
+    expressions: Optional[List[float]] = None
+    top_k: int = 20
+    cell_line_ids: Optional[List[int]] = None
+
+
+def _client_id(request):
+    # 클라이언트별 제한 단위: X-Client-Id 헤더, 없으면 접속 주소
+    return request.headers.get("X-Client-Id") or (request.client.host if request.client else "anonymous")
+
+
+def _require_jobs():
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="작업 큐가 비활성화되어 있습니다 (BABAYAKGA_JOB_DB).")
+
+
+def _job_items(fields, kind):
+    """find_drug / drug_response 작업 항목 검증 -> 큐에 저장할 항목 목록"""
+    items = fields.get("items")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=422, detail="items는 비어 있지 않은 리스트여야 합니다.")
+    if len(items) > SERVING_CONFIG["JOB_MAX_ITEMS"]:
+        raise HTTPException(status_code=400, detail=f"작업 1건의 항목은 {SERVING_CONFIG['JOB_MAX_ITEMS']}개 이하여야 합니다.")
+    parsed = []
+    for i, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise HTTPException(status_code=422, detail="항목은 객체여야 합니다.")
+            genes, expressions = _signature_fields(item)
+            if kind == "find_drug":
+                top_k = _int_field(item, "top_k", 10)
+                _check_find_drug(genes, top_k)
+                parsed.append({"genes": genes, "expressions": expressions, "top_k": top_k})
+            else:
+                drug_vector = _vector_field(item, "smiles_embedding")
+                cell_line_id = _int_field(item, "cell_line_id", 0)
+                _check_simulation(drug_vector, cell_line_id)
+                parsed.append({"genes": genes, "expressions": expressions,
+                               "smiles_embedding": drug_vector, "cell_line_id": cell_line_id})
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"items[{i}]: {e.detail}")
+    return parsed
+
+
+class _ServiceJobHandler:
+    """JobRunner 처리기: 작업 종류별로 IntegratedService 배치 메서드를 추론 워커 풀에서 호출"""
+
+    async def prepare(self, job):
+        # 스크리닝은 후보 약물 수가 정해진 뒤에야 (약물, 세포주) 쌍 수를 알 수 있음
+        if job["kind"] != "screen": return None
+        payload = job["payload"]
+        head = await executor.run("screen_candidates", payload["genes"],
+                                  np.asarray(payload["expressions"], dtype=np.float32), payload["top_k"])
+        if head is None:
+            raise ValueError("유효한 유전자가 없습니다.")
+        meta = {
+            "recommended_drug_vector": head["vector"],
+            "candidates": head["candidates"],
+            "cell_line_ids": payload["cell_line_ids"],
+            "dropped_genes": head["dropped_genes"],
+        }
+        return len(head["candidates"]) * len(payload["cell_line_ids"]), meta
+
+    async def run_chunk(self, job, start, stop):
+        kind, payload = job["kind"], job["payload"]
+        if kind == "screen":
+            # 항목 번호 = 후보 순번 x 세포주 수 + 세포주 순번
+            candidates, cells = job["meta"]["candidates"], job["meta"]["cell_line_ids"]
+            pairs = [(p // len(cells), cells[p % len(cells)]) for p in range(start, stop)]
+            results = await executor.run(
+                "screen_responses", [candidates[d]["index"] for d, _ in pairs], [c for _, c in pairs])
+            return [_screen_row(candidates[d], result) for (d, _), result in zip(pairs, results)]
+
+        items = payload["items"][start:stop]
+        if kind == "find_drug":
+            results = await executor.run("find_drugs_batch", [
+                (it["genes"], np.asarray(it["expressions"], dtype=np.float32), it["top_k"]) for it in items])
+            return [{"error": "유효한 유전자가 없습니다."} if r is None else
+                    {"recommended_drug_vector": r["vector"], "candidates": r["candidates"],
+                     "dropped_genes": r["dropped_genes"]} for r in results]
+
+        results = await executor.run("simulate_drug_response_batch", [
+            (it["genes"], np.asarray(it["expressions"], dtype=np.float32),
+             np.asarray(it["smiles_embedding"], dtype=np.float32), it["cell_line_id"]) for it in items])
+        return [{"error": "예측 오류"} if r is None else r for r in results]
+
+    async def finish(self, job):
+        # 스크리닝: 저장된 결과 전체로 약물별 순위 요약 (재시작으로 이어서 처리한 작업도 동일)
+        if job["kind"] != "screen": return None
+        meta = job["meta"]
+        n_cells = len(meta["cell_line_ids"])
+        per_drug = [[] for _ in meta["candidates"]]
+        rows = await asyncio.to_thread(job_queue.results, job["id"], 0, job["total"])
+        for item, data in rows:
+            per_drug[item // n_cells].append(loads_json(data))
+        return {**meta, "ranking": _screen_ranking(meta["candidates"], per_drug)}
+
+
+def _interactive_busy():
+    # 배치 스케줄러에 대기 중인 요청이 있거나, 작업 / 대량 예측 묶음이 아닌 추론 호출이 실행 중이면 대화형 트래픽이 있는 것으로 봄
+    background = _bulk_in_flight + (job_runner.in_flight if job_runner is not None else 0)
+    return fp_scheduler.pending > 0 or fr_scheduler.pending > 0 or executor.in_flight > background
+
+
+job_runner = JobRunner(
+    job_queue, _ServiceJobHandler(), chunk_size=SERVING_CONFIG["JOB_CHUNK"],
+    concurrency=SERVING_CONFIG["JOB_CONCURRENCY"], busy=_interactive_busy,
+    max_defer_ms=SERVING_CONFIG["JOB_MAX_DEFER_MS"],
+) if job_queue is not None else None
+
+
+@app.on_event("startup")
+async def start_job_runner():
+    # 이전 실행에서 남은 대기 / 중단된 작업도 여기서 이어서 처리 (preload 서버에서는 워커마다 하나)
+    if job_runner is not None:
+        job_runner.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    if job_runner is not None:
+        await job_runner.stop()
+
+
+@app.post("/jobs", status_code=202, openapi_extra=_body_schema(JobPayload))
+async def submit_job(request: Request):
+    _require_jobs()
+    fields = await _read_fields(request, "jobs")
+    kind, priority = fields.get("kind"), fields.get("priority", "normal")
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=422, detail=f"kind는 {JOB_KINDS} 중 하나여야 합니다.")
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=422, detail=f"priority는 {tuple(PRIORITIES)} 중 하나여야 합니다.")
+
+    if kind == "screen":
+        genes, expressions, top_k, cell_line_ids = _screen_fields(fields)
+        if service.is_ready("fp") and service.drug_library is None:
+            raise HTTPException(status_code=503, detail="약물 라이브러리가 로드되지 않았습니다.")
+        payload = {"genes": genes, "expressions": expressions, "top_k": top_k, "cell_line_ids": cell_line_ids}
+        total = top_k * len(cell_line_ids)   # 후보 검색 후 실제 쌍 수로 갱신
+    else:
+        payload = {"items": _job_items(fields, kind)}
+        total = len(payload["items"])
+
+    job_id = await asyncio.to_thread(job_queue.submit, _client_id(request), kind, payload, total, priority)
+    job_runner.notify()
+    return JSONResponse(status_code=202, content={"job_id": job_id, "state": "queued", "total": total},
+                        headers={"Location": f"/jobs/{job_id}"})
+
+
+@app.get("/jobs")
+async def list_jobs(request: Request, limit: int = 100):
+    # 요청한 클라이언트(X-Client-Id)의 최근 작업
+    _require_jobs()
+    return {"jobs": await asyncio.to_thread(job_queue.list, _client_id(request), max(1, min(limit, 1000)))}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    _require_jobs()
+    status = await asyncio.to_thread(job_queue.get, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return JSONResponse(content=status)
+
+
+@app.get("/jobs/{job_id}/results")
+async def job_results(job_id: str, offset: int = 0, limit: int = 100):
+    """
+    item >= offset 인 결과 최대 limit개 (실행 중에도 끝난 묶음까지 조회 가능)
+    next_offset이 null이면 마지막 결과까지 받은 것입니다.
+    """
+    _require_jobs()
+    if offset < 0 or not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="offset은 0 이상, limit은 1~1000 사이여야 합니다.")
+    status = await asyncio.to_thread(job_queue.get, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    rows = await asyncio.to_thread(job_queue.results, job_id, offset, limit)
+
+    total = status["progress"]["total"]
+    next_offset = rows[-1][0] + 1 if rows else offset
+    if next_offset >= total or (not rows and status["state"] in ("failed", "cancelled")):
+        next_offset = None
+    # 저장된 결과 JSON을 다시 파싱하지 않고 그대로 이어 붙여 응답
+    head = dumps_json({"job_id": job_id, "state": status["state"], "progress": status["progress"],
+                       "offset": offset, "next_offset": next_offset})
+    body = b"".join([head[:-1], b',"results":[',
+                     b",".join(b'{"item":%d,"result":%s}' % (item, data) for item, data in rows), b"]}"])
+    return Response(content=body, media_type="application/json")
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    _require_jobs()
+    cancelled = await asyncio.to_thread(job_queue.cancel, job_id)
+    status = await asyncio.to_thread(job_queue.get, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return {"job_id": job_id, "cancelled": cancelled, "state": status["state"]}
+
+
+# ------------------------------------------------------------------------------
+# 🩺 헬스 체크 (liveness / readiness)
+# ------------------------------------------------------------------------------
+@app.get("/healthz")
+async def healthz():
+    # 프로세스가 요청을 받을 수 있으면 항상 200 (모델 로딩 여부와 무관)
+    return {"status": "ok", "pid": os.getpid(), "uptime_s": time.perf_counter() - _import_started}
+
+
+@app.get("/readyz")
+async def readyz():
+    # 모든 모델이 로드 + warm-up을 마쳐야 200, 그 전이나 로드 실패 시 503 (구성 요소별 상태 포함)
+    # lazy 모드에서는 첫 readiness 확인이 백그라운드 로드를 시작합니다.
+    if MODEL_LOADING == "lazy":
+        service.start_background_load()
+    readiness = service.readiness()
+    readiness["loading"] = MODEL_LOADING
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
+
+# ------------------------------------------------------------------------------
+# 📊 배치 스케줄러 지표
+# ------------------------------------------------------------------------------
+@app.get("/metrics/batching")
+async def batching_metrics():
+    return {
+        "executor": executor.stats(),
+        "find_drug": fp_scheduler.stats(),
+        "drug_response": fr_scheduler.stats(),
+    }
+
+
+@app.get("/metrics/jobs")
+async def job_metrics():
+    if job_queue is None: return {"enabled": False}
+    return {"queue": await asyncio.to_thread(job_queue.stats), "runner": job_runner.stats()}
+
+
+@app.get("/metrics/process")
+async def process_metrics():
+    # 워커별 메모리 (preload 서버에서는 요청을 받은 워커의 값)
+    memory = process_memory()
+    return {
+        "pid": os.getpid(),
+        "startup_s": STARTUP_SECONDS.get(),
+        "mmap_weights": service.mmap_weights,
+        **{f"{k}_mb": v / 2**20 for k, v in memory.items()},
+    }
+
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    stats = response_cache.stats() if response_cache is not None else {"enabled": False}
+    # 사전 계산 store 조회 수는 thread 모드에서만 API 프로세스에 집계됩니다.
+    stats["response_store"] = service.response_store.stats() if service.response_store is not None else None
+    stats["gene_layouts"] = service.gene_resolver.stats()
+    return stats
+
+
+# ------------------------------------------------------------------------------
+# 📈 Prometheus 지표 (단계별 지연 시간 히스토그램, 모델 로딩 시간, 메모리)
+# ------------------------------------------------------------------------------
+_QUEUE_DEPTH = REGISTRY.gauge("babayakga_queue_pending", "Requests waiting in the batch scheduler", ("scheduler",))
+_QUEUE_DEPTH.set(lambda: fp_scheduler.stats()["pending"], "find_drug")
+_QUEUE_DEPTH.set(lambda: fr_scheduler.stats()["pending"], "drug_response")
+_CACHE_EVENTS = REGISTRY.gauge("babayakga_cache_events", "drug_response cache counters", ("event",))
+if response_cache is not None:
+    for _event in ("hits", "disk_hits", "misses", "evictions", "expirations", "disk_evictions", "size"):
+        _CACHE_EVENTS.set(lambda e=_event: response_cache.stats()[e], _event)
+_STORE_EVENTS = REGISTRY.gauge("babayakga_response_store_events", "Precomputed response store lookups", ("event",))
+for _event in ("hits", "misses"):
+    # store는 FR 구성 요소와 함께 로드되므로 스크레이프 시점에 조회 (없으면 생략)
+    _STORE_EVENTS.set(lambda e=_event: getattr(service.response_store, e, None), _event)
+
+_JOBS = REGISTRY.gauge("babayakga_jobs", "Jobs in the persistent queue by state", ("state",))
+if job_queue is not None:
+    for _state in ("queued", "running"):
+        _JOBS.set(lambda s=_state: sum(job_queue.stats()[s].values()), _state)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# ------------------------------------------------------------------------------
+# 🔬 온디맨드 프로파일러 (다음 N개 요청을 torch.profiler로 기록)
+# ------------------------------------------------------------------------------
+class ProfilePayload(BaseModel):
+    requests: int = 10
+
+
+def _check_admin(request: Request):
+    # 토큰이 설정되지 않았으면 관리자 엔드포인트 자체를 노출하지 않음 (fail closed)
+    token = SERVING_CONFIG["ADMIN_TOKEN"]
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+
+
+@app.post("/admin/profile")
+async def start_profile(payload: ProfilePayload, request: Request):
+    _check_admin(request)
+    if not 1 <= payload.requests <= 10000:
+        raise HTTPException(status_code=400, detail="requests는 1~10000 사이여야 합니다.")
+    # process 모드에서는 호출을 받은 워커 프로세스 하나만 기록합니다.
+    return await executor.run("arm_profiler", payload.requests)
+
+
+@app.get("/admin/profile")
+async def profile_status(request: Request):
+    _check_admin(request)
+    return await executor.run("profiler_status")
@@ -2,6 +2,21 @@ import torch
 import torch.nn as nn
 import numpy as np
 
+# =========================================================
+# 0. Padding Trim Helper
+# =========================================================
+def trim_padding(input_ids, values, attention_mask):
+    """
+    배치 내 마지막 유효 토큰 이후의 [PAD] 열을 잘라냅니다.
+    잘려나가는 위치는 모두 key_padding_mask로 가려지는 토큰이므로 [CLS] 출력은 동일합니다.
+    """
+    L = attention_mask.shape[1]
+    positions = torch.arange(1, L + 1, device=attention_mask.device)
+    L_eff = int((attention_mask.ne(0) * positions).max())
+    if 0 < L_eff < L:
+        return input_ids[:, :L_eff], values[:, :L_eff], attention_mask[:, :L_eff]
+    return input_ids, values, attention_mask
+
 # =========================================================
 # 1. Encoder (With Organ Token, No Positional Embedding)
 # =========================================================
@@ -26,7 +41,12 @@ class FPEncoderWithOrgan(nn.Module):
         )
         self.encoder = nn.TransformerEncoder(enc_layer, num_layers=num_layers)
 
+        # 실제 토큰 길이만큼만 연산 (export/trace 시에는 False로 고정 길이 사용)
+        self.trim_padding = True
+
     def forward(self, input_ids, values, attention_mask, organ_id):
+        if self.trim_padding:
+            input_ids, values, attention_mask = trim_padding(input_ids, values, attention_mask)
         B, L = input_ids.shape
         dev = input_ids.device
 
@@ -123,7 +143,12 @@ class Cell2SentenceEncoderFR(nn.Module):
         )
         self.encoder = nn.TransformerEncoder(enc_layer, num_layers=num_layers)
 
+        # 실제 토큰 길이만큼만 연산 (export/trace 시에는 False로 고정 길이 사용)
+        self.trim_padding = True
+
     def forward(self, input_ids, values, attention_mask, cell_line_id, smiles_emb):
+        if self.trim_padding:
+            input_ids, values, attention_mask = trim_padding(input_ids, values, attention_mask)
         B, L = input_ids.shape
         device_ = input_ids.device
 
@@ -0,0 +1,45 @@
+import contextlib
+
+import torch
+import torch.nn as nn
+
+# ------------------------------------------------------------------------------
+# INFERENCE PRECISION
+# ------------------------------------------------------------------------------
+# fp32 : 기본 (기준 정확도)
+# bf16 : CPU autocast(bfloat16) - 가중치는 fp32 그대로, matmul만 bf16
+# int8 : nn.Linear 동적 양자화 (가중치 int8, 활성값은 실행 시점 양자화)
+PRECISION_MODES = ("fp32", "bf16", "int8")
+
+
+def apply_precision(model, mode):
+    """로드가 끝난 eval 모델에 precision 모드를 적용해 (필요하면 새) 모델을 반환"""
+    if mode not in PRECISION_MODES:
+        raise ValueError(f"Unknown precision mode: {mode} (choose from {PRECISION_MODES})")
+    if mode == "fp32":
+        return model
+
+    # nn.TransformerEncoderLayer의 fused fast path는 CPU autocast / 양자화 Linear를 지원하지 않으므로
+    # 일반 경로로 실행 (프로세스 전역 설정이지만 precision 자체가 프로세스 단위 설정)
+    if hasattr(torch.backends.mha, "set_fastpath_enabled"):
+        torch.backends.mha.set_fastpath_enabled(False)
+    if mode == "bf16":
+        return model
+
+    # TransformerEncoderLayer의 FFN(linear1/linear2), smiles_head, FR head 등 입력 차원이 큰 Linear만 양자화
+    # (in_features=1 인 value_proj 첫 층은 양자화 이득이 없고 오차만 커짐)
+    targets = {
+        name for name, module in model.named_modules()
+        if type(module) is nn.Linear and module.in_features > 1
+    }
+    return torch.ao.quantization.quantize_dynamic(model, targets, dtype=torch.qint8, inplace=True)
+
+
+def inference_context(mode):
+    """forward를 감쌀 컨텍스트: 항상 inference_mode, bf16이면 CPU/GPU autocast 추가"""
+    stack = contextlib.ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if mode == "bf16":
+        device_type = "cuda" if torch.cuda.is_available() else "cpu"
+        stack.enter_context(torch.autocast(device_type=device_type, dtype=torch.bfloat16))
+    return stack
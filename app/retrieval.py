@@ -0,0 +1,268 @@
+import hashlib
+import os
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# DRUG LIBRARY
+# ------------------------------------------------------------------------------
+def _normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _topk_rows(scores, k):
+    """scores (Q, N) 각 행에서 상위 k개의 (index, score)를 내림차순으로 반환"""
+    k = min(k, scores.shape[1])
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def library_hash(names, embeddings):
+    """약물 이름 + 정규화 전 float32 임베딩 -> 라이브러리 내용 해시 (response store가 같은 행 순서로 만들어졌는지 확인)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\x1f".join(map(str, names)).encode("utf-8"))
+    h.update(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+    return h.hexdigest()
+
+
+def valid_hits(row_idx, row_scores):
+    """search 결과 한 행에서 채워진 칸만 (index, score)로 반환 (근사 인덱스의 -1 / -inf 패딩 제외)"""
+    return [(int(i), float(s)) for i, s in zip(row_idx, row_scores) if i >= 0 and np.isfinite(s)]
+
+
+class DrugLibrary:
+    """
+    참조 약물 SMILES 임베딩 라이브러리
+
+    - embeddings: L2 정규화된 (N, SMILES_DIM) 연속 행렬 (float32 또는 float16)
+    - norms     : 원래 임베딩의 L2 노름 (FR 입력용 원본 벡터 복원, vectors())
+    - content_hash : 이름 + 원본 임베딩 해시 (response store는 이 값이 같을 때 행 번호로 바로 조회)
+    - 지원 파일 형식
+        * .parquet : drug_name(또는 name) + embedding(list<float>) 컬럼 [+ smiles]
+        * .npz     : names, embeddings 배열
+        * .npy     : embeddings 배열 + 같은 이름의 .txt (한 줄에 약물 이름 하나)
+    """
+    def __init__(self, names, embeddings, smiles=None, dtype=np.float32):
+        self.names = np.asarray(names, dtype=object)
+        self.smiles = np.asarray(smiles, dtype=object) if smiles is not None else None
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.content_hash = library_hash(self.names, embeddings)
+        self.norms = np.linalg.norm(embeddings, axis=-1).astype(np.float32)
+        self.embeddings = np.ascontiguousarray(_normalize(embeddings).astype(dtype))
+        if len(self.names) != len(self.embeddings):
+            raise ValueError(f"names({len(self.names)}) / embeddings({len(self.embeddings)}) 개수 불일치")
+        if len(self.names) == 0:
+            raise ValueError("약물 라이브러리가 비어 있습니다 (검색할 약물이 없음)")
+        self.index = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def dim(self):
+        return self.embeddings.shape[1]
+
+    @classmethod
+    def load(cls, path, dtype=np.float32):
+        names, embeddings, smiles = cls.read(path)
+        return cls(names, embeddings, smiles=smiles, dtype=dtype)
+
+    @staticmethod
+    def read(path):
+        """파일 -> (names, 정규화 전 embeddings, smiles 또는 None)"""
+        ext = os.path.splitext(path)[1].lower()
+        smiles = None
+        if ext == ".parquet":
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(path)
+            name_col = "drug_name" if "drug_name" in table.column_names else "name"
+            names = table.column(name_col).to_pylist()
+            emb_col = table.column("embedding").combine_chunks()
+            # list<float> 컬럼을 파이썬 객체 없이 평탄화 후 reshape
+            flat = emb_col.flatten().to_numpy(zero_copy_only=False)
+            embeddings = flat.reshape(len(names), -1)
+            if "smiles" in table.column_names:
+                smiles = table.column("smiles").to_pylist()
+        elif ext == ".npz":
+            data = np.load(path, allow_pickle=False)
+            names, embeddings = data["names"], data["embeddings"]
+            smiles = data["smiles"] if "smiles" in data.files else None
+        elif ext == ".npy":
+            embeddings = np.load(path, mmap_mode="r")
+            with open(os.path.splitext(path)[0] + ".txt", "r", encoding="utf-8") as f:
+                names = [line.rstrip("\n") for line in f]
+        else:
+            raise ValueError(f"Unsupported drug library format: {path}")
+        return names, embeddings, smiles
+
+    def vectors(self, indices):
+        """정규화 전 원본 임베딩 (len(indices), dim) float32"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return self.embeddings[indices].astype(np.float32) * self.norms[indices, None]
+
+    def build_index(self, kind="exact", **kwargs):
+        if kind == "exact":
+            self.index = None
+        elif kind == "ivfpq":
+            self.index = IVFPQIndex(**kwargs).fit(self.embeddings)
+        else:
+            raise ValueError(f"Unknown drug index: {kind}")
+        return self
+
+    def search(self, queries, k=10, block_size=65536, **search_kwargs):
+        """
+        queries: (Q, dim) -> (indices (Q, k), cosine scores (Q, k))
+        라이브러리를 block_size 단위로 나눠 행렬곱 후 argpartition으로 상위 k개를 병합합니다.
+        근사 인덱스가 k개를 채우지 못한 칸은 index -1, score -inf 입니다 (valid_hits로 걸러냄).
+        """
+        q = _normalize(np.atleast_2d(queries))
+        if self.index is not None:
+            return self.index.search(q, k, self.embeddings, **search_kwargs)
+
+        best_idx, best_scores = None, None
+        for start in range(0, len(self), block_size):
+            block = self.embeddings[start:start + block_size]
+            scores = q @ block.T.astype(np.float32, copy=False)
+            idx, part = _topk_rows(scores, k)
+            idx += start
+            if best_idx is None:
+                best_idx, best_scores = idx, part
+            else:
+                merged_idx = np.concatenate([best_idx, idx], axis=1)
+                merged_scores = np.concatenate([best_scores, part], axis=1)
+                sel, best_scores = _topk_rows(merged_scores, k)
+                best_idx = np.take_along_axis(merged_idx, sel, axis=1)
+        return best_idx, best_scores
+
+    def rank(self, queries, k=10, **search_kwargs):
+        """검색 결과를 [{"name", "score"}, ...] 리스트(쿼리별)로 변환 (빈 칸 제외)"""
+        idx, scores = self.search(queries, k, **search_kwargs)
+        return [
+            [{"name": str(self.names[i]), "score": float(s)} for i, s in valid_hits(row_idx, row_scores)]
+            for row_idx, row_scores in zip(idx, scores)
+        ]
+
+
+# ------------------------------------------------------------------------------
+# APPROXIMATE INDEX (IVF + Product Quantization)
+# ------------------------------------------------------------------------------
+def _cluster_sums(x, assign, n_clusters):
+    """할당된 클러스터별 벡터 합 (np.add.at 보다 빠른 정렬 + reduceat)"""
+    order = np.argsort(assign, kind="stable")
+    counts = np.bincount(assign, minlength=n_clusters)
+    sums = np.zeros((n_clusters, x.shape[1]), dtype=np.float32)
+    filled = counts > 0
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+    sums[filled] = np.add.reduceat(x[order], starts, axis=0)
+    return sums, counts
+
+
+def _spherical_kmeans(x, n_clusters, n_iter, rng):
+    centroids = x[rng.choice(len(x), size=n_clusters, replace=len(x) < n_clusters)].astype(np.float32)
+    for _ in range(n_iter):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        sums, counts = _cluster_sums(x, assign, n_clusters)
+        empty = counts == 0
+        sums[empty] = x[rng.choice(len(x), size=int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _kmeans(x, n_clusters, n_iter, rng):
+    centroids = x[rng.choice(len(x), size=n_clusters, replace=len(x) < n_clusters)].astype(np.float32)
+    for _ in range(n_iter):
+        dist = (x * x).sum(1, keepdims=True) - 2 * x @ centroids.T + (centroids * centroids).sum(1)
+        assign = np.argmin(dist, axis=1)
+        sums, counts = _cluster_sums(x, assign, n_clusters)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+class IVFPQIndex:
+    """
+    수백만 건 규모 라이브러리용 근사 최근접 검색
+
+    - IVF : 구면 k-means로 n_lists개 셀로 분할, 쿼리당 nprobe개 셀만 탐색
+    - PQ  : 벡터를 n_subvectors개 부분공간으로 나누어 uint8 코드로 압축,
+            룩업 테이블로 내적을 근사한 뒤 상위 후보만 원본 벡터로 재정렬(rerank)
+    """
+    def __init__(self, n_lists=1024, n_subvectors=48, n_bits=8, nprobe=32,
+                 rerank=10, train_size=50_000, n_iter=10, seed=0):
+        self.n_lists = int(n_lists)
+        self.n_subvectors = int(n_subvectors)
+        self.n_codes = 2 ** int(n_bits)
+        self.nprobe = int(nprobe)
+        self.rerank = int(rerank)
+        self.train_size = int(train_size)
+        self.n_iter = int(n_iter)
+        self.seed = seed
+
+    def fit(self, embeddings):
+        x = np.asarray(embeddings, dtype=np.float32)
+        N, D = x.shape
+        if D % self.n_subvectors != 0:
+            raise ValueError(f"dim {D} is not divisible by n_subvectors {self.n_subvectors}")
+        rng = np.random.default_rng(self.seed)
+        train = x[rng.choice(N, size=min(N, self.train_size), replace=False)]
+
+        # 1. Coarse quantizer
+        self.n_lists = min(self.n_lists, len(train))
+        self.centroids = _spherical_kmeans(train, self.n_lists, self.n_iter, rng)
+        assign = np.empty(N, dtype=np.int64)
+        for start in range(0, N, 65536):
+            assign[start:start + 65536] = np.argmax(x[start:start + 65536] @ self.centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        self.list_ids = order
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=self.n_lists))])
+
+        # 2. Product quantizer (셀 순서대로 정렬된 코드)
+        self.sub_dim = D // self.n_subvectors
+        n_codes = min(self.n_codes, len(train))
+        pq_train = train[:64 * n_codes]   # 코드북 학습은 코드당 64개 샘플이면 충분
+        self.codebooks = np.stack([
+            _kmeans(pq_train[:, m * self.sub_dim:(m + 1) * self.sub_dim], n_codes, self.n_iter, rng)
+            for m in range(self.n_subvectors)
+        ])  # (M, n_codes, sub_dim)
+        codes = np.empty((N, self.n_subvectors), dtype=np.uint8 if n_codes <= 256 else np.uint16)
+        xs = x[order]
+        for m in range(self.n_subvectors):
+            sub = xs[:, m * self.sub_dim:(m + 1) * self.sub_dim]
+            cb = self.codebooks[m]
+            for start in range(0, N, 65536):
+                chunk = sub[start:start + 65536]
+                dist = -2 * chunk @ cb.T + (cb * cb).sum(1)
+                codes[start:start + 65536, m] = np.argmin(dist, axis=1)
+        self.codes = codes
+        return self
+
+    def search(self, queries, k, embeddings=None, nprobe=None):
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        probes = _topk_rows(queries @ self.centroids.T, nprobe)[0]
+        # (Q, M, n_codes) 내적 룩업 테이블
+        tables = np.einsum("qmd,mcd->qmc",
+                           queries.reshape(len(queries), self.n_subvectors, self.sub_dim), self.codebooks)
+        m_idx = np.arange(self.n_subvectors)
+
+        out_idx = np.full((len(queries), k), -1, dtype=np.int64)   # 후보가 k개보다 적으면 -1로 남음
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for qi in range(len(queries)):
+            rows = np.concatenate([np.arange(self.list_offsets[c], self.list_offsets[c + 1]) for c in probes[qi]])
+            if len(rows) == 0: continue
+            approx = tables[qi][m_idx, self.codes[rows]].sum(axis=1)
+            n_cand = min(len(rows), k * self.rerank)
+            cand = _topk_rows(approx[None, :], n_cand)[0][0]
+            ids = self.list_ids[rows[cand]]
+            if embeddings is not None:
+                scores = embeddings[ids].astype(np.float32) @ queries[qi]
+            else:
+                scores = approx[cand]
+            sel, top = _topk_rows(scores[None, :], min(k, len(ids)))
+            out_idx[qi, :sel.shape[1]] = ids[sel[0]]
+            out_scores[qi, :sel.shape[1]] = top[0]
+        return out_idx, out_scores
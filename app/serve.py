@@ -0,0 +1,111 @@
+"""
+가중치를 한 번만 로드한 뒤 fork하는 멀티 워커 서버 (preload-then-fork)
+
+    python -m app.serve --workers 4 --host 0.0.0.0 --port 8000
+
+`uvicorn app.main:app --workers N` 는 워커마다 app.main을 import하므로 모델/vocab/약물 라이브러리를
+N번 로드합니다. 여기서는 부모 프로세스가 한 번 로드한 뒤 소켓을 열고 fork하므로
+워커들은 읽기 전용 가중치 페이지를 copy-on-write로 공유합니다.
+(체크포인트 mmap 로드와 함께 쓰면 다른 서버 프로세스와도 페이지 캐시를 공유)
+
+주의: 부모가 다중 스레드 OpenMP 풀을 만든 뒤 fork하면 자식의 torch 연산이 멈출 수 있으므로
+부모는 torch 스레드 1개로 로드하고, 각 워커가 fork 이후 자기 스레드 수를 설정합니다.
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+
+import torch
+
+from .telemetry import process_memory
+
+
+def _worker_main(index, config, sock, torch_threads):
+    import uvicorn
+    from . import main
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    torch.set_num_threads(torch_threads)
+    main.executor.threads_per_worker = torch_threads
+    memory = process_memory()
+    print(f"👷 worker {index} pid={os.getpid()} threads={torch_threads} "
+          + " ".join(f"{k}={v / 2**20:.0f}MB" for k, v in memory.items()), flush=True)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="preload-then-fork uvicorn 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--torch-threads", type=int, default=None, help="워커당 torch 스레드 (기본: cpu_count // workers)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    torch_threads = args.torch_threads or max(1, (os.cpu_count() or 1) // args.workers)
+    # 부모는 단일 스레드로 로드 (fork 안전), 워커 스레드 수는 fork 이후 설정
+    os.environ["BABAYAKGA_TORCH_THREADS"] = "1"
+    # fork 전에 모델 로드 + warm-up까지 끝내야 워커가 가중치를 공유 (백그라운드 스레드는 fork되지 않음)
+    os.environ["BABAYAKGA_MODEL_LOADING"] = "eager"
+    torch.set_num_threads(1)
+
+    started = time.perf_counter()
+    from .main import app, SERVING_CONFIG
+    if SERVING_CONFIG["EXECUTOR"] != "thread":
+        print("⚠️ preload server expects BABAYAKGA_EXECUTOR=thread (process executors are not shared across forks)")
+    load_s = time.perf_counter() - started
+    memory = process_memory()
+    print(f"📦 preloaded in {load_s:.2f}s (parent pid={os.getpid()}, rss={memory['rss'] / 2**20:.0f}MB)", flush=True)
+
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level=args.log_level)
+    sock = config.bind_socket()
+
+    children = {}
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _worker_main(index, config, sock, torch_threads)
+            finally:
+                os._exit(0)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try: os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError: pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for i in range(args.workers):
+        spawn(i)
+    print(f"🚀 {args.workers} workers ready in {time.perf_counter() - started:.2f}s "
+          f"on http://{args.host}:{args.port}", flush=True)
+
+    # 비정상 종료한 워커는 이미 로드된 부모에서 다시 fork (재로딩 없음)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"⚠️ worker {index} (pid={pid}) exited with status {status}, respawning", flush=True)
+            spawn(index)
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
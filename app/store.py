@@ -0,0 +1,186 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from .cache import hash_vector
+
+# ------------------------------------------------------------------------------
+# PRECOMPUTED RESPONSE STORE
+# ------------------------------------------------------------------------------
+# FR 출력은 (약물 벡터, 세포주)에만 의존하므로 알려진 약물 라이브러리는 미리 계산해 둘 수 있습니다.
+#
+#   <store>/responses.f16 : (n_drugs, n_cells, TOP_K) float16 raw memmap (C 순서)
+#   <store>/keys.npy      : 약물 벡터 해시(uint64, 정렬됨)    -> np.load(mmap_mode="r")
+#   <store>/rows.npy      : keys 순서에 대응하는 약물 행 번호
+#   <store>/names.npy     : 약물 이름 (행 순서)
+#   <store>/meta.json     : shape, cell_line_ids, 체크포인트 해시, precision, 해시 소수 자릿수, 라이브러리 내용 해시
+#
+# 라이브러리 약물은 행 번호로 조회합니다 (meta의 library 해시 == DrugLibrary.content_hash 일 때, 행 순서 동일).
+# 벡터 키는 클라이언트가 보낸 원본 임베딩처럼 라이브러리 행을 모르는 요청에만 씁니다.
+#
+# 모든 배열을 읽기 전용 mmap으로 열기 때문에 여러 uvicorn 워커가 같은 페이지 캐시를 공유합니다.
+def vector_key(vector, decimals=4):
+    """약물 벡터 -> uint64 키 (cache.hash_vector 앞 8바이트)"""
+    return np.uint64(int(hash_vector(vector, decimals)[:16], 16))
+
+
+class ResponseStore:
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.shape = tuple(self.meta["shape"])
+        self.decimals = int(self.meta["decimals"])
+        self.responses = np.memmap(os.path.join(path, "responses.f16"), dtype=np.float16, mode="r", shape=self.shape)
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.rows = np.load(os.path.join(path, "rows.npy"), mmap_mode="r")
+        self.names = np.load(os.path.join(path, "names.npy"), mmap_mode="r")
+
+        # 세포주 id -> 저장된 열 번호 (없으면 -1)
+        cell_ids = np.asarray(self.meta["cell_line_ids"], dtype=np.int64)
+        self.cell_columns = np.full(int(cell_ids.max()) + 1 if len(cell_ids) else 0, -1, dtype=np.int64)
+        self.cell_columns[cell_ids] = np.arange(len(cell_ids))
+        self._name_rows = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _cell_column(self, cell_line_id):
+        cell_line_id = int(cell_line_id)
+        return int(self.cell_columns[cell_line_id]) if 0 <= cell_line_id < len(self.cell_columns) else -1
+
+    def row_for_vector(self, vector):
+        key = vector_key(vector, self.decimals)
+        pos = int(np.searchsorted(self.keys, key))
+        return int(self.rows[pos]) if pos < len(self.keys) and self.keys[pos] == key else -1
+
+    def matches_library(self, library):
+        """store 행 순서가 이 DrugLibrary와 같은지 (같은 파일에서 만들어졌는지)"""
+        return self.meta.get("library") == library.content_hash and self.shape[0] == len(library)
+
+    def row_for_name(self, name):
+        if self._name_rows is None:
+            with self._lock:
+                if self._name_rows is None:
+                    self._name_rows = {str(n): i for i, n in enumerate(self.names.tolist())}
+        return self._name_rows.get(str(name), -1)
+
+    def get(self, row, cell_line_id):
+        """-> (TOP_K,) float16 mmap 뷰 (복사 없음), 없으면 None"""
+        col = self._cell_column(cell_line_id) if row >= 0 else -1
+        if col < 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.responses[row, col]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "drugs": self.shape[0],
+            "cell_lines": self.shape[1],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "fr_checkpoint": self.meta.get("fr_checkpoint"),
+            "precision": self.meta.get("precision"),
+            "library": self.meta.get("library"),
+        }
+
+
+def build_response_store(service, names, embeddings, out_dir, cell_line_ids=None, batch_size=4096, decimals=4):
+    """
+    약물 라이브러리(names, 정규화 전 embeddings) x 세포주 전체 그리드를 FR 배치로 예측해 out_dir에 저장합니다.
+    키는 파일에 담긴 원본 벡터로 계산하므로 라이브러리 임베딩을 그대로 보내는 요청과 정확히 일치합니다.
+    임시 디렉터리에 쓴 뒤 교체하므로 서빙 중인 워커는 이전 store를 계속 읽을 수 있습니다.
+    """
+    from .retrieval import library_hash
+    from .services import FR_CONFIG
+
+    cell_line_ids = list(range(FR_CONFIG["NUM_CELL_LINES"])) if cell_line_ids is None else list(cell_line_ids)
+    n_drugs, n_cells, n_out = len(names), len(cell_line_ids), FR_CONFIG["TOP_K"]
+    tmp_dir = out_dir.rstrip(os.sep) + f".tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    responses = np.memmap(os.path.join(tmp_dir, "responses.f16"), dtype=np.float16, mode="w+",
+                          shape=(n_drugs, n_cells, n_out))
+    drugs_per_batch = max(1, batch_size // n_cells)
+    cells = np.tile(np.asarray(cell_line_ids, dtype=np.int64), drugs_per_batch)
+    keys = np.empty(n_drugs, dtype=np.uint64)
+
+    started = time.perf_counter()
+    for start in range(0, n_drugs, drugs_per_batch):
+        stop = min(n_drugs, start + drugs_per_batch)
+        vectors = np.asarray(embeddings[start:stop], dtype=np.float32)
+        for i, vec in enumerate(vectors):
+            keys[start + i] = vector_key(vec, decimals)
+        drug_rows = np.repeat(vectors, n_cells, axis=0)
+        deltas = service._fr_forward(drug_rows, cells[:len(drug_rows)], service="precompute")
+        responses[start:stop] = deltas.reshape(stop - start, n_cells, n_out).astype(np.float16)
+        if (start // drugs_per_batch) % 50 == 0:
+            print(f"  {stop}/{n_drugs} drugs ({time.perf_counter() - started:.1f}s)")
+    responses.flush()
+    del responses
+
+    order = np.argsort(keys, kind="stable")
+    np.save(os.path.join(tmp_dir, "keys.npy"), keys[order])
+    np.save(os.path.join(tmp_dir, "rows.npy"), order.astype(np.int64))
+    np.save(os.path.join(tmp_dir, "names.npy"), np.asarray(names, dtype=str))
+    meta = {
+        "shape": [n_drugs, n_cells, n_out],
+        "cell_line_ids": cell_line_ids,
+        "decimals": decimals,
+        "fr_checkpoint": service.fr_checkpoint_hash,
+        "precision": service.precision,
+        "library": library_hash(names, embeddings),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # 교체: 기존 store는 열려 있는 mmap이 있어도 안전하게 이름만 바꿔 치움
+    if os.path.exists(out_dir):
+        old_dir = out_dir.rstrip(os.sep) + f".old-{int(time.time())}"
+        os.rename(out_dir, old_dir)
+        os.rename(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        os.rename(tmp_dir, out_dir)
+    print(f"✅ Response store written: {out_dir} ({n_drugs} drugs x {n_cells} cell lines, "
+          f"{time.perf_counter() - started:.1f}s)")
+    return meta
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .retrieval import DrugLibrary
+    from .services import IntegratedService
+
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    parser = argparse.ArgumentParser(description="약물 라이브러리 x 세포주 FR 응답 사전 계산")
+    parser.add_argument("--library", default=os.environ.get("BABAYAKGA_DRUG_LIBRARY", os.path.join(data_dir, "drug_library.parquet")))
+    parser.add_argument("--out", default=os.environ.get("BABAYAKGA_RESPONSE_STORE", os.path.join(data_dir, "response_store")))
+    parser.add_argument("--fp", default=os.environ.get("BABAYAKGA_FP_CKPT", os.path.join(data_dir, "fp_smalltargets.pt")))
+    parser.add_argument("--fr", default=os.environ.get("BABAYAKGA_FR_CKPT", os.path.join(data_dir, "fr_epoch6_20251227_052053.pt")))
+    parser.add_argument("--precision", default=os.environ.get("BABAYAKGA_PRECISION", "fp32"))
+    parser.add_argument("--cell-lines", type=int, nargs="+", default=None)
+    parser.add_argument("--batch", type=int, default=4096, help="FR forward 1회당 (약물, 세포주) 쌍 수")
+    args = parser.parse_args()
+
+    service = IntegratedService(
+        fp_path=args.fp, fr_path=args.fr,
+        vocab_path=os.path.join(data_dir, "fp_model_vocab.json"),
+        gene_meta_path=os.path.join(data_dir, "gene_metadata.parquet"),
+        precision=args.precision,
+    )
+    names, embeddings, _ = DrugLibrary.read(args.library)
+    build_response_store(service, names, embeddings, args.out, args.cell_lines, args.batch)
@@ -0,0 +1,276 @@
+import contextlib
+import os
+import threading
+import time
+
+import torch
+
+# ------------------------------------------------------------------------------
+# PROMETHEUS METRICS (text exposition format, 외부 의존성 없음)
+# ------------------------------------------------------------------------------
+# 초 단위 지연 시간 버킷 (0.1ms ~ 10s)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs: return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"): return "+Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """라벨별 누적 버킷 히스토그램 (스레드 안전)"""
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, ([*s[0]], s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                le = _format_labels(self.labelnames, labels, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            base = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format_value(total)}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class Gauge:
+    """라벨별 현재 값 (set 또는 스크레이프 시점에 호출되는 함수)"""
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def get(self, *labels):
+        value = self._values.get(labels)
+        return value() if callable(value) else value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            if callable(value): value = value()
+            if value is None: continue
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def process_rss_bytes():
+    """현재 프로세스 RSS (bytes). /proc 이 없으면 최대 RSS로 대체"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def process_memory():
+    """
+    현재 프로세스 메모리 (bytes): rss, pss(공유 페이지를 프로세스 수로 나눈 몫), shared(다른 프로세스와 공유 중인 페이지)
+    /proc/self/smaps_rollup 이 없으면 rss만 반환
+    """
+    memory = {"rss": process_rss_bytes()}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {line.split(":")[0]: int(line.split()[1]) * 1024 for line in f if line.endswith("kB\n")}
+    except (OSError, ValueError, IndexError):
+        return memory
+    memory["pss"] = fields.get("Pss", 0)
+    memory["shared"] = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return memory
+
+
+def module_bytes(model):
+    """nn.Module 파라미터 + 버퍼 크기 (bytes), Module이 아니면 None"""
+    if not isinstance(model, torch.nn.Module): return None
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "babayakga_stage_seconds", "Time spent in each stage of a service call", ("service", "stage"))
+HTTP_SECONDS = REGISTRY.histogram(
+    "babayakga_http_request_seconds", "End-to-end HTTP request latency", ("path", "status"))
+BATCH_SIZE = REGISTRY.histogram(
+    "babayakga_batch_size", "Requests per model forward", ("service",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "babayakga_model_load_seconds", "Time taken to load each service component at startup", ("component",))
+MODEL_BYTES = REGISTRY.gauge(
+    "babayakga_model_bytes", "Parameter and buffer memory of each loaded model", ("model",))
+MEMORY_BYTES = REGISTRY.gauge(
+    "babayakga_memory_bytes", "Process memory usage", ("kind",))
+STARTUP_SECONDS = REGISTRY.gauge(
+    "babayakga_startup_seconds", "Time from process start of app import until the service was ready")
+
+MEMORY_BYTES.set(process_rss_bytes, "rss")
+MEMORY_BYTES.set(lambda: process_memory().get("pss"), "pss")
+MEMORY_BYTES.set(lambda: process_memory().get("shared"), "shared")
+if torch.cuda.is_available():
+    MEMORY_BYTES.set(torch.cuda.memory_allocated, "cuda_allocated")
+    MEMORY_BYTES.set(torch.cuda.max_memory_allocated, "cuda_max_allocated")
+
+
+# ------------------------------------------------------------------------------
+# TIMING SPANS
+# ------------------------------------------------------------------------------
+_profiling = threading.local()
+
+
+@contextlib.contextmanager
+def span(service, stage):
+    """with span("fp", "forward"): ...  -> babayakga_stage_seconds{service,stage}
+    프로파일링 중이면 torch.profiler 트레이스에도 같은 이름의 구간을 남깁니다."""
+    record = torch.profiler.record_function(f"{service}.{stage}") if getattr(_profiling, "active", False) else None
+    if record is not None: record.__enter__()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, service, stage)
+        if record is not None: record.__exit__(None, None, None)
+
+
+@contextlib.contextmanager
+def timed_load(component):
+    """시작 시 컴포넌트 로딩 시간을 babayakga_model_load_seconds 게이지로 기록"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - started, component)
+
+
+# ------------------------------------------------------------------------------
+# ON-DEMAND PROFILER
+# ------------------------------------------------------------------------------
+class RequestProfiler:
+    """
+    arm(n) 이후 들어오는 n개 요청을 torch.profiler로 기록해 Chrome trace(JSON)로 저장합니다.
+
+    - 서비스 배치 메서드가 워커 스레드 안에서 profile(service, batch_size)로 감싸므로
+      배치 단위로 trace 파일이 하나씩 생깁니다 (chrome://tracing, Perfetto에서 열기).
+    - 세션별 디렉터리: <out_dir>/<YYYYmmdd-HHMMSS>/<service>-<seq>.json
+    - torch.profiler 세션은 프로세스에 하나만 열 수 있으므로, 기록 중인 배치가 있으면 다른 배치는 기록 없이 실행합니다
+      (추론 워커 스레드가 여럿일 때 겹친 세션은 이벤트가 섞인 trace를 남김).
+    """
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.remaining = 0
+        self.session_dir = None
+        self.traces = []
+        self._seq = 0
+        self._active = False
+        self._lock = threading.Lock()
+
+    def arm(self, num_requests, record_shapes=True, profile_memory=False):
+        with self._lock:
+            self.remaining = int(num_requests)
+            self.session_dir = os.path.join(self.out_dir, time.strftime("%Y%m%d-%H%M%S"))
+            self.traces = []
+            self._seq = 0
+            self.record_shapes = record_shapes
+            self.profile_memory = profile_memory
+            os.makedirs(self.session_dir, exist_ok=True)
+        return self.status()
+
+    def status(self):
+        with self._lock:
+            return {"remaining": self.remaining, "session_dir": self.session_dir, "traces": list(self.traces)}
+
+    def _claim(self, batch_size):
+        with self._lock:
+            if self.remaining <= 0 or self._active: return None
+            self._active = True
+            self.remaining = max(0, self.remaining - batch_size)
+            self._seq += 1
+            return self._seq
+
+    def _release(self):
+        with self._lock:
+            self._active = False
+
+    @contextlib.contextmanager
+    def profile(self, service, batch_size):
+        seq = self._claim(batch_size) if self.remaining > 0 else None
+        if seq is None:
+            yield
+            return
+
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available(): activities.append(torch.profiler.ProfilerActivity.CUDA)
+        _profiling.active = True
+        try:
+            try:
+                with torch.profiler.profile(activities=activities, record_shapes=self.record_shapes,
+                                            profile_memory=self.profile_memory) as prof:
+                    yield
+            finally:
+                _profiling.active = False
+            path = os.path.join(self.session_dir, f"{service}-{seq:04d}.json")
+            prof.export_chrome_trace(path)
+            with self._lock:
+                self.traces.append(path)
+        finally:
+            self._release()
+        print(f"🔬 profiler trace saved: {path} (batch={batch_size})")
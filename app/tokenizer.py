@@ -0,0 +1,81 @@
+import numpy as np
+
+
+# ------------------------------------------------------------------------------
+# FP TOKENIZER
+# ------------------------------------------------------------------------------
+class FPTokenizer:
+    """
+    FP 입력 토크나이저 (유전자 식별자 -> token id 해석은 GeneResolver가 담당)
+
+    - encode_ids : 요청 하나의 (token id 배열, 값 배열) -> 모델 입력
+    - encode_csr : (샘플, 유전자) CSR 블록 전체를 행 단위 파이썬 루프 없이 한 번에
+    - predict_drug_from_genes 의 기존 전처리와 동일한 결과:
+      clip(±DELTA_CLIP_ABS) -> |값| 내림차순 상위 MAX_SEQ_LEN개 (동률은 입력 순서) -> token id 오름차순
+    """
+    def __init__(self, max_seq_len, clip_abs, cls_id, organ_tok_id):
+        self.max_seq_len = int(max_seq_len)
+        self.clip_abs = float(clip_abs)
+        self.prefix_ids = np.array([cls_id, organ_tok_id], dtype=np.int64)
+
+    def encode_ids(self, token_ids, values):
+        """
+        token_ids (모두 vocab 안), values -> (input_ids int64, values float32)  [CLS][ORGAN] + 선택된 유전자, 패딩 없음
+        """
+        vals = np.clip(np.asarray(values, dtype=np.float64), -self.clip_abs, self.clip_abs)
+        mag = np.abs(vals)
+
+        n = len(token_ids)
+        if n > self.max_seq_len:
+            # 상위 MAX_SEQ_LEN번째 크기를 기준값으로 잡고, 기준값과 같은 동률은 입력 순서대로 채움
+            kth = np.partition(mag, n - self.max_seq_len)[n - self.max_seq_len]
+            above = np.flatnonzero(mag > kth)
+            ties = np.flatnonzero(mag == kth)[:self.max_seq_len - len(above)]
+            sel = np.concatenate([above, ties])
+        else:
+            sel = np.arange(n)
+
+        # (1) |값| 내림차순(동률은 입력 순서) -> (2) token id 기준 stable 정렬
+        sel = sel[np.lexsort((sel, -mag[sel]))]
+        sel = sel[np.argsort(token_ids[sel], kind="stable")]
+
+        input_ids = np.concatenate([self.prefix_ids, token_ids[sel]])
+        input_vals = np.concatenate([np.zeros(2, dtype=np.float32), vals[sel].astype(np.float32)])
+        return input_ids, input_vals
+
+    def encode_csr(self, matrix, token_ids):
+        """
+        (샘플, 유전자) CSR 블록 전체를 한 번에 토큰화 -> 행별 (input_ids, values) 또는 None
+
+        token_ids: 열별 token id (모두 vocab 안, 열 순서가 encode()의 입력 순서)
+        CSR에 저장된 값만 입력으로 보며(저장된 0도 입력, 저장되지 않은 칸은 측정되지 않은 유전자), encode()와 같은 규칙을
+        행 단위 파이썬 루프 없이 적용합니다: clip -> |값| 내림차순(동률은 열 순서) 상위 max_seq_len -> token id 정렬
+        """
+        matrix = matrix.tocsr(copy=True)
+        matrix.sort_indices()
+        n_rows = matrix.shape[0]
+        counts = np.diff(matrix.indptr)
+        rows = np.repeat(np.arange(n_rows, dtype=np.uint64), counts)
+        vals = np.clip(matrix.data.astype(np.float32), -self.clip_abs, self.clip_abs)
+        tokens = np.asarray(token_ids, dtype=np.int64)[matrix.indices]
+
+        # 행 안에서 (|값| 내림차순, 열 순서) 순위 -> 상위 max_seq_len개만 유지
+        # 열은 이미 행 안에서 오름차순이므로 (행, -|값|) 단일 uint64 키의 stable 정렬로 충분
+        # (0 이상 float32의 비트 패턴은 크기 순서와 같음)
+        mag_bits = np.abs(vals).view(np.uint32).astype(np.uint64)
+        order = np.argsort((rows << np.uint64(32)) | (np.uint64(0xFFFFFFFF) - mag_bits), kind="stable")
+        rank = np.arange(len(order)) - matrix.indptr[rows[order].astype(np.int64)]
+        keep = order[rank < self.max_seq_len]
+        # 행 안에서 token id 오름차순 (같은 id는 위 순서 유지)
+        keep = keep[np.argsort((rows[keep] << np.uint64(32)) | tokens[keep].astype(np.uint64), kind="stable")]
+
+        kept_counts = np.minimum(counts, self.max_seq_len)
+        bounds = np.cumsum(kept_counts)[:-1]
+        results = []
+        for ids, v in zip(np.split(tokens[keep], bounds), np.split(vals[keep], bounds)):
+            if len(ids) == 0:
+                results.append(None)
+                continue
+            results.append((np.concatenate([self.prefix_ids, ids]),
+                            np.concatenate([np.zeros(2, dtype=np.float32), v])))
+        return results
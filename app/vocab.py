@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# COMPILED VOCAB ARTIFACT
+# ------------------------------------------------------------------------------
+# fp_model_vocab.json(650KB, 대부분 subset_genes) 파싱 + gene_metadata.parquet(pandas) 로드 +
+# 6만 개 FR vocab 파이썬 루프를 시작할 때마다 반복하지 않도록, 필요한 부분만 NumPy 배열로 묶어 .npz에 저장합니다.
+#
+#   fp_keys / fp_ids         : FP vocab (이름, token id) - vocab_map 순서 그대로
+#   fr_tokens                : FR 입력 토큰 (Ensembl ID, 특수 토큰 다음 순서) -> id = len(FR_SPECIAL_TOKENS) + 행 번호
+#   meta_token_ids (정렬됨)  : 메타데이터 token_id, 같은 순서의 meta_symbols / meta_ensembl
+#
+# 캐시 파일 이름은 (원본 두 파일 내용, 형식 버전) 해시이므로 원본이 바뀌면 자동으로 다시 만듭니다.
+FR_SPECIAL_TOKENS = ("[PAD]", "[CLS]", "[DRUG]", "[TARGET]", "[CELL]", "[MASK]")
+ARTIFACT_VERSION = "vocab-v1"
+
+
+def source_hash(*paths):
+    """원본 파일 내용 + 형식 버전 해시 (없는 파일은 경로만 반영)"""
+    h = hashlib.sha256(ARTIFACT_VERSION.encode())
+    for path in paths:
+        h.update(b"\x1f" + os.path.basename(path).encode())
+        if os.path.exists(path):
+            with open(path, "rb") as f: h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class CompiledVocab:
+    """
+    FP / FR vocab과 token_id -> (심볼, Ensembl ID) 매핑을 담은 배열 묶음
+
+    - 조회는 정렬된 token_id 배열에 대한 searchsorted (파이썬 사전 없이 벡터화)
+    - fp_vocab_map / fr_vocab_map 사전은 처음 접근할 때 배열로부터 만듭니다.
+    """
+    FIELDS = ("fp_keys", "fp_ids", "fr_tokens", "meta_token_ids", "meta_symbols", "meta_ensembl")
+
+    def __init__(self, fp_keys, fp_ids, fr_tokens, meta_token_ids, meta_symbols, meta_ensembl, version=""):
+        self.fp_keys = np.asarray(fp_keys, dtype=str)
+        self.fp_ids = np.asarray(fp_ids, dtype=np.int64)
+        self.fr_tokens = np.asarray(fr_tokens, dtype=str)
+        self.meta_token_ids = np.asarray(meta_token_ids, dtype=np.int64)
+        self.meta_symbols = np.asarray(meta_symbols, dtype=str)
+        self.meta_ensembl = np.asarray(meta_ensembl, dtype=str)
+        self.version = version
+        self._fp_vocab_map = None
+        self._fr_vocab_map = None
+
+    @property
+    def fp_vocab_map(self):
+        if self._fp_vocab_map is None:
+            self._fp_vocab_map = dict(zip(self.fp_keys.tolist(), self.fp_ids.tolist()))
+        return self._fp_vocab_map
+
+    @property
+    def fr_vocab_map(self):
+        if self._fr_vocab_map is None:
+            vocab = {tok: i for i, tok in enumerate(FR_SPECIAL_TOKENS)}
+            vocab.update(zip(self.fr_tokens.tolist(), range(len(FR_SPECIAL_TOKENS), len(FR_SPECIAL_TOKENS) + len(self.fr_tokens))))
+            self._fr_vocab_map = vocab
+        return self._fr_vocab_map
+
+    def _meta_rows(self, token_ids):
+        token_ids = np.asarray(token_ids, dtype=np.int64)
+        if len(self.meta_token_ids) == 0:
+            return np.full(token_ids.shape, -1, dtype=np.int64)
+        pos = np.clip(np.searchsorted(self.meta_token_ids, token_ids), 0, len(self.meta_token_ids) - 1)
+        return np.where(self.meta_token_ids[pos] == token_ids, pos, -1)
+
+    def _lookup(self, values, token_ids, default):
+        rows = self._meta_rows(token_ids)
+        out = np.full(rows.shape, default, dtype=object)
+        out[rows >= 0] = values[rows[rows >= 0]]
+        return out
+
+    def symbols(self, token_ids, default=""):
+        """token_id 배열 -> 유전자 심볼 (object 배열, 없으면 default)"""
+        return self._lookup(self.meta_symbols, token_ids, default)
+
+    def ensembl_ids(self, token_ids, default=""):
+        """token_id 배열 -> Ensembl ID (object 배열, 없으면 default)"""
+        return self._lookup(self.meta_ensembl, token_ids, default)
+
+    # --------------------------------------------------------------------------
+    # BUILD / SAVE / LOAD
+    # --------------------------------------------------------------------------
+    @classmethod
+    def compile(cls, vocab_path, gene_meta_path, version=""):
+        """원본 JSON / parquet -> CompiledVocab (기존 서비스 초기화와 같은 규칙)"""
+        fp_keys, fp_ids = [], []
+        if os.path.exists(vocab_path):
+            with open(vocab_path, "r", encoding="utf-8") as f:
+                vocab_map = json.load(f).get("vocab_map", {})
+            fp_keys, fp_ids = list(vocab_map.keys()), list(vocab_map.values())
+
+        fr_tokens, token_ids, symbols, ensembl = [], [], [], []
+        if os.path.exists(gene_meta_path):
+            import pandas as pd
+
+            df = pd.read_parquet(gene_meta_path)
+            ensembl_all = df["ensembl_id"].astype(str)
+            # FR 입력 vocab: 특수 토큰 다음에 처음 등장한 순서대로 (중복 제거)
+            fr_tokens = ensembl_all[~ensembl_all.isin(FR_SPECIAL_TOKENS)].drop_duplicates().tolist()
+            if "token_id" in df.columns:
+                order = np.argsort(df["token_id"].to_numpy(dtype=np.int64), kind="stable")
+                token_ids = df["token_id"].to_numpy(dtype=np.int64)[order]
+                ensembl = ensembl_all.to_numpy()[order]
+                symbols = (df["gene_symbol"].astype(str).to_numpy()[order] if "gene_symbol" in df.columns
+                           else np.full(len(order), ""))
+        else:
+            print(f"⚠️ Gene metadata not found at {gene_meta_path}")
+        return cls(fp_keys, fp_ids, fr_tokens, token_ids, symbols, ensembl, version=version)
+
+    def save(self, path):
+        """임시 파일에 쓴 뒤 교체 (동시에 시작한 워커끼리 덮어써도 안전)"""
+        tmp = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez(tmp, version=np.array(self.version), **{name: getattr(self, name) for name in self.FIELDS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        return cls(*(data[name] for name in cls.FIELDS), version=str(data["version"]))
+
+
+def load_vocab(vocab_path, gene_meta_path, cache_dir=None):
+    """
+    캐시 디렉터리에 같은 원본으로 만든 아티팩트가 있으면 그대로 읽고, 없으면 컴파일 후 저장합니다.
+    원본 파일이 하나라도 없으면 캐시하지 않습니다.
+    """
+    version = source_hash(vocab_path, gene_meta_path)
+    cacheable = cache_dir and os.path.exists(vocab_path) and os.path.exists(gene_meta_path)
+    cache_path = os.path.join(cache_dir, f"vocab-{version}.npz") if cacheable else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            return CompiledVocab.load(cache_path)
+        except Exception as e:
+            print(f"⚠️ Vocab artifact {cache_path} is unreadable, recompiling: {e}")
+
+    vocab = CompiledVocab.compile(vocab_path, gene_meta_path, version=version)
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            vocab.save(cache_path)
+            print(f"✅ Vocab artifact compiled: {cache_path}")
+        except OSError as e:
+            print(f"⚠️ Could not write vocab artifact {cache_path}: {e}")
+    return vocab
+
+
+if __name__ == "__main__":
+    import argparse
+
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    parser = argparse.ArgumentParser(description="FP/FR vocab + 유전자 메타데이터를 .npz 아티팩트로 컴파일")
+    parser.add_argument("--vocab", default=os.path.join(data_dir, "fp_model_vocab.json"))
+    parser.add_argument("--gene-meta", default=os.path.join(data_dir, "gene_metadata.parquet"))
+    parser.add_argument("--cache-dir", default=os.environ.get("BABAYAKGA_VOCAB_CACHE", os.path.join(data_dir, ".vocab_cache")))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    CompiledVocab.compile(args.vocab, args.gene_meta)
+    compile_s = time.perf_counter() - started
+    vocab = load_vocab(args.vocab, args.gene_meta, args.cache_dir)
+    started = time.perf_counter()
+    load_vocab(args.vocab, args.gene_meta, args.cache_dir)
+    print(f"FP vocab {len(vocab.fp_keys)} / FR vocab {len(vocab.fr_tokens)} / metadata {len(vocab.meta_token_ids)} genes")
+    print(f"compile from sources: {compile_s * 1000:.1f} ms, load artifact: {(time.perf_counter() - started) * 1000:.1f} ms")
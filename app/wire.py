@@ -0,0 +1,239 @@
+import json
+import struct
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # 표준 json으로 대체
+    orjson = None
+
+# ------------------------------------------------------------------------------
+# WIRE FORMATS
+# ------------------------------------------------------------------------------
+# application/json               : 기본 (orjson이 있으면 orjson으로 인코딩/디코딩)
+# application/x-msgpack          : msgpack map, 숫자 벡터는 bin(리틀 엔디언 float32/float16) 필드 (msgpack 필요)
+# application/x-babayakga-frame  : 아래 프레임 형식 (추가 의존성 없음)
+#
+#   b"BBK1" | uint32 LE 헤더 길이 | 헤더(JSON, UTF-8) | 8바이트 정렬된 배열 데이터
+#   헤더 = {"arrays": [{"name", "dtype", "shape", "offset"}, ...], "meta": {나머지 필드}}
+#   dtype: float32 | float16 | int32 | int64 (모두 리틀 엔디언), 문자열 리스트는 utf8 ("\n"으로 연결)
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+FRAME = "application/x-babayakga-frame"
+MEDIA_TYPES = (JSON, MSGPACK, FRAME)
+
+FRAME_MAGIC = b"BBK1"
+_DTYPES = {"float32": "<f4", "float16": "<f2", "int32": "<i4", "int64": "<i8"}
+_ALIGN = 8
+
+
+class WireFormatError(ValueError):
+    """본문을 해석할 수 없거나 지원하지 않는 형식 (API에서는 400/415로 변환)"""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray): return obj.tolist()
+    if isinstance(obj, np.generic): return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(body):
+    try:
+        return orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError as e:
+        raise WireFormatError(f"JSON 본문을 해석할 수 없습니다: {e}")
+
+
+# ------------------------------------------------------------------------------
+# FRAME
+# ------------------------------------------------------------------------------
+def encode_frame(fields, dtype="float32"):
+    """
+    fields: {name: 값}. np.ndarray는 dtype(float 배열) 또는 원래 정수 dtype으로, 문자열 리스트는 utf8 배열로,
+    나머지는 헤더 meta(JSON)로 보냅니다.
+    """
+    arrays, meta, chunks, offset = [], {}, [], 0
+    for name, value in fields.items():
+        if isinstance(value, np.ndarray):
+            kind = dtype if value.dtype.kind == "f" else str(value.dtype)
+            if kind not in _DTYPES:
+                raise WireFormatError(f"Unsupported array dtype for frame: {value.dtype}")
+            data = np.ascontiguousarray(value, dtype=_DTYPES[kind]).tobytes()
+            shape = list(value.shape)
+        elif isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+            kind, data, shape = "utf8", "\n".join(value).encode("utf-8"), [len(value)]
+        else:
+            meta[name] = value
+            continue
+        arrays.append({"name": name, "dtype": kind, "shape": shape, "offset": offset, "nbytes": len(data)})
+        pad = -len(data) % _ALIGN
+        chunks.append(data + b"\0" * pad)
+        offset += len(data) + pad
+
+    header = dumps_json({"arrays": arrays, "meta": meta})
+    pad = -(len(FRAME_MAGIC) + 4 + len(header)) % _ALIGN
+    header += b" " * pad
+    return b"".join([FRAME_MAGIC, struct.pack("<I", len(header)), header, *chunks])
+
+
+def _frame_int(value, what):
+    """헤더의 offset / nbytes / shape 값: 음수가 아닌 정수만 허용 (bool, 실수 제외)"""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise WireFormatError(f"프레임 {what} 값이 올바르지 않습니다: {value!r}")
+    return value
+
+
+def decode_frame(body):
+    """프레임 -> {name: 값}. 숫자 배열은 본문 버퍼를 그대로 가리키는 읽기 전용 NumPy 뷰"""
+    body = memoryview(body)
+    if len(body) < 8 or bytes(body[:4]) != FRAME_MAGIC:
+        raise WireFormatError("프레임 헤더가 올바르지 않습니다.")
+    (header_len,) = struct.unpack_from("<I", body, 4)
+    start = 8 + header_len
+    if start > len(body):
+        raise WireFormatError("프레임 헤더 길이가 본문보다 깁니다.")
+    header = loads_json(bytes(body[8:start]))
+    if not isinstance(header, dict):
+        raise WireFormatError("프레임 헤더는 JSON 객체여야 합니다.")
+    meta, specs = header.get("meta", {}), header.get("arrays", [])
+    if not isinstance(meta, dict) or not isinstance(specs, list):
+        raise WireFormatError("프레임 헤더의 meta는 객체, arrays는 리스트여야 합니다.")
+
+    fields = dict(meta)
+    for spec in specs:
+        if not isinstance(spec, dict) or not isinstance(spec.get("name"), str):
+            raise WireFormatError("프레임 배열 항목에 name이 없습니다.")
+        name, kind = spec["name"], spec.get("dtype")
+        offset = start + _frame_int(spec.get("offset"), f"'{name}' offset")
+        nbytes = _frame_int(spec.get("nbytes"), f"'{name}' nbytes")
+        if offset + nbytes > len(body):
+            raise WireFormatError(f"프레임 배열 '{name}' 이(가) 본문 범위를 벗어납니다.")
+        if kind == "utf8":
+            try:
+                fields[name] = bytes(body[offset:offset + nbytes]).decode("utf-8").split("\n") if nbytes else []
+            except UnicodeDecodeError:
+                raise WireFormatError(f"프레임 배열 '{name}' 이(가) UTF-8이 아닙니다.")
+            continue
+        if kind not in _DTYPES:
+            raise WireFormatError(f"지원하지 않는 dtype: {kind}")
+        dt = np.dtype(_DTYPES[kind])
+        if not isinstance(spec.get("shape"), list):
+            raise WireFormatError(f"프레임 배열 '{name}' 의 shape이 리스트가 아닙니다.")
+        shape = tuple(_frame_int(d, f"'{name}' shape") for d in spec["shape"])
+        # 파이썬 정수로 곱해 int64 오버플로 없이 nbytes(본문 범위 안)와 비교
+        count = 1
+        for d in shape: count *= d
+        if count * dt.itemsize != nbytes:
+            raise WireFormatError(f"프레임 배열 '{name}' 크기가 shape과 맞지 않습니다.")
+        fields[name] = np.frombuffer(body, dtype=dt, count=count, offset=offset).reshape(shape)
+    return fields
+
+
+# ------------------------------------------------------------------------------
+# MSGPACK
+# ------------------------------------------------------------------------------
+def _require_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise WireFormatError(f"{MSGPACK} 형식을 쓰려면 msgpack 패키지가 필요합니다.", status_code=415)
+    return msgpack
+
+
+def encode_msgpack(fields, dtype="float32"):
+    """np.ndarray(float)는 bin 필드로, dtype은 "dtypes" 맵에 기록"""
+    msgpack = _require_msgpack()
+    out, dtypes = {}, {}
+    for name, value in fields.items():
+        if isinstance(value, np.ndarray) and value.dtype.kind == "f":
+            out[name] = np.ascontiguousarray(value, dtype=_DTYPES[dtype]).tobytes()
+            dtypes[name] = dtype
+        elif isinstance(value, np.ndarray):
+            out[name] = value.tolist()
+        else:
+            out[name] = value
+    if dtypes: out["dtypes"] = dtypes
+    return msgpack.packb(out, use_bin_type=True)
+
+
+def decode_msgpack(body):
+    """bin 필드는 "dtypes" 맵(기본 float32)에 따라 NumPy 뷰로 변환"""
+    msgpack = _require_msgpack()
+    try:
+        fields = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise WireFormatError(f"msgpack 본문을 해석할 수 없습니다: {e}")
+    if not isinstance(fields, dict):
+        raise WireFormatError("msgpack 본문은 map이어야 합니다.")
+    dtypes = fields.pop("dtypes", None) or {}
+    if not isinstance(dtypes, dict):
+        raise WireFormatError("msgpack dtypes 필드는 map이어야 합니다.")
+    for name, value in fields.items():
+        if isinstance(value, (bytes, bytearray)):
+            kind = dtypes.get(name, "float32")
+            dt = _DTYPES.get(kind) if isinstance(kind, str) else None
+            if dt is None or len(value) % np.dtype(dt).itemsize:
+                raise WireFormatError(f"'{name}' 배열을 해석할 수 없습니다.")
+            fields[name] = np.frombuffer(value, dtype=dt)
+    return fields
+
+
+# ------------------------------------------------------------------------------
+# CONTENT NEGOTIATION
+# ------------------------------------------------------------------------------
+def _parse_media(header):
+    """'type/subtype; dtype=float16' -> ("type/subtype", {"dtype": "float16"})"""
+    parts = [p.strip() for p in (header or "").split(";")]
+    params = {}
+    for p in parts[1:]:
+        if "=" in p:
+            k, v = p.split("=", 1)
+            params[k.strip().lower()] = v.strip().strip('"')
+    return parts[0].lower(), params
+
+
+def decode_body(content_type, body):
+    media, _ = _parse_media(content_type)
+    if media in ("", JSON) or media.endswith("+json"):
+        fields = loads_json(body)
+        if not isinstance(fields, dict):
+            raise WireFormatError("JSON 본문은 객체여야 합니다.")
+        return fields
+    if media == FRAME: return decode_frame(body)
+    if media in (MSGPACK, "application/msgpack"): return decode_msgpack(body)
+    raise WireFormatError(f"지원하지 않는 Content-Type: {media}", status_code=415)
+
+
+def negotiate(accept):
+    """
+    Accept 헤더 -> (media_type, 벡터 dtype). 지원 형식이 없으면 JSON.
+    예) "application/x-babayakga-frame; dtype=float16"
+    """
+    for item in (accept or "").split(","):
+        media, params = _parse_media(item)
+        if media == "application/msgpack": media = MSGPACK
+        if media in MEDIA_TYPES:
+            dtype = params.get("dtype", "float32")
+            if dtype not in ("float32", "float16"):
+                raise WireFormatError(f"지원하지 않는 벡터 dtype: {dtype}", status_code=406)
+            return media, dtype
+    return JSON, "float32"
+
+
+def encode_body(media_type, fields, dtype="float32"):
+    """-> (bytes, Content-Type)"""
+    if media_type == FRAME:
+        return encode_frame(fields, dtype), f"{FRAME}; dtype={dtype}"
+    if media_type == MSGPACK:
+        return encode_msgpack(fields, dtype), MSGPACK
+    return dumps_json(fields), JSON
@@ -0,0 +1,51 @@
+"""
+유전자 세트 개수에 따른 enrichment 채점 시간 (희소 행렬곱 / 순열 검정)
+
+    python -m benchmarks.bench_enrichment --sets 100 1000 5000 20000 --batch 32 --permutations 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.enrichment import GeneSetEnrichment
+from app.services import FR_CONFIG
+from .common import timeit
+
+
+def synthetic_gene_sets(n_sets, genes, rng, min_size=15, max_size=300):
+    # 실제 컬렉션(MSigDB 등)처럼 출력 유전자 외의 유전자도 절반 정도 섞인 세트
+    universe = np.concatenate([genes, [f"OTHER{i}" for i in range(len(genes) * 20)]])
+    sizes = rng.integers(min_size, max_size, size=n_sets)
+    return {f"SET_{i}": rng.choice(universe, size=s, replace=False).tolist() for i, s in enumerate(sizes)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sets", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--permutations", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n_genes = FR_CONFIG["TOP_K"]
+    genes = np.array([f"GENE{i}" for i in range(n_genes)])
+    deltas = rng.normal(size=(args.batch, n_genes)).astype(np.float32)
+
+    print(f"{'sets':>7} {'kept':>7} {'nnz':>8} {'build(s)':>9} {'score p50(ms)':>14} {'summarize(ms)':>14} "
+          f"{'perm p50(ms)':>13}")
+    for n_sets in args.sets:
+        gene_sets = synthetic_gene_sets(n_sets, genes, rng)
+        t0 = time.perf_counter()
+        engine = GeneSetEnrichment.build(genes.tolist(), gene_sets, version="bench", min_size=3)
+        build_s = time.perf_counter() - t0
+
+        score = timeit(lambda: engine.score(deltas), repeat=10, warmup=2)
+        summarize = timeit(lambda: engine.summarize(deltas), repeat=10, warmup=2)
+        perm = timeit(lambda: engine.permutation_pvalues(deltas, args.permutations), repeat=3, warmup=1)
+        print(f"{n_sets:>7} {len(engine):>7} {engine.membership.nnz:>8} {build_s:>9.2f} {score['p50_ms']:>14.2f} "
+              f"{summarize['p50_ms']:>14.2f} {perm['p50_ms']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
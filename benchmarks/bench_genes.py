@@ -0,0 +1,58 @@
+"""
+유전자 식별자 조회: FP 토크나이저 심볼 조회 vs GeneResolver (레이아웃 캐시 없음 / 있음)
+
+    python -m benchmarks.bench_genes --sizes 1000 20000 60000
+"""
+import argparse
+
+import numpy as np
+
+from app.genes import GeneResolver
+from .common import make_service, timeit
+
+
+def mixed_identifiers(service, n_genes, rng):
+    # 심볼 / 소문자 심볼 / 버전 붙은 Ensembl ID / 메타데이터에 없는 이름이 섞인 payload
+    symbols = service.vocab.meta_symbols
+    ensembl = service.vocab.meta_ensembl
+    rows = rng.choice(len(symbols), size=n_genes, replace=n_genes > len(symbols))
+    kind = rng.integers(0, 10, size=n_genes)
+    names = []
+    for i, (row, k) in enumerate(zip(rows.tolist(), kind.tolist())):
+        if k < 6: names.append(str(symbols[row]))
+        elif k == 6: names.append(str(symbols[row]).lower())
+        elif k < 9: names.append(f"{ensembl[row]}.{k}")
+        else: names.append(f"UNKNOWN_{i}")
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 60000])
+    args = parser.parse_args()
+
+    service = make_service(lazy=True)
+    uncached = GeneResolver.from_vocab(service.vocab, cache_size=0)
+    cached = service.gene_resolver
+    rng = np.random.default_rng(0)
+    # 기존 방식: 대문자 FP vocab 키 하나로만 조회
+    symbol_only = {str(k).upper(): v for k, v in service.fp_vocab_map.items()}
+
+    def lookup(names):
+        return np.fromiter((symbol_only.get(str(g).upper(), -1) for g in names), dtype=np.int64, count=len(names))
+
+    print(f"{'genes':>7} {'symbol-only FP':>15} {'resolver FP':>12} {'lookup(ms)':>11} {'resolve(ms)':>12} {'cached(ms)':>11}")
+    for n in args.sizes:
+        names = mixed_identifiers(service, n, rng)
+        matched_old = int((lookup(names) >= 0).sum())
+        matched_new = int((uncached.resolve(names)[0] >= 0).sum())
+
+        t_old = timeit(lambda: lookup(names), repeat=10)
+        t_new = timeit(lambda: uncached.resolve(names), repeat=10)
+        t_hit = timeit(lambda: cached.resolve(names), repeat=10)
+        print(f"{n:>7} {matched_old:>15} {matched_new:>12} {t_old['p50_ms']:>11.2f} "
+              f"{t_new['p50_ms']:>12.2f} {t_hit['p50_ms']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+대량 입력 토큰화 (행별 encode vs CSR 블록 encode_csr) 와 스트리밍 ingest 처리량 / 메모리
+
+    python -m benchmarks.bench_ingest --rows 2000 --genes 5000 --density 0.1 --chunk-size 512
+
+FP forward를 빼고 토큰화만 비교하려면 --tokenize-only
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.ingest import ingest_file
+from .common import current_rss_mb, make_service, timeit
+from .synthetic import write_synthetic_checkpoints
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--genes", type=int, default=5000)
+    parser.add_argument("--density", type=float, default=0.1)
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[256, 1024])
+    parser.add_argument("--tokenize-only", action="store_true")
+    args = parser.parse_args()
+
+    work_dir = os.path.join(tempfile.gettempdir(), "babayakga-bench")
+    fp_path, _ = write_synthetic_checkpoints(work_dir)
+    service = make_service(fp_path=fp_path, lazy=True)
+    service.ensure_loaded("fp")
+
+    rng = np.random.default_rng(0)
+    vocab = np.array([g for g in service.fp_vocab_map if not g.startswith("[")])
+    genes = np.concatenate([vocab, [f"UNKNOWN_{i}" for i in range(max(0, args.genes - len(vocab)))]])[:args.genes]
+    rng.shuffle(genes)
+    matrix = sp.random(args.rows, args.genes, density=args.density, format="csr", dtype=np.float32,
+                       random_state=0, data_rvs=lambda n: rng.normal(0.0, 2.0, n))
+    token_ids = service.gene_resolver.resolve(genes.tolist())[0]
+    cols = np.flatnonzero(token_ids >= 0)
+    block = matrix[:512][:, cols]
+
+    def per_row():
+        for r in range(block.shape[0]):
+            row = block.getrow(r)
+            service.fp_tokenizer.encode_ids(token_ids[cols][row.indices], row.data)
+
+    t_row = timeit(per_row, repeat=3, warmup=1)
+    t_csr = timeit(lambda: service.fp_tokenizer.encode_csr(block, token_ids[cols]), repeat=3, warmup=1)
+    print(f"tokenize 512 rows: per-row encode {t_row['p50_ms']:.1f} ms / encode_csr {t_csr['p50_ms']:.1f} ms "
+          f"(x{t_row['p50_ms'] / t_csr['p50_ms']:.1f})")
+    if args.tokenize_only: return
+
+    import pandas as pd
+
+    path = os.path.join(work_dir, f"bulk_{args.rows}x{args.genes}.parquet")
+    frame = pd.DataFrame(matrix.toarray(), columns=genes)
+    frame.insert(0, "cell_id", [f"cell{i}" for i in range(args.rows)])
+    frame.to_parquet(path)
+    del frame
+
+    print(f"{'chunk':>6} {'samples/s':>10} {'seconds':>8} {'rss(MB)':>8}")
+    for chunk_size in args.chunk_size:
+        peak = [current_rss_mb()]
+        out = os.path.join(work_dir, "bulk_out.parquet")
+        t0 = time.perf_counter()
+        summary = ingest_file(service, path, out, chunk_size=chunk_size,
+                              progress=lambda s: peak.append(current_rss_mb()))
+        elapsed = time.perf_counter() - t0
+        print(f"{chunk_size:>6} {summary['samples'] / elapsed:>10.1f} {elapsed:>8.1f} {max(peak):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+패딩 제거 / 길이 구간 배치의 속도와 수치 동등성을 확인합니다.
+
+    python -m benchmarks.bench_length_buckets
+"""
+import numpy as np
+import torch
+
+from app.services import FP_CONFIG, FR_CONFIG
+from .common import make_service, random_signature, timeit
+
+
+def set_trim(service, enabled):
+    service.model_fp.encoder.trim_padding = enabled
+    service.model_fr.encoder.trim_padding = enabled
+
+
+def padded_fp(service, requests):
+    """기존 경로: 모든 요청을 MAX_SEQ_LEN + 2 까지 패딩"""
+    L = FP_CONFIG["MAX_SEQ_LEN"] + 2
+    encoded = [service._encode_fp_input(g, v) for g, v in requests]
+    ids = torch.full((len(encoded), L), FP_CONFIG["PAD_ID"], dtype=torch.long)
+    val = torch.zeros((len(encoded), L), dtype=torch.float32)
+    for r, (i, v) in enumerate(encoded):
+        ids[r, :len(i)] = torch.tensor(i)
+        val[r, :len(v)] = torch.tensor(v)
+    msk = (ids != FP_CONFIG["PAD_ID"]).long()
+    org = torch.zeros(len(encoded), dtype=torch.long)
+    with torch.no_grad():
+        _, z = service.model_fp(ids, val, msk, organ_id=org, return_smiles=True)
+    return z.numpy()
+
+
+def padded_fr(service, drug_vectors):
+    """기존 경로: [CLS][DRUG][CELL] + 512 [PAD]"""
+    B, L = len(drug_vectors), FR_CONFIG["PREFIX_LEN"] + FR_CONFIG["MAX_LEN"]
+    ids = torch.zeros((B, L), dtype=torch.long)
+    ids[:, :3] = torch.tensor([FR_CONFIG["CLS_ID"], FR_CONFIG["DRUG_TOK_ID"], FR_CONFIG["CELL_TOK_ID"]])
+    msk = (torch.arange(L) < 3).long().expand(B, -1)
+    with torch.no_grad():
+        out = service.model_fr(ids, torch.zeros((B, L)), msk, torch.zeros(B, dtype=torch.long),
+                               torch.tensor(np.asarray(drug_vectors), dtype=torch.float32))
+    return out.numpy()
+
+
+def main():
+    service = make_service()
+    rng = np.random.default_rng(0)
+
+    print(f"{'genes':>6} {'batch':>6} {'padded(ms)':>11} {'bucketed(ms)':>13} {'max|diff|':>10}")
+    for n_genes in (10, 30, 100, 300):
+        for batch in (1, 16):
+            requests = [random_signature(service, n_genes, rng) for _ in range(batch)]
+
+            set_trim(service, False)
+            ref = padded_fp(service, requests)
+            t_pad = timeit(lambda: padded_fp(service, requests))
+
+            set_trim(service, True)
+            out = np.asarray(service.predict_drug_batch(requests))
+            t_new = timeit(lambda: service.predict_drug_batch(requests))
+
+            diff = float(np.abs(out - ref).max())
+            assert np.allclose(out, ref, atol=1e-4), diff
+            print(f"{n_genes:>6} {batch:>6} {t_pad['p50_ms']:>11.2f} {t_new['p50_ms']:>13.2f} {diff:>10.2e}")
+
+    print("\nFR (drug_response)")
+    for batch in (1, 16):
+        drugs = rng.normal(size=(batch, FR_CONFIG["SMILES_DIM"])).astype(np.float32)
+        requests = [([], [], d.tolist(), 0) for d in drugs]
+
+        set_trim(service, False)
+        ref = padded_fr(service, drugs)
+        t_pad = timeit(lambda: padded_fr(service, drugs))
+
+        set_trim(service, True)
+        out = np.stack([
+            np.asarray([r["top_genes"][k] for k in r["top_genes"]]) for r in service.simulate_drug_response_batch(requests)
+        ])
+        t_new = timeit(lambda: service.simulate_drug_response_batch(requests))
+
+        ref_top = -np.sort(-np.abs(ref), axis=1)[:, :20]
+        diff = float(np.abs(np.abs(out) - ref_top).max())
+        assert diff < 1e-4, diff
+        print(f"batch={batch:>3}  padded {t_pad['p50_ms']:.2f} ms  trimmed {t_new['p50_ms']:.2f} ms  max|diff| {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
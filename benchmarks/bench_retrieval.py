@@ -0,0 +1,60 @@
+"""
+약물 라이브러리 크기에 따른 top-k 검색 지연 시간 (exact vs IVF-PQ)
+
+    python -m benchmarks.bench_retrieval --sizes 10000 100000 1000000 --queries 32
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.retrieval import DrugLibrary
+from app.services import FR_CONFIG
+from .common import timeit
+
+
+def synthetic_library(n, dim, rng, dtype):
+    # 실제 임베딩처럼 저차원 잠재 공간(64-d)을 dim 차원으로 투영하고 약간의 잡음을 더함
+    latent = rng.normal(size=(n, 64)).astype(np.float32)
+    proj = rng.normal(size=(64, dim)).astype(np.float32) / 8.0
+    emb = latent @ proj + 0.1 * rng.normal(size=(n, dim)).astype(np.float32)
+    return DrugLibrary([f"drug_{i}" for i in range(n)], emb, dtype=dtype)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--ivfpq", action="store_true", help="IVF-PQ 근사 인덱스도 측정")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dim = FR_CONFIG["SMILES_DIM"]
+    print(f"{'size':>9} {'index':>6} {'batch':>6} {'p50(ms)':>9} {'ms/query':>9} {'recall@k':>9}")
+    for n in args.sizes:
+        library = synthetic_library(n, dim, rng, np.dtype(args.dtype))
+        queries = library.embeddings[rng.integers(0, n, size=args.queries)].astype(np.float32)
+        queries += 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+
+        exact_idx, _ = library.search(queries, args.k)
+        for batch in (1, args.queries):
+            t = timeit(lambda: library.search(queries[:batch], args.k), repeat=5, warmup=1)
+            print(f"{n:>9} {'exact':>6} {batch:>6} {t['p50_ms']:>9.2f} {t['p50_ms'] / batch:>9.3f} {1.0:>9.3f}")
+
+        if args.ivfpq:
+            t0 = time.perf_counter()
+            library.build_index("ivfpq", n_lists=max(16, int(np.sqrt(n))))
+            build_s = time.perf_counter() - t0
+            approx_idx, _ = library.search(queries, args.k)
+            recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(approx_idx, exact_idx)])
+            for batch in (1, args.queries):
+                t = timeit(lambda: library.search(queries[:batch], args.k), repeat=5, warmup=1)
+                print(f"{n:>9} {'ivfpq':>6} {batch:>6} {t['p50_ms']:>9.2f} {t['p50_ms'] / batch:>9.3f} {recall:>9.3f}"
+                      f"  (build {build_s:.1f}s)")
+            library.build_index("exact")
+
+
+if __name__ == "__main__":
+    main()
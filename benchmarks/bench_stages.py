@@ -0,0 +1,79 @@
+"""
+서비스 단계별 마이크로 벤치마크 (전처리 / forward / 후처리)
+
+    python -m benchmarks.bench_stages
+"""
+import numpy as np
+import torch
+
+from app.precision import inference_context
+from app.services import FP_CONFIG, FR_CONFIG
+from .common import random_signature, timeit
+
+
+def fp_tensors(service, encoded):
+    L = max(len(ids) for ids, _ in encoded)
+    ids = np.full((len(encoded), L), FP_CONFIG["PAD_ID"], dtype=np.int64)
+    val = np.zeros((len(encoded), L), dtype=np.float32)
+    for r, (i, v) in enumerate(encoded):
+        ids[r, :len(i)] = i
+        val[r, :len(v)] = v
+    inp = torch.from_numpy(ids).to(service.device)
+    return inp, torch.from_numpy(val).to(service.device), (inp != FP_CONFIG["PAD_ID"]).long(), \
+        torch.zeros(len(encoded), dtype=torch.long).to(service.device)
+
+
+def fr_tensors(service, drugs):
+    B = len(drugs)
+    prefix = [FR_CONFIG["CLS_ID"], FR_CONFIG["DRUG_TOK_ID"], FR_CONFIG["CELL_TOK_ID"]]
+    return (torch.tensor([prefix] * B, dtype=torch.long).to(service.device),
+            torch.zeros((B, 3)).to(service.device),
+            torch.ones((B, 3), dtype=torch.long).to(service.device),
+            torch.zeros(B, dtype=torch.long).to(service.device),
+            torch.from_numpy(drugs).to(service.device))
+
+
+def run(service, gene_counts=(50, 1000, 20000), batches=(1, 16), seed=0):
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    for n_genes in gene_counts:
+        names, values = random_signature(service, n_genes, rng, unknown_frac=0.5)
+        results[f"fp.preprocess.genes={n_genes}"] = timeit(lambda: service._encode_fp_input(names, values))
+
+    for batch in batches:
+        requests = [random_signature(service, 300, rng) for _ in range(batch)]
+        encoded = [service._encode_fp_input(g, v) for g, v in requests]
+        tensors = fp_tensors(service, encoded)
+        results[f"fp.tensorize.batch={batch}"] = timeit(lambda: fp_tensors(service, encoded))
+
+        def fp_forward():
+            with inference_context(service.precision):
+                return service.model_fp(*tensors[:3], organ_id=tensors[3], return_smiles=True)[1]
+        results[f"fp.forward.batch={batch}"] = timeit(fp_forward)
+        z_pred = fp_forward()
+        results[f"fp.postprocess.batch={batch}"] = timeit(lambda: z_pred.float().cpu().numpy().tolist())
+        results[f"fp.end_to_end.batch={batch}"] = timeit(lambda: service.predict_drug_batch(requests))
+
+        drugs = rng.normal(size=(batch, FR_CONFIG["SMILES_DIM"])).astype(np.float32)
+        fr_in = fr_tensors(service, drugs)
+
+        def fr_forward():
+            with inference_context(service.precision):
+                return service.model_fr(*fr_in)
+        results[f"fr.forward.batch={batch}"] = timeit(fr_forward)
+        delta = fr_forward().float().cpu().numpy()
+        results[f"fr.postprocess.batch={batch}"] = timeit(lambda: service._summarize_fr_batch(delta))
+        fr_requests = [([], [], d.tolist(), 0) for d in drugs]
+        results[f"fr.end_to_end.batch={batch}"] = timeit(lambda: service.simulate_drug_response_batch(fr_requests))
+    return results
+
+
+if __name__ == "__main__":
+    from .common import make_service
+    from .synthetic import write_synthetic_checkpoints
+    import tempfile
+
+    fp_path, fr_path = write_synthetic_checkpoints(tempfile.gettempdir())
+    for name, t in run(make_service(fp_path, fr_path)).items():
+        print(f"{name:<34} p50 {t['p50_ms']:>9.3f} ms   mean {t['mean_ms']:>9.3f} ms")
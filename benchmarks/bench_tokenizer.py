@@ -0,0 +1,65 @@
+"""
+predict_drug_from_genes 전처리: 기존 파이썬 루프 vs 서비스 경로 (GeneResolver + FPTokenizer.encode_ids)
+
+    python -m benchmarks.bench_tokenizer --sizes 1000 20000 60000
+"""
+import argparse
+
+import numpy as np
+
+from app.services import FP_CONFIG
+from .common import make_service, timeit
+
+
+def legacy_encode(vocab_map, gene_names, gene_values):
+    """기존 구현 (유전자마다 upper / dict 조회 / np.clip, 파이썬 정렬 2회)"""
+    valid_inputs = []
+    for name, val in zip(gene_names, gene_values):
+        name_upper = str(name).upper()
+        if name_upper in vocab_map:
+            val_clipped = np.clip(float(val), -FP_CONFIG["DELTA_CLIP_ABS"], FP_CONFIG["DELTA_CLIP_ABS"])
+            valid_inputs.append((vocab_map[name_upper], val_clipped))
+    if not valid_inputs: return None
+    valid_inputs.sort(key=lambda x: abs(x[1]), reverse=True)
+    valid_inputs = valid_inputs[:FP_CONFIG["MAX_SEQ_LEN"]]
+    valid_inputs.sort(key=lambda x: x[0])
+    input_ids = [FP_CONFIG["CLS_ID"], FP_CONFIG["ORGAN_TOK_ID"]] + [t for t, _ in valid_inputs]
+    values = [0.0, 0.0] + [v for _, v in valid_inputs]
+    return input_ids, values
+
+
+def full_transcriptome(service, n_genes, rng):
+    # 전사체 전체 payload: FP vocab 유전자 + 나머지는 vocab 밖 유전자, 일부 값은 clip 경계를 넘김
+    vocab = np.array([g for g in service.fp_vocab_map if not g.startswith("[")])
+    names = [f"GENE{i}" for i in range(n_genes)]
+    hit = rng.choice(n_genes, size=min(len(vocab), n_genes // 2), replace=False)
+    for j, g in zip(hit, rng.permutation(vocab)):
+        names[j] = g.lower() if j % 7 == 0 else g
+    values = np.round(rng.normal(0.0, 3.0, size=n_genes), 2).tolist()
+    return names, values
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 60000])
+    args = parser.parse_args()
+
+    service = make_service()
+    rng = np.random.default_rng(0)
+    print(f"{'genes':>7} {'legacy(ms)':>11} {'vectorized(ms)':>15} {'speedup':>8}")
+    for n in args.sizes:
+        names, values = full_transcriptome(service, n, rng)
+
+        # 기존 구현은 소문자가 섞인 vocab 키(C11orf58 등)를 찾지 못하므로 대문자 키 기준으로 비교
+        upper_vocab = {k.upper(): v for k, v in service.fp_vocab_map.items()}
+        ref = legacy_encode(upper_vocab, names, values)
+        out = service._encode_fp_input(names, values)[0]
+        assert np.array_equal(out[0], ref[0]) and np.allclose(out[1], ref[1]), "토큰화 결과 불일치"
+
+        t_old = timeit(lambda: legacy_encode(service.fp_vocab_map, names, values), repeat=10)
+        t_new = timeit(lambda: service._encode_fp_input(names, values), repeat=10)
+        print(f"{n:>7} {t_old['p50_ms']:>11.2f} {t_new['p50_ms']:>15.2f} {t_old['p50_ms'] / t_new['p50_ms']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
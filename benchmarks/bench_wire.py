@@ -0,0 +1,65 @@
+"""
+요청/응답 직렬화 비용 비교 (pydantic + json vs orjson vs 바이너리 프레임)
+
+    python -m benchmarks.bench_wire --genes 2000
+"""
+import argparse
+import json
+from typing import List
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.services import FR_CONFIG
+from app.wire import FRAME, JSON, decode_body, dumps_json, encode_frame
+from .common import timeit
+
+
+class SimulationPayload(BaseModel):
+    smiles_embedding: List[float]
+    genes: List[str]
+    expressions: List[float]
+    cell_line_id: int = 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--genes", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    genes = [f"GENE{i}" for i in range(args.genes)]
+    expressions = rng.normal(size=args.genes).astype(np.float32)
+    drug = rng.normal(size=FR_CONFIG["SMILES_DIM"]).astype(np.float32)
+
+    json_body = json.dumps({"smiles_embedding": drug.tolist(), "genes": genes,
+                            "expressions": expressions.tolist(), "cell_line_id": 0}).encode()
+    frame16 = encode_frame({"smiles_embedding": drug, "genes": genes, "expressions": expressions}, dtype="float16")
+    frame32 = encode_frame({"smiles_embedding": drug, "genes": genes, "expressions": expressions})
+
+    def pydantic_decode():
+        payload = SimulationPayload(**json.loads(json_body))
+        return np.asarray(payload.smiles_embedding, dtype=np.float32)
+
+    def orjson_decode():
+        return np.asarray(decode_body(JSON, json_body)["smiles_embedding"], dtype=np.float32)
+
+    def frame_decode(body):
+        return np.asarray(decode_body(FRAME, body)["smiles_embedding"], dtype=np.float32)
+
+    print(f"request bytes: json={len(json_body)} frame(f32)={len(frame32)} frame(f16)={len(frame16)}")
+    print(f"{'decode':<24} {'p50(ms)':>9}")
+    for name, fn in [("json + pydantic", pydantic_decode), ("orjson -> numpy", orjson_decode),
+                     ("frame f32", lambda: frame_decode(frame32)), ("frame f16", lambda: frame_decode(frame16))]:
+        print(f"{name:<24} {timeit(fn, repeat=50)['p50_ms']:>9.3f}")
+
+    response = {"recommended_drug_vector": drug, "candidates": []}
+    print(f"{'encode (find_drug)':<24} {'p50(ms)':>9} {'bytes':>7}")
+    for name, fn in [("json (list)", lambda: json.dumps({"recommended_drug_vector": drug.tolist()}).encode()),
+                     ("orjson (numpy)", lambda: dumps_json(response)),
+                     ("frame f16", lambda: encode_frame(response, dtype="float16"))]:
+        print(f"{name:<24} {timeit(fn, repeat=50)['p50_ms']:>9.3f} {len(fn()):>7}")
+
+
+if __name__ == "__main__":
+    main()
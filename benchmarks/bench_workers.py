@@ -0,0 +1,116 @@
+"""
+워커 N개 서빙 시 시작 시간과 워커별 메모리 (RSS / PSS / 공유) 비교
+
+    python -m benchmarks.bench_workers --workers 4
+
+- uvicorn         : uvicorn --workers N (워커마다 torch.load, 가중치 복사)
+- uvicorn+mmap    : 위와 같지만 체크포인트를 mmap으로 로드 (페이지 캐시 공유)
+- preload         : python -m app.serve (부모에서 한 번 로드 후 fork)
+
+PSS 합계가 실제로 차지하는 물리 메모리입니다.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from .common import ROOT_DIR
+from .synthetic import write_synthetic_checkpoints
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def read_memory(pid):
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.endswith("kB\n"):
+                    fields[line.split(":")[0]] = int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+    return {
+        "rss_mb": fields.get("Rss", 0.0),
+        "pss_mb": fields.get("Pss", 0.0),
+        "shared_mb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+    }
+
+
+def wait_for_workers(port, n_workers, timeout):
+    """모든 워커가 응답할 때까지 /metrics/process 를 반복 호출 -> (경과 시간, 워커 pid 집합)"""
+    started = time.perf_counter()
+    pids = set()
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics/process", timeout=2) as r:
+                pids.add(json.loads(r.read())["pid"])
+        except OSError:
+            time.sleep(0.1)
+            continue
+        if len(pids) >= n_workers:
+            return time.perf_counter() - started, pids
+    raise TimeoutError(f"only {len(pids)}/{n_workers} workers answered within {timeout}s")
+
+
+def run_mode(mode, n_workers, env, timeout):
+    port = free_port()
+    env = dict(env)
+    env["BABAYAKGA_MMAP_WEIGHTS"] = "0" if mode == "uvicorn" else "1"
+    if mode == "preload":
+        cmd = [sys.executable, "-m", "app.serve", "--workers", str(n_workers), "--port", str(port),
+               "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--workers", str(n_workers), "--port", str(port),
+               "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+    try:
+        startup_s, pids = wait_for_workers(port, n_workers, timeout)
+        # 요청을 조금 처리한 뒤 측정 (copy-on-write로 떨어져 나가는 페이지 포함)
+        body = json.dumps({"genes": ["TP53", "EGFR"], "expressions": [1.0, -2.0]}).encode()
+        for _ in range(4 * n_workers):
+            req = urllib.request.Request(f"http://127.0.0.1:{port}/predict/find_drug", data=body,
+                                         headers={"Content-Type": "application/json"})
+            urllib.request.urlopen(req, timeout=30).read()
+        workers = {pid: read_memory(pid) for pid in sorted(pids)}
+        parent = read_memory(proc.pid)
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+
+    total_pss = sum(m["pss_mb"] for m in workers.values() if m) + (parent["pss_mb"] if parent else 0.0)
+    return {"startup_s": startup_s, "workers": workers, "parent": parent, "total_pss_mb": total_pss}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["uvicorn", "uvicorn+mmap", "preload"])
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    fp_path, fr_path = write_synthetic_checkpoints(os.path.join(tempfile.gettempdir(), "babayakga-bench"))
+    env = dict(os.environ, BABAYAKGA_FP_CKPT=fp_path, BABAYAKGA_FR_CKPT=fr_path,
+               BABAYAKGA_TORCH_THREADS="1", PYTHONPATH=ROOT_DIR)
+
+    print(f"{'mode':<14} {'startup(s)':>10} {'rss/worker':>11} {'pss/worker':>11} {'shared/worker':>14} {'total pss':>10}")
+    for mode in args.modes:
+        r = run_mode(mode, args.workers, env, args.timeout)
+        ws = [m for m in r["workers"].values() if m]
+        avg = lambda key: sum(m[key] for m in ws) / len(ws)
+        print(f"{mode:<14} {r['startup_s']:>10.2f} {avg('rss_mb'):>10.0f}M {avg('pss_mb'):>10.0f}M "
+              f"{avg('shared_mb'):>13.0f}M {r['total_pss_mb']:>9.0f}M")
+
+
+if __name__ == "__main__":
+    main()
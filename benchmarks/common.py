@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.services import IntegratedService  # noqa: E402
+
+
+def make_service(fp_path="", fr_path="", **kwargs):
+    """체크포인트가 없으면 모델은 랜덤 초기화 가중치로 동작합니다 (실제 shape 동일)."""
+    torch.manual_seed(0)
+    return IntegratedService(
+        fp_path=fp_path,
+        fr_path=fr_path,
+        vocab_path=os.path.join(DATA_DIR, "fp_model_vocab.json"),
+        gene_meta_path=os.path.join(DATA_DIR, "gene_metadata.parquet"),
+        **kwargs,
+    )
+
+
+def random_signature(service, n_genes, rng, unknown_frac=0.1):
+    """FP vocab에서 유전자를 뽑고 일부는 vocab 밖 이름으로 섞은 (genes, expressions) 쌍"""
+    vocab = [g for g in service.fp_vocab_map if not g.startswith("[")]
+    n_unknown = int(n_genes * unknown_frac)
+    genes = list(rng.choice(vocab, size=n_genes - n_unknown, replace=True))
+    genes += [f"UNKNOWN_{i}" for i in range(n_unknown)]
+    values = rng.normal(0.0, 2.0, size=n_genes).astype(np.float32).tolist()
+    return genes, values
+
+
+def timeit(fn, repeat=20, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    arr = np.asarray(samples) * 1000.0
+    return {"mean_ms": float(arr.mean()), "p50_ms": float(np.percentile(arr, 50)), "min_ms": float(arr.min())}
+
+
+def current_rss_mb():
+    """현재 프로세스 RSS (MB). /proc 이 없으면 최대 RSS로 대체"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
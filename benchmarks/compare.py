@@ -0,0 +1,43 @@
+"""
+두 run_all 결과 JSON 비교
+
+    python -m benchmarks.compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+import argparse
+import json
+
+
+def flatten(report):
+    rows = {}
+    for name, t in report.get("stages", {}).items():
+        rows[f"stage {name} p50_ms"] = t["p50_ms"]
+    for endpoint, levels in report.get("load", {}).items():
+        for c, r in levels.items():
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+                rows[f"load {endpoint} c={c} {key}"] = r[key]
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="회귀로 표시할 변화율")
+    args = parser.parse_args()
+
+    with open(args.old) as f: old = json.load(f)
+    with open(args.new) as f: new = json.load(f)
+    print(f"old: {old['meta'].get('commit')}  new: {new['meta'].get('commit')}")
+
+    a, b = flatten(old), flatten(new)
+    for key in sorted(set(a) & set(b)):
+        if a[key] == 0: continue
+        change = (b[key] - a[key]) / a[key]
+        # 처리량은 높을수록, 지연 시간은 낮을수록 좋음
+        worse = change < -args.threshold if key.endswith("rps") else change > args.threshold
+        flag = "⚠️" if worse else ""
+        print(f"{key:<50} {a[key]:>10.2f} -> {b[key]:>10.2f}  {change:>+7.1%} {flag}")
+
+
+if __name__ == "__main__":
+    main()
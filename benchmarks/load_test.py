@@ -0,0 +1,121 @@
+"""
+FastAPI 앱에 대한 프로세스 내(in-process) 동시성 부하 테스트
+
+    python -m benchmarks.load_test --concurrency 1 8 32 --duration 5
+
+httpx ASGITransport로 app.main:app 을 직접 호출하므로 네트워크 없이 서버 경로 전체
+(검증 -> 배치 스케줄러 -> 워커 풀 -> 모델 -> 직렬화)를 측정합니다.
+app.main 을 import 하기 전에 환경 변수(BABAYAKGA_*)가 설정되어 있어야 합니다.
+"""
+import asyncio
+import time
+
+import numpy as np
+
+from app.services import FR_CONFIG
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+    arr = np.asarray(latencies) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": float(arr.mean()),
+        "max_ms": float(arr.max()),
+    }
+
+
+def request_factories(service, seed=0):
+    """엔드포인트별 요청 본문 생성기 (매 요청마다 다른 입력 -> 캐시 영향 최소화)"""
+    from .common import random_signature
+
+    rng = np.random.default_rng(seed)
+    signatures = [random_signature(service, int(n), rng) for n in rng.integers(20, 400, size=64)]
+
+    def find_drug(i):
+        genes, values = signatures[i % len(signatures)]
+        return "/predict/find_drug", {"genes": genes, "expressions": values}
+
+    def drug_response(i):
+        genes, values = signatures[i % len(signatures)]
+        vec = rng.normal(size=FR_CONFIG["SMILES_DIM"]).astype(np.float32).tolist()
+        return "/predict/drug_response", {"smiles_embedding": vec, "genes": genes[:20], "expressions": values[:20]}
+
+    return {"find_drug": find_drug, "drug_response": drug_response}
+
+
+async def _run_level(client, make_request, concurrency, duration):
+    latencies, statuses = [], {}
+    counter = iter(range(10**9))
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            path, body = make_request(next(counter))
+            t0 = time.perf_counter()
+            r = await client.post(path, json=body)
+            latencies.append(time.perf_counter() - t0)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    ok = statuses.get(200, 0)
+    return {
+        **percentiles(latencies),
+        "requests": len(latencies),
+        "throughput_rps": ok / elapsed,
+        "error_rate": 1.0 - ok / max(1, len(latencies)),
+        "status_counts": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+async def run_async(concurrency_levels=(1, 8, 32), duration=5.0, endpoints=("find_drug", "drug_response")):
+    import httpx
+    from app.main import app, service
+
+    factories = request_factories(service)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+        for endpoint in endpoints:
+            # 워밍업
+            await _run_level(client, factories[endpoint], 2, 0.5)
+            results[endpoint] = {}
+            for c in concurrency_levels:
+                results[endpoint][str(c)] = await _run_level(client, factories[endpoint], c, duration)
+    return results
+
+
+def run(concurrency_levels=(1, 8, 32), duration=5.0, endpoints=("find_drug", "drug_response")):
+    return asyncio.run(run_async(concurrency_levels, duration, endpoints))
+
+
+def print_table(results):
+    print(f"{'endpoint':<14} {'conc':>5} {'req':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>6}")
+    for endpoint, levels in results.items():
+        for c, r in levels.items():
+            print(f"{endpoint:<14} {c:>5} {r['requests']:>6} {r['throughput_rps']:>8.1f} {r['p50_ms']:>8.1f} "
+                  f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['error_rate']:>6.1%}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+
+    from .synthetic import write_synthetic_checkpoints
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    fp_path, fr_path = write_synthetic_checkpoints(tempfile.gettempdir())
+    os.environ.setdefault("BABAYAKGA_FP_CKPT", fp_path)
+    os.environ.setdefault("BABAYAKGA_FR_CKPT", fr_path)
+    os.environ.setdefault("BABAYAKGA_CACHE_SIZE", "0")
+    print_table(run(args.concurrency, args.duration))
@@ -0,0 +1,88 @@
+"""
+추론 정밀도 모드(fp32 / bf16 / int8) 정확도 회귀 + 지연 시간 / 메모리 비교
+
+    python -m benchmarks.precision_harness --modes fp32 bf16 int8
+
+모드마다 별도 프로세스에서 같은 seed의 모델과 고정된 합성 입력으로 실행하고,
+fp32 대비 z_pred 코사인 유사도와 FR top-20 유전자 겹침 비율을 보고합니다.
+"""
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+
+from app.precision import PRECISION_MODES
+from app.services import FR_CONFIG
+from .common import current_rss_mb, timeit
+
+
+def fixed_inputs(service, n_fp, n_fr, seed=1234):
+    from .common import random_signature
+
+    rng = np.random.default_rng(seed)
+    fp_requests = [random_signature(service, int(n), rng) for n in rng.integers(10, 400, size=n_fp)]
+    drugs = rng.normal(size=(n_fr, FR_CONFIG["SMILES_DIM"])).astype(np.float32)
+    fr_requests = [([], [], d.tolist(), int(c)) for d, c in zip(drugs, rng.integers(0, FR_CONFIG["NUM_CELL_LINES"], n_fr))]
+    return fp_requests, fr_requests
+
+
+def run_mode(mode, n_fp, n_fr, fp_path, fr_path, out):
+    from .common import make_service
+
+    rss_before = current_rss_mb()
+    service = make_service(fp_path, fr_path, precision=mode)
+    rss_loaded = current_rss_mb()
+    fp_requests, fr_requests = fixed_inputs(service, n_fp, n_fr)
+
+    z_pred = np.asarray(service.predict_drug_batch(fp_requests), dtype=np.float32)
+    fr_top = [list(r["top_genes"]) for r in service.simulate_drug_response_batch(fr_requests)]
+
+    out.put({
+        "mode": mode,
+        "z_pred": z_pred,
+        "fr_top": fr_top,
+        "fp_latency": timeit(lambda: service.predict_drug_batch(fp_requests[:1]), repeat=30),
+        "fp_batch_latency": timeit(lambda: service.predict_drug_batch(fp_requests), repeat=5, warmup=1),
+        "fr_latency": timeit(lambda: service.simulate_drug_response_batch(fr_requests[:1]), repeat=30),
+        "fr_batch_latency": timeit(lambda: service.simulate_drug_response_batch(fr_requests), repeat=5, warmup=1),
+        "model_rss_mb": rss_loaded - rss_before,
+        "peak_rss_mb": current_rss_mb(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", default=list(PRECISION_MODES), choices=PRECISION_MODES)
+    parser.add_argument("--n-fp", type=int, default=64)
+    parser.add_argument("--n-fr", type=int, default=64)
+    parser.add_argument("--fp-ckpt", default="", help="실제 FP 체크포인트 (없으면 seed 고정 랜덤 가중치)")
+    parser.add_argument("--fr-ckpt", default="")
+    args = parser.parse_args()
+
+    modes = ["fp32"] + [m for m in args.modes if m != "fp32"]
+    ctx = mp.get_context("spawn")
+    results = {}
+    for mode in modes:
+        q = ctx.Queue()
+        p = ctx.Process(target=run_mode, args=(mode, args.n_fp, args.n_fr, args.fp_ckpt, args.fr_ckpt, q))
+        p.start()
+        results[mode] = q.get()
+        p.join()
+
+    ref = results["fp32"]
+    ref_z = ref["z_pred"] / np.linalg.norm(ref["z_pred"], axis=1, keepdims=True)
+    print(f"{'mode':>5} {'cos(z) min':>10} {'cos(z) mean':>11} {'top20 overlap':>13} "
+          f"{'FP b=1':>8} {'FP b={}'.format(args.n_fp):>8} {'FR b=1':>8} {'FR b={}'.format(args.n_fr):>8} {'model MB':>9}")
+    for mode in modes:
+        r = results[mode]
+        z = r["z_pred"] / np.linalg.norm(r["z_pred"], axis=1, keepdims=True)
+        cos = (z * ref_z).sum(axis=1)
+        overlap = np.mean([len(set(a) & set(b)) / 20.0 for a, b in zip(r["fr_top"], ref["fr_top"])])
+        print(f"{mode:>5} {cos.min():>10.4f} {cos.mean():>11.4f} {overlap:>13.3f} "
+              f"{r['fp_latency']['p50_ms']:>8.2f} {r['fp_batch_latency']['p50_ms']:>8.1f} "
+              f"{r['fr_latency']['p50_ms']:>8.2f} {r['fr_batch_latency']['p50_ms']:>8.1f} {r['model_rss_mb']:>9.1f}")
+    print("(latency: p50 ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+전체 벤치마크 실행 후 결과를 JSON으로 저장 (커밋 간 회귀 비교용)
+
+    python -m benchmarks.run_all --out benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.compare old.json new.json
+
+체크포인트는 실제 shape의 랜덤 가중치(seed 고정)를 사용합니다. BABAYAKGA_* 환경 변수로
+서빙 설정(배치 크기, 워커 수, precision, backend 등)을 바꿔 같은 방식으로 측정할 수 있습니다.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import torch
+
+from .common import ROOT_DIR
+from .synthetic import write_synthetic_checkpoints
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: benchmarks/results/<commit>.json)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fp_path, fr_path = write_synthetic_checkpoints(os.path.join(tempfile.gettempdir(), "babayakga-bench"), args.seed)
+    os.environ.setdefault("BABAYAKGA_FP_CKPT", fp_path)
+    os.environ.setdefault("BABAYAKGA_FR_CKPT", fr_path)
+    os.environ.setdefault("BABAYAKGA_CACHE_SIZE", "0")   # 캐시 없이 순수 추론 경로 측정
+
+    from . import bench_stages, load_test
+    from app.main import service, SERVING_CONFIG
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+            "serving_config": SERVING_CONFIG,
+            "env": {k: v for k, v in os.environ.items() if k.startswith("BABAYAKGA_")},
+        },
+        "stages": bench_stages.run(service),
+    }
+    if not args.skip_load:
+        report["load"] = load_test.run(args.concurrency, args.duration)
+        load_test.print_table(report["load"])
+
+    out = args.out or os.path.join(ROOT_DIR, "benchmarks", "results", f"{(commit or 'local')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
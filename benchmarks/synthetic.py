@@ -0,0 +1,48 @@
+"""
+실제 FP / FR shape을 가진 랜덤 초기화 체크포인트 생성 (배포되지 않는 .pt 대신 벤치마크용)
+
+    python -m benchmarks.synthetic --out /tmp/babayakga-ckpt
+"""
+import argparse
+import os
+
+import numpy as np
+import torch
+
+from app.services import FR_CONFIG, build_fp_model, build_fr_model
+from .common import DATA_DIR
+
+
+def write_synthetic_checkpoints(out_dir, seed=0):
+    """-> (fp_path, fr_path). 같은 seed면 같은 가중치 (이미 있으면 재사용)"""
+    os.makedirs(out_dir, exist_ok=True)
+    fp_path = os.path.join(out_dir, f"fp_synthetic_s{seed}.pt")
+    fr_path = os.path.join(out_dir, f"fr_synthetic_s{seed}.pt")
+    if os.path.exists(fp_path) and os.path.exists(fr_path):
+        return fp_path, fr_path
+
+    torch.manual_seed(seed)
+    torch.save({"model_state": build_fp_model().state_dict()}, fp_path)
+
+    # FR 출력 1000개 유전자에 대응하는 실제 token id (결과 해석 경로까지 동일하게 실행되도록)
+    rng = np.random.default_rng(seed)
+    token_ids = np.arange(FR_CONFIG["VOCAB_SIZE"])
+    meta_path = os.path.join(DATA_DIR, "gene_metadata.parquet")
+    if os.path.exists(meta_path):
+        import pandas as pd
+        token_ids = pd.read_parquet(meta_path, columns=["token_id"])["token_id"].to_numpy()
+    sorted_gene_ids = np.sort(rng.choice(token_ids, size=FR_CONFIG["TOP_K"], replace=False)).tolist()
+    torch.save({
+        "model_state": build_fr_model().state_dict(),
+        "extra": {"sorted_gene_token_ids": sorted_gene_ids},
+    }, fr_path)
+    return fp_path, fr_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=os.path.join(DATA_DIR, "synthetic"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for path in write_synthetic_checkpoints(args.out, args.seed):
+        print(path)
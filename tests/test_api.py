@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 모델을 로드하지 않고 요청 검증만 확인 (작업 큐 / 캐시 파일도 만들지 않음)
+os.environ.setdefault("BABAYAKGA_MODEL_LOADING", "lazy")
+os.environ["BABAYAKGA_JOB_DB"] = ""
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services import FR_CONFIG  # noqa: E402
+from app.wire import FRAME, encode_frame  # noqa: E402
+
+
+# ------------------------------------------------------------------------------
+# 요청 검증: null / NaN / inf 벡터는 forward 전에 422
+# ------------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_null_expression_is_rejected(client):
+    r = client.post("/predict/find_drug", json={"genes": ["TP53", "EGFR"], "expressions": [1.0, None]})
+    assert r.status_code == 422
+
+
+def test_non_finite_drug_vector_is_rejected(client):
+    vector = [0.0] * FR_CONFIG["SMILES_DIM"]
+    vector[3] = None
+    r = client.post("/predict/drug_response", json={"genes": ["TP53"], "expressions": [1.0],
+                                                    "smiles_embedding": vector, "cell_line_id": 0})
+    assert r.status_code == 422
+    # JSON은 inf를 표현할 수 없으므로 바이너리 프레임으로 전송
+    embedding = np.zeros(FR_CONFIG["SMILES_DIM"], dtype=np.float32)
+    embedding[3] = np.inf
+    body = encode_frame({"genes": ["TP53"], "expressions": np.ones(1, dtype=np.float32),
+                         "smiles_embedding": embedding, "cell_line_id": 0})
+    r = client.post("/predict/drug_response", content=body, headers={"content-type": FRAME})
+    assert r.status_code == 422
+
+
+def test_malformed_frame_is_a_client_error(client):
+    r = client.post("/predict/find_drug", content=b"BBK1\x02\x00\x00\x00[]",
+                    headers={"content-type": "application/x-babayakga-frame"})
+    assert r.status_code == 400
@@ -0,0 +1,64 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cache import ResponseCache, response_cache_key, response_cache_version  # noqa: E402
+
+
+# ------------------------------------------------------------------------------
+# 응답 캐시 키 / sqlite 2차 캐시
+# ------------------------------------------------------------------------------
+def _service(**overrides):
+    fields = {"fr_checkpoint_hash": "ckpt-a", "precision": "fp32",
+              "enrichment": SimpleNamespace(version="gmt-1"), "enrichment_permutations": 0}
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def _key(service):
+    return response_cache_key(np.ones(8, dtype=np.float32), 3, ["TP53", "EGFR"], [1.0, -2.0],
+                              version=response_cache_version(service))
+
+
+def test_cache_key_changes_with_model_configuration():
+    base = _key(_service())
+    assert _key(_service()) == base
+    assert _key(_service(fr_checkpoint_hash="ckpt-b")) != base
+    assert _key(_service(precision="bf16")) != base
+    assert _key(_service(enrichment=SimpleNamespace(version="gmt-2"))) != base
+    assert _key(_service(enrichment_permutations=1000)) != base
+
+
+def test_disk_tier_survives_restart_and_is_bounded(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(maxsize=4, ttl=60, disk_path=path, disk_maxsize=20, purge_every=8)
+    for i in range(64):
+        cache.set(f"k{i}", {"v": i})
+    reopened = ResponseCache(maxsize=4, ttl=60, disk_path=path, disk_maxsize=20)
+    assert reopened.get("k63") == {"v": 63}
+    assert reopened.get("k0") is None   # 행 수 상한을 넘어 지워짐
+    with reopened._db_lock:
+        assert reopened._connect().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] <= 20 + 8
+
+
+def test_disk_tier_concurrent_threads(tmp_path):
+    cache = ResponseCache(maxsize=2, ttl=60, disk_path=str(tmp_path / "cache.db"), purge_every=16)
+    errors = []
+
+    def worker(t):
+        try:
+            for i in range(200):
+                cache.set(f"{t}-{i}", i)
+                assert cache.get(f"{t}-{i}") == i
+        except Exception as e:   # sqlite3.ProgrammingError 등
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert errors == []
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.genes import GeneResolver  # noqa: E402
+from benchmarks.common import make_service  # noqa: E402
+
+
+# ------------------------------------------------------------------------------
+# 유전자 식별자 해석: 심볼 / Ensembl ID(버전 접미사) / 별칭이 같은 token id로, 반복 목록은 레이아웃 캐시에서
+# ------------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def vocab():
+    return make_service(lazy=True, warmup=False).vocab
+
+
+@pytest.fixture(scope="module")
+def genes(vocab):
+    """FP / FR vocab에 모두 있는 메타데이터 유전자 (심볼, Ensembl ID) 몇 개"""
+    resolver = GeneResolver.from_vocab(vocab, cache_size=0)
+    pairs = []
+    for symbol, ensembl in zip(vocab.meta_symbols.tolist(), vocab.meta_ensembl.tolist()):
+        fp_ids, fr_ids = resolver.resolve([symbol])
+        if symbol and ensembl and fp_ids[0] >= 0 and fr_ids[0] >= 0:
+            pairs.append((symbol, ensembl))
+        if len(pairs) == 4: break
+    assert len(pairs) == 4
+    return pairs
+
+
+def test_identifier_forms_resolve_to_same_ids(vocab, genes):
+    resolver = GeneResolver.from_vocab(vocab, cache_size=0)
+    symbols = [s for s, _ in genes]
+    expected = resolver.resolve(symbols)
+    for variant in ([s.lower() for s in symbols],
+                    [f"  {s} " for s in symbols],
+                    [e for _, e in genes],
+                    [f"{e}.12" for _, e in genes]):
+        fp_ids, fr_ids = resolver.resolve(variant)
+        np.testing.assert_array_equal(fp_ids, expected[0])
+        np.testing.assert_array_equal(fr_ids, expected[1])
+
+    fp_ids, fr_ids = resolver.resolve([symbols[0], "NOT_A_GENE", "ENSG99999999999.1"])
+    assert fp_ids[0] == expected[0][0]
+    assert fp_ids[1:].tolist() == [-1, -1] and fr_ids[1:].tolist() == [-1, -1]
+
+
+def test_aliases_skip_ambiguous_and_existing_keys(vocab, genes, tmp_path):
+    (a, _), (b, _), (c, _), _ = genes
+    path = tmp_path / "aliases.tsv"
+    path.write_text(f"alias\tsymbol\nMYALIAS\t{a}\nSHARED\t{b}\nSHARED\t{c}\n{a}\t{b}\n", encoding="utf-8")
+    resolver = GeneResolver.from_vocab(vocab, str(path), cache_size=0)
+    ids = lambda names: resolver.resolve(names)[0].tolist()   # noqa: E731
+
+    assert ids(["myalias"]) == ids([a])
+    assert ids(["SHARED"]) == [-1]          # 두 유전자를 가리키는 별칭은 등록하지 않음
+    assert ids([a]) != ids([b])             # 이미 있는 심볼은 별칭으로 덮어쓰지 않음
+
+
+def test_layout_cache_hits_and_evicts(vocab, genes):
+    resolver = GeneResolver.from_vocab(vocab, cache_size=2)
+    panel = [s for s, _ in genes]
+    first = resolver.resolve(panel)
+    again = resolver.resolve(list(panel))
+    assert again[0] is first[0] and resolver.hits == 1 and resolver.misses == 1
+    with pytest.raises(ValueError):
+        first[0][0] = 0                      # 캐시와 공유되는 읽기 전용 배열
+
+    resolver.resolve(panel[:2])
+    resolver.resolve(panel[:3])             # 가장 오래된 panel 레이아웃이 밀려남
+    assert resolver.stats()["layouts"] == 2
+    assert resolver.resolve(panel)[0] is not first[0] and resolver.misses == 4
+
+
+def test_non_string_identifiers_do_not_raise(vocab, genes):
+    resolver = GeneResolver.from_vocab(vocab)
+    symbol = genes[0][0]
+    fp_ids, fr_ids = resolver.resolve([7157, symbol, 1.5, None, np.int64(3)])
+    assert fp_ids.tolist() == [-1, resolver.resolve([symbol])[0][0], -1, -1, -1]
+    assert fr_ids[0] == -1
+    assert resolver.resolve(np.array([7157, 1672]))[0].tolist() == [-1, -1]
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ingest import ingest_file  # noqa: E402
+from benchmarks.common import make_service  # noqa: E402
+from benchmarks.synthetic import write_synthetic_checkpoints  # noqa: E402
+
+
+# ------------------------------------------------------------------------------
+# 대량 예측 행 == 같은 행을 /predict/find_drug (JSON 경로)로 보낸 결과
+# ------------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    fp_path, _ = write_synthetic_checkpoints(str(tmp_path_factory.mktemp("ckpt")))
+    service = make_service(fp_path=fp_path, lazy=True, warmup=False)
+    service.ensure_loaded("fp")
+    return service
+
+
+@pytest.fixture(scope="module")
+def frame(service):
+    rng = np.random.default_rng(0)
+    genes = [g for g in service.fp_vocab_map if not g.startswith("[")][:60]
+    values = rng.normal(0.0, 2.0, size=(24, len(genes))).astype(np.float32)
+    values[rng.random(values.shape) < 0.35] = 0.0   # dense 입력의 0은 측정값
+    values[3, 5] = values[7, 0] = np.nan            # 빈 칸은 입력에서 제외
+    frame = pd.DataFrame(values, columns=genes)
+    frame.insert(0, "cell_id", [f"cell{i}" for i in range(len(frame))])
+    return frame
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_bulk_rows_match_json_path(service, frame, fmt, tmp_path):
+    path = str(tmp_path / f"matrix.{fmt}")
+    if fmt == "csv":
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_parquet(path, index=False)
+    out_path = str(tmp_path / "out.parquet")
+    ingest_file(service, path, out_path, chunk_size=10, fp_batch=8)
+    out = pq.read_table(out_path).to_pydict()
+
+    genes = np.array(frame.columns[1:])
+    values = frame.iloc[:, 1:].to_numpy(dtype=np.float32)
+    assert out["sample_id"] == frame["cell_id"].tolist()
+    for i, row in enumerate(values):
+        keep = np.isfinite(row)
+        expected = service.predict_drug_from_genes(genes[keep].tolist(), row[keep].tolist())
+        assert out["n_genes"][i] == int(keep.sum())
+        np.testing.assert_allclose(np.asarray(out["recommended_drug_vector"][i]), expected, atol=1e-4)
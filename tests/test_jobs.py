@@ -0,0 +1,75 @@
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.jobs import JobLimitError, JobQueue  # noqa: E402
+
+
+# ------------------------------------------------------------------------------
+# sqlite 작업 큐: 우선순위, 클라이언트별 제한, 묶음 기록 / 취소, 중단된 작업 재개
+# ------------------------------------------------------------------------------
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), max_active_per_client=3, max_running_per_client=1)
+
+
+def test_claims_by_priority_and_running_limit(queue):
+    batch = queue.submit("alice", "bulk", {"n": 1}, total=4, priority="batch")
+    interactive = queue.submit("bob", "bulk", {"n": 2}, total=4, priority="interactive")
+    second = queue.submit("bob", "bulk", {"n": 3}, total=4, priority="interactive")
+
+    job = queue.claim("w1")
+    assert job["id"] == interactive and job["payload"] == {"n": 2} and job["done"] == 0
+    # bob은 이미 1개 실행 중이므로 더 높은 우선순위의 bob 작업보다 alice 작업이 먼저
+    assert queue.claim("w1")["id"] == batch
+    assert queue.claim("w1") is None
+    queue.finish(interactive, "w1")
+    assert queue.claim("w1")["id"] == second
+
+
+def test_active_limit_per_client(queue):
+    for i in range(3):
+        queue.submit("alice", "bulk", {"i": i}, total=1)
+    with pytest.raises(JobLimitError):
+        queue.submit("alice", "bulk", {"i": 3}, total=1)
+    queue.submit("bob", "bulk", {"i": 0}, total=1)   # 다른 클라이언트는 영향 없음
+
+
+def test_record_progress_results_and_cancel(queue):
+    job_id = queue.submit("alice", "screen", {}, total=4)
+    queue.claim("w1")
+    assert queue.record(job_id, "w1", 0, [{"v": 0}, {"v": 1}])
+    assert not queue.record(job_id, "w2", 2, [{"v": 2}])   # 다른 워커는 기록할 수 없음
+
+    status = queue.get(job_id)
+    assert status["state"] == "running" and status["progress"]["done"] == 2 and "eta_s" in status
+    assert [item for item, _ in queue.results(job_id)] == [0, 1]
+    assert [item for item, _ in queue.results(job_id, offset=1)] == [1]
+
+    assert queue.cancel(job_id)
+    assert not queue.record(job_id, "w1", 2, [{"v": 2}, {"v": 3}])   # 취소 후 다음 묶음은 버림
+    assert queue.get(job_id)["state"] == "cancelled" and len(queue.results(job_id)) == 2
+    assert not queue.cancel(job_id)
+
+
+def test_dead_worker_job_resumes_after_last_chunk(queue):
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    dead = f"{socket.gethostname()}:{proc.pid}"
+
+    job_id = queue.submit("alice", "bulk", {}, total=4)
+    queue.claim(dead)
+    queue.record(job_id, dead, 0, [{"v": 0}, {"v": 1}])
+
+    job = queue.claim("w2")   # 같은 호스트에서 종료된 프로세스의 작업은 다시 대기열로
+    assert job["id"] == job_id and job["done"] == 2
+    assert queue.record(job_id, "w2", 2, [{"v": 2}, {"v": 3}])
+    queue.finish(job_id, "w2", meta={"ok": True})
+    status = queue.get(job_id)
+    assert status["state"] == "succeeded" and status["meta"] == {"ok": True}
+    assert status["progress"]["fraction"] == 1.0
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.retrieval import DrugLibrary  # noqa: E402
+from app.services import FR_CONFIG  # noqa: E402
+from app.store import ResponseStore, build_response_store  # noqa: E402
+from benchmarks.common import make_service  # noqa: E402
+from benchmarks.synthetic import write_synthetic_checkpoints  # noqa: E402
+
+CELLS = [0, 3, 7]
+
+
+# ------------------------------------------------------------------------------
+# 라이브러리 x 세포주 store 왕복: 모든 라이브러리 행이 store에서 응답되고 값은 FR forward와 같음
+# ------------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def library():
+    rng = np.random.default_rng(0)
+    # 노름이 1이 아닌 원본 벡터 (정규화 x 노름 복원값은 원본과 마지막 비트가 다를 수 있음)
+    embeddings = rng.normal(0.0, 3.0, size=(37, FR_CONFIG["SMILES_DIM"])).astype(np.float32)
+    return [f"drug{i}" for i in range(len(embeddings))], embeddings
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory, library):
+    fp_path, fr_path = write_synthetic_checkpoints(str(tmp_path_factory.mktemp("ckpt")))
+    service = make_service(fp_path=fp_path, fr_path=fr_path, lazy=True, warmup=False)
+    service.ensure_loaded("fp", "fr")
+    names, embeddings = library
+    out_dir = str(tmp_path_factory.mktemp("store") / "response_store")
+    build_response_store(service, names, embeddings, out_dir, cell_line_ids=CELLS, batch_size=16)
+    service.drug_library = DrugLibrary(names, embeddings)
+    service.response_store = ResponseStore(out_dir)
+    return service
+
+
+def test_every_library_row_served_from_store(service):
+    store = service.response_store
+    assert store.matches_library(service.drug_library)
+    drugs = np.repeat(np.arange(len(service.drug_library)), len(CELLS)).tolist()
+    cells = CELLS * len(service.drug_library)
+    store.hits = store.misses = 0
+    results = service.screen_responses(drugs, cells)
+    assert store.hits == len(drugs) and store.misses == 0
+
+    live = service._fr_forward(service.drug_library.vectors(drugs), np.asarray(cells))
+    stored = np.stack([store.get(d, c) for d, c in zip(drugs, cells)]).astype(np.float32)
+    np.testing.assert_allclose(stored, live, atol=1e-2, rtol=1e-2)
+    np.testing.assert_allclose([r["response_score"] for r in results], np.abs(stored).mean(axis=1), rtol=1e-4)
+
+
+def test_raw_vectors_served_from_store(service, library):
+    store = service.response_store
+    _, embeddings = library
+    store.hits = store.misses = 0
+    service.simulate_drug_response_batch([([], [], vec, CELLS[1]) for vec in embeddings])
+    assert store.hits == len(embeddings) and store.misses == 0
+
+
+def test_other_library_does_not_use_row_order(service, library):
+    names, embeddings = library
+    shuffled = DrugLibrary(names[::-1], embeddings[::-1])
+    assert not service.response_store.matches_library(shuffled)
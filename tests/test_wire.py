@@ -0,0 +1,58 @@
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.wire import FRAME, FRAME_MAGIC, WireFormatError, decode_body, decode_frame, encode_frame  # noqa: E402
+
+
+# ------------------------------------------------------------------------------
+# 바이너리 프레임 / msgpack 디코딩
+# ------------------------------------------------------------------------------
+def _frame(header, data=b"\0" * 64):
+    header = json.dumps(header).encode()
+    return FRAME_MAGIC + struct.pack("<I", len(header)) + header + data
+
+
+def test_frame_round_trip():
+    vector = np.arange(6, dtype=np.float32).reshape(2, 3)
+    fields = decode_frame(encode_frame({"v": vector, "genes": ["TP53", "EGFR"], "top_k": 3}))
+    np.testing.assert_array_equal(fields["v"], vector)
+    assert fields["genes"] == ["TP53", "EGFR"] and fields["top_k"] == 3
+
+
+@pytest.mark.parametrize("header", [
+    [1, 2],
+    {"arrays": "v"},
+    {"meta": [1]},
+    {"arrays": [{"dtype": "float32"}]},
+    {"arrays": [{"name": "v", "dtype": "float32", "shape": [-2, -4], "offset": 0, "nbytes": 32}]},
+    {"arrays": [{"name": "v", "dtype": "float32", "shape": [2 ** 40, 2 ** 40], "offset": 0, "nbytes": 16}]},
+    {"arrays": [{"name": "v", "dtype": "float32", "shape": [4], "offset": -8, "nbytes": 16}]},
+    {"arrays": [{"name": "v", "dtype": "float32", "shape": [4], "offset": 0, "nbytes": 1 << 20}]},
+    {"arrays": [{"name": "v", "dtype": "float32", "shape": 4, "offset": 0, "nbytes": 16}]},
+    {"arrays": [{"name": "v", "dtype": "complex64", "shape": [2], "offset": 0, "nbytes": 16}]},
+    {"arrays": [{"name": "g", "dtype": "utf8", "offset": 0, "nbytes": 2}]},
+])
+def test_malformed_frame_is_rejected(header):
+    with pytest.raises(WireFormatError) as info:
+        decode_frame(_frame(header, b"\xff\xfe" + b"\0" * 62))
+    assert info.value.status_code == 400
+
+
+def test_truncated_frame_is_rejected():
+    with pytest.raises(WireFormatError):
+        decode_body(FRAME, FRAME_MAGIC + struct.pack("<I", 1000) + b"{}")
+
+
+def test_malformed_msgpack_dtypes_is_rejected():
+    msgpack = pytest.importorskip("msgpack")
+    for dtypes in ([1, 2], {"v": ["float32"]}, {"v": "float64"}):
+        body = msgpack.packb({"v": b"\0" * 8, "dtypes": dtypes}, use_bin_type=True)
+        with pytest.raises(WireFormatError):
+            decode_body("application/x-msgpack", body)